@@ -1,5 +1,10 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from datetime import datetime
+from typing import Optional, AsyncIterator, List
+import hashlib
+import json
 import logging
 
 from app.schemas.chat import (
@@ -7,33 +12,87 @@ from app.schemas.chat import (
     ChatMessageResponse,
     VoiceMessageRequest,
     VoiceMessageResponse,
+    VoiceStreamStart,
     ConversationHistoryResponse,
     ChatMessage,
-    MessageType
+    ConversationSession,
+    CreateSessionRequest,
+    QuestionContext,
+    MessageType,
+    InterviewEvaluation,
+    BulkEvaluationRequest,
+    BulkEvaluationJob
 )
-from app.services.ai_service import ai_service
+from app.core.metrics import time_stage
+from app.core.responses import FastJSONResponse, dump_json
+from app.core.container import get_ai_service, get_evaluation_service
+from app.services.code_diff import CodePatchError
+from app.services.evaluation import SessionNotFoundError
+from app.services.job_queue import JobQueueFullError
+from app.services.problem_catalog import problem_catalog
+from app.services.upstream import UpstreamOverloadedError
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(prefix="/chat", tags=["chat"], default_response_class=FastJSONResponse)
+
+def _resolve_question(question_id: Optional[str], question_context: Optional[QuestionContext]) -> Optional[QuestionContext]:
+    """Full question context for a request, looking up catalog problems sent by id"""
+    if question_context is not None or question_id is None:
+        return question_context
+    
+    question_context = problem_catalog.question_context(question_id)
+    if question_context is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown question_id: {question_id}"
+        )
+    return question_context
+
+async def _resolve_code(ai_service, session_id: Optional[str], code_context: Optional[str], code_patch: Optional[str], code_base_version: Optional[str]) -> Optional[str]:
+    """Full code for a request, applying a patch-style update to the session's last code"""
+    if code_patch is None:
+        return code_context
+    
+    try:
+        return await ai_service.apply_code_patch(session_id, code_patch, code_base_version)
+    except CodePatchError as e:
+        # The client should resend the full code_context
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Code patch rejected: {str(e)}"
+        )
 
 @router.post("/message", response_model=ChatMessageResponse)
-async def send_message(request: ChatMessageRequest):
+async def send_message(request: ChatMessageRequest, ai_service=Depends(get_ai_service)):
     """Send a message and get AI response"""
+    question_context = _resolve_question(request.question_id, request.question_context)
+    code_context = await _resolve_code(
+        ai_service, request.session_id, request.code_context, request.code_patch, request.code_base_version
+    )
     try:
         # Generate AI response with enhanced context
         ai_message = await ai_service.generate_ai_response(
             user_message=request.content,
             session_id=request.session_id,
-            question_context=request.question_context,  # Already a QuestionContext object from Pydantic
-            code_context=request.code_context
+            question_context=question_context,
+            code_context=code_context
         )
         
-        return ChatMessageResponse(
-            message=ai_message,
-            session_id=ai_message.session_id
-        )
+        with time_stage("response_build"):
+            # Built from service objects, so skip response_model re-validation
+            return FastJSONResponse(ChatMessageResponse(
+                message=ai_message,
+                session_id=ai_message.session_id
+            ))
         
+    except UpstreamOverloadedError as e:
+        logger.warning(f"Rejected send_message: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after))}
+        )
     except Exception as e:
         logger.error(f"Error in send_message: {e}")
         raise HTTPException(
@@ -41,21 +100,72 @@ async def send_message(request: ChatMessageRequest):
             detail=f"Failed to process message: {str(e)}"
         )
 
+def _sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {dump_json(data).decode('utf-8')}\n\n"
+
+@router.post("/message/stream")
+async def stream_message(request: ChatMessageRequest, ai_service=Depends(get_ai_service)):
+    """Send a message and stream the AI response as Server-Sent Events.
+
+    Emits a ``session`` event with the session id, one ``delta`` event per
+    token chunk, and a final ``done`` event carrying the stored ChatMessage.
+    """
+    # Resolved up front so bad ids and patches get a plain error status, not a stream error
+    question_context = _resolve_question(request.question_id, request.question_context)
+    code_context = await _resolve_code(
+        ai_service, request.session_id, request.code_context, request.code_patch, request.code_base_version
+    )
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event, payload in ai_service.stream_ai_response(
+                user_message=request.content,
+                session_id=request.session_id,
+                question_context=question_context,
+                code_context=code_context
+            ):
+                if event == "session":
+                    yield _sse_event("session", {"session_id": payload})
+                elif event == "delta":
+                    yield _sse_event("delta", {"content": payload})
+                else:
+                    yield _sse_event("done", ChatMessageResponse(
+                        message=payload,
+                        session_id=payload.session_id
+                    ).model_dump(mode="json"))
+        except UpstreamOverloadedError as e:
+            logger.warning(f"Rejected stream_message: {e}")
+            yield _sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            logger.error(f"Error in stream_message: {e}")
+            yield _sse_event("error", {"detail": f"Failed to process message: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.post("/voice", response_model=VoiceMessageResponse)
-async def send_voice_message(request: VoiceMessageRequest):
+async def send_voice_message(request: VoiceMessageRequest, ai_service=Depends(get_ai_service)):
     """Process voice message and get AI response"""
     try:
         # Process voice message
         transcribed_text, ai_response = await ai_service.process_voice_message(
             audio_data=request.audio_data,
-            session_id=request.session_id
+            session_id=request.session_id,
+            audio_format=request.audio_format
         )
         
-        return VoiceMessageResponse(
+        return FastJSONResponse(VoiceMessageResponse(
             transcribed_text=transcribed_text,
             ai_response=ai_response,
             session_id=ai_response.session_id
-        )
+        ))
         
     except Exception as e:
         logger.error(f"Error in send_voice_message: {e}")
@@ -64,23 +174,178 @@ async def send_voice_message(request: VoiceMessageRequest):
             detail=f"Failed to process voice message: {str(e)}"
         )
 
+@router.websocket("/voice/stream")
+async def stream_voice_message(websocket: WebSocket, ai_service=Depends(get_ai_service)):
+    """Voice turn over a WebSocket.
+
+    The client sends a JSON ``start`` frame (VoiceStreamStart), then raw binary
+    audio frames as they are recorded, then ``{"type": "end"}``. The server
+    replies with ``partial_transcript`` frames while audio arrives, a
+    ``transcript`` frame with the final text, and then the same
+    ``session``/``delta``/``done`` events as the SSE endpoint.
+    """
+    await websocket.accept()
+    try:
+        start = VoiceStreamStart.model_validate(await websocket.receive_json())
+        
+        async def audio_chunks() -> AsyncIterator[bytes]:
+            while True:
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                if frame.get("bytes") is not None:
+                    yield frame["bytes"]
+                elif frame.get("text") and json.loads(frame["text"]).get("type") == "end":
+                    return
+        
+        transcript = ""
+        async for segment in ai_service.transcriber.transcribe_stream(audio_chunks(), start.audio_format):
+            if segment.is_final:
+                transcript = segment.text
+            else:
+                await websocket.send_json({"type": "partial_transcript", "text": segment.text})
+        await websocket.send_json({"type": "transcript", "text": transcript})
+        
+        if not transcript:
+            await websocket.close()
+            return
+        
+        # Start the LLM call as soon as the final transcript is known
+        async for event, payload in ai_service.stream_ai_response(
+            user_message=transcript,
+            session_id=start.session_id,
+            question_context=_resolve_question(start.question_id, start.question_context),
+            code_context=await _resolve_code(
+                ai_service, start.session_id, start.code_context, start.code_patch, start.code_base_version
+            )
+        ):
+            if event == "session":
+                await websocket.send_json({"type": "session", "session_id": payload})
+            elif event == "delta":
+                await websocket.send_json({"type": "delta", "content": payload})
+            else:
+                await websocket.send_json({
+                    "type": "done",
+                    **ChatMessageResponse(message=payload, session_id=payload.session_id).model_dump(mode="json")
+                })
+        await websocket.close()
+        
+    except WebSocketDisconnect:
+        logger.info("Voice stream client disconnected")
+    except Exception as e:
+        logger.error(f"Error in stream_voice_message: {e}")
+        await websocket.send_json({"type": "error", "detail": f"Failed to process voice message: {str(e)}"})
+        await websocket.close(code=1011)
+
+def _naive_local(since: datetime) -> datetime:
+    # Stored timestamps are naive local time
+    return since.astimezone().replace(tzinfo=None) if since.tzinfo is not None else since
+
+def _parse_cursor(cursor: str) -> int:
+    try:
+        return max(int(cursor), 0)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _history_start(messages: List[ChatMessage], cursor: Optional[str], since_id: Optional[str], since: Optional[datetime]) -> int:
+    """Index of the first message to return for the given cursor / delta parameters"""
+    if cursor is not None:
+        return _parse_cursor(cursor)
+    
+    if since_id is not None:
+        for index, message in enumerate(messages):
+            if message.id == since_id:
+                return index + 1
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown since_id")
+    
+    if since is not None:
+        since = _naive_local(since)
+        # Messages are appended in time order, so the first newer one starts the delta
+        for index, message in enumerate(messages):
+            if message.timestamp > since:
+                return index
+        return len(messages)
+    
+    return 0
+
+def _history_response(
+    request: Request,
+    conversation: ConversationSession,
+    messages: List[ChatMessage],
+    message_count: int,
+    start: int,
+    end: int,
+    has_more: bool
+) -> Response:
+    """History page with an ETag, or 304 if the client already has it"""
+    session_id = conversation.session_id
+    etag_source = f"{session_id}:{message_count}:{conversation.updated_at.isoformat()}:{start}:{end}"
+    etag = f'"{hashlib.sha1(etag_source.encode("utf-8")).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # Long transcripts are the biggest payloads: encode the model directly
+    return FastJSONResponse(ConversationHistoryResponse.model_construct(
+        session_id=session_id,
+        messages=messages,
+        context=conversation.context,
+        message_count=message_count,
+        next_cursor=str(end) if has_more else None,
+        has_more=has_more
+    ), headers=headers)
+
 @router.get("/conversation/{session_id}", response_model=ConversationHistoryResponse)
-async def get_conversation_history(session_id: str):
-    """Get conversation history for a session"""
+async def get_conversation_history(
+    session_id: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    since_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    ai_service=Depends(get_ai_service)
+):
+    """Get conversation history for a session.
+
+    Without parameters the full history is returned. ``since_id`` or ``since``
+    return only newer messages; ``limit`` pages the result and ``next_cursor``
+    continues it. Responses carry an ETag, and a matching If-None-Match
+    returns 304 with no body. Sessions no longer in the session store are
+    paged straight from the database.
+    """
     try:
-        conversation = ai_service.get_conversation(session_id)
+        conversation = await ai_service.get_conversation(session_id)
+        if conversation:
+            messages = conversation.messages
+            start = _history_start(messages, cursor, since_id, since)
+            end = len(messages) if limit is None else min(start + limit, len(messages))
+            return _history_response(
+                request, conversation, messages[start:end], len(messages), start, end, end < len(messages)
+            )
         
-        if not conversation:
+        # The cursor is the sequence of the next message, as it is for in-memory sessions
+        after_sequence = _parse_cursor(cursor) - 1 if cursor is not None else None
+        try:
+            page = await ai_service.load_persisted_page(
+                session_id,
+                after_sequence=after_sequence,
+                since_id=since_id if cursor is None else None,
+                since=_naive_local(since) if since is not None and cursor is None and since_id is None else None,
+                limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if page is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
         
-        return ConversationHistoryResponse(
-            session_id=session_id,
-            messages=conversation.messages,
-            context=conversation.context,
-            message_count=len(conversation.messages)
+        conversation, rows, message_count, has_more = page
+        start = rows[0][0] if rows else message_count
+        end = rows[-1][0] + 1 if rows else start
+        return _history_response(
+            request, conversation, [message for _, message in rows], message_count, start, end, has_more
         )
         
     except HTTPException:
@@ -93,11 +358,29 @@ async def get_conversation_history(session_id: str):
         )
 
 @router.post("/session", response_model=dict)
-async def create_session():
-    """Create a new conversation session"""
+async def create_session(request: Optional[CreateSessionRequest] = None, ai_service=Depends(get_ai_service)):
+    """Create a new conversation session.
+
+    If the upcoming question is given, the interviewer's opening turn starts
+    generating right away; collect it from ``GET /session/{id}/opening``.
+    """
+    request = request or CreateSessionRequest()
+    question_context = _resolve_question(request.question_id, request.question_context)
     try:
-        session_id = ai_service.get_or_create_session()
-        return {"session_id": session_id}
+        session_id = await ai_service.get_or_create_session()
+        opening_pending = False
+        
+        if question_context:
+            context_updates = {"current_question": question_context.model_dump()}
+            if request.question_number is not None:
+                context_updates["question_number"] = request.question_number
+            if request.total_questions is not None:
+                context_updates["total_questions"] = request.total_questions
+            await ai_service.update_session_context(session_id, context_updates)
+            if request.prefetch_opening:
+                opening_pending = ai_service.schedule_opening(session_id, question_context)
+        
+        return {"session_id": session_id, "opening_pending": opening_pending}
         
     except Exception as e:
         logger.error(f"Error in create_session: {e}")
@@ -107,10 +390,15 @@ async def create_session():
         )
 
 @router.put("/session/{session_id}/context")
-async def update_session_context(session_id: str, context_updates: dict):
-    """Update conversation context for a session"""
+async def update_session_context(session_id: str, context_updates: dict, ai_service=Depends(get_ai_service)):
+    """Update conversation context for a session.
+
+    Moving the session to a new question (``question_id`` or
+    ``current_question``) cancels any pending opening and prefetches the
+    opening turn for the new one, unless ``prefetch_opening`` is false.
+    """
     try:
-        conversation = ai_service.get_conversation(session_id)
+        conversation = await ai_service.get_conversation(session_id)
         
         if not conversation:
             raise HTTPException(
@@ -118,9 +406,34 @@ async def update_session_context(session_id: str, context_updates: dict):
                 detail="Session not found"
             )
         
-        ai_service.update_session_context(session_id, context_updates)
+        context_updates = dict(context_updates)
+        prefetch_opening = bool(context_updates.pop("prefetch_opening", True))
+        question_id = context_updates.pop("question_id", None)
+        question_context = None
+        if question_id is not None or context_updates.get("current_question") is not None:
+            try:
+                question_context = _resolve_question(
+                    question_id,
+                    QuestionContext.model_validate(context_updates["current_question"]) if question_id is None else None
+                )
+            except ValidationError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Invalid current_question: {str(e)}"
+                )
+            context_updates["current_question"] = question_context.model_dump()
+        
+        # Read before updating: the store may hand back the very object the update mutates
+        previous_question = conversation.context.current_question or {}
+        await ai_service.update_session_context(session_id, context_updates)
+        
+        opening_pending = False
+        if question_context and question_context.id != previous_question.get("id"):
+            ai_service.cancel_opening(session_id)
+            if prefetch_opening:
+                opening_pending = ai_service.schedule_opening(session_id, question_context)
         
-        return {"message": "Context updated successfully"}
+        return {"message": "Context updated successfully", "opening_pending": opening_pending}
         
     except HTTPException:
         raise
@@ -129,4 +442,81 @@ async def update_session_context(session_id: str, context_updates: dict):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update context: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/session/{session_id}/opening", response_model=ChatMessageResponse)
+async def get_opening(
+    session_id: str,
+    wait: float = Query(0, ge=0, le=30, description="seconds to wait if it is still generating"),
+    ai_service=Depends(get_ai_service)
+):
+    """The prefetched interviewer opening for the session's current question.
+
+    200 with the message once it is ready (it is also in the history), 202
+    while it is still generating, 404 if none was scheduled or it was
+    dropped because the conversation moved on.
+    """
+    scheduled, message = await ai_service.get_opening(session_id, wait)
+    if message is not None:
+        return FastJSONResponse(ChatMessageResponse(message=message, session_id=session_id))
+    if scheduled and ai_service.opening_pending(session_id):
+        return FastJSONResponse({"session_id": session_id, "status": "pending"}, status_code=status.HTTP_202_ACCEPTED)
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="No opening available for this session"
+    )
+
+@router.post("/session/{session_id}/evaluate", response_model=InterviewEvaluation)
+async def evaluate_session(session_id: str, evaluation_service=Depends(get_evaluation_service)):
+    """Score a finished interview for correctness, complexity discussion and communication"""
+    try:
+        return FastJSONResponse(await evaluation_service.evaluate_session(session_id))
+        
+    except SessionNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    except UpstreamOverloadedError as e:
+        logger.warning(f"Rejected evaluate_session: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after))}
+        )
+    except Exception as e:
+        logger.error(f"Error in evaluate_session: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to evaluate session: {str(e)}"
+        )
+
+@router.post("/evaluations", response_model=BulkEvaluationJob, status_code=status.HTTP_202_ACCEPTED)
+async def start_bulk_evaluation(request: BulkEvaluationRequest, evaluation_service=Depends(get_evaluation_service)):
+    """Queue many sessions for evaluation; poll the returned job for progress"""
+    if not request.session_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="session_ids must not be empty"
+        )
+    try:
+        job = evaluation_service.start_bulk(request.session_ids)
+    except JobQueueFullError as e:
+        logger.warning(f"Rejected start_bulk_evaluation: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    return FastJSONResponse(job, status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/evaluations/{job_id}", response_model=BulkEvaluationJob)
+async def get_bulk_evaluation(job_id: str, evaluation_service=Depends(get_evaluation_service)):
+    """Progress and results of a bulk evaluation job"""
+    job = evaluation_service.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evaluation job not found"
+        )
+    return FastJSONResponse(job)
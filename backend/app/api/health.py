@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends
 from datetime import datetime
 from typing import Dict, Any
-import psutil
-import sys
 
-router = APIRouter()
+from app.core.container import ServiceContainer, get_container
+from app.core.responses import FastJSONResponse
+from app.services.health_monitor import health_monitor
+from app.services.prompts import prompt_renderer
+
+router = APIRouter(default_response_class=FastJSONResponse)
 
 @router.get("/health")
 async def health_check() -> Dict[str, Any]:
@@ -19,29 +22,21 @@ async def health_check() -> Dict[str, Any]:
     }
 
 @router.get("/health/detailed")
-async def detailed_health_check() -> Dict[str, Any]:
+async def detailed_health_check(container: ServiceContainer = Depends(get_container)) -> Dict[str, Any]:
     """
-    Detailed health check with system information
+    Detailed health check with system information and dependency probes.
+    Returns the latest background snapshot rather than sampling inline.
     """
-    memory = psutil.virtual_memory()
-    cpu_percent = psutil.cpu_percent()
+    snapshot = health_monitor.snapshot or await health_monitor.collect()
     
     return {
-        "status": "healthy",
+        **snapshot,
         "timestamp": datetime.now().isoformat(),
         "service": "Intervue API",
         "version": "1.0.0",
-        "system": {
-            "python_version": sys.version,
-            "cpu_usage_percent": cpu_percent,
-            "memory_usage_percent": memory.percent,
-            "memory_available_mb": memory.available / (1024 * 1024),
-            "disk_usage": {
-                "total_gb": psutil.disk_usage('/').total / (1024**3),
-                "used_gb": psutil.disk_usage('/').used / (1024**3),
-                "free_gb": psutil.disk_usage('/').free / (1024**3)
-            }
-        }
+        "prompt_cache": prompt_renderer.stats(),
+        # Not built until the first chat request
+        "upstream": container.started_ai_service.upstream_stats() if container.started_ai_service else None
     }
 
 @router.get("/test/cors")
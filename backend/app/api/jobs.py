@@ -0,0 +1,151 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+import logging
+
+from app.schemas.chat import ChatMessageRequest, ChatMessageResponse, VoiceMessageRequest, VoiceMessageResponse
+from app.schemas.job import Job, JobSubmitRequest
+from app.core.container import ServiceContainer, get_container, get_job_queue
+from app.core.responses import FastJSONResponse
+from app.api.chat import _resolve_code, _resolve_question
+from app.services.job_queue import JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], default_response_class=FastJSONResponse)
+
+def _parse_payload(model, payload: dict):
+    try:
+        return model.model_validate(payload)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False)
+        )
+
+async def _chat_message_work(request: ChatMessageRequest, container: ServiceContainer):
+    ai_service = await container.get_ai_service()
+    # Resolved now, so bad ids and patches are rejected at submit time
+    question_context = _resolve_question(request.question_id, request.question_context)
+    code_context = await _resolve_code(
+        ai_service, request.session_id, request.code_context, request.code_patch, request.code_base_version
+    )
+
+    async def work():
+        ai_message = await ai_service.generate_ai_response(
+            user_message=request.content,
+            session_id=request.session_id,
+            question_context=question_context,
+            code_context=code_context
+        )
+        return ChatMessageResponse(message=ai_message, session_id=ai_message.session_id)
+    return work
+
+async def _voice_message_work(request: VoiceMessageRequest, container: ServiceContainer):
+    ai_service = await container.get_ai_service()
+
+    async def work():
+        transcribed_text, ai_response = await ai_service.process_voice_message(
+            audio_data=request.audio_data,
+            session_id=request.session_id,
+            audio_format=request.audio_format
+        )
+        return VoiceMessageResponse(
+            transcribed_text=transcribed_text,
+            ai_response=ai_response,
+            session_id=ai_response.session_id
+        )
+    return work
+
+async def _evaluation_work(payload: dict, container: ServiceContainer):
+    session_id = payload.get("session_id")
+    if not isinstance(session_id, str) or not session_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="evaluation jobs need a session_id in the payload"
+        )
+    evaluation_service = await container.get_evaluation_service()
+    return lambda: evaluation_service.evaluate_session(session_id)
+
+@router.post("", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    request: JobSubmitRequest,
+    container: ServiceContainer = Depends(get_container),
+    job_queue=Depends(get_job_queue)
+):
+    """Queue a chat message, voice message or evaluation; poll the job or wait for its callback.
+
+    ``payload`` is the body the matching synchronous endpoint takes
+    (``/chat/message``, ``/chat/voice``) or ``{"session_id": ...}`` for an
+    evaluation. The job's result is that endpoint's response body.
+    """
+    if request.kind == "chat_message":
+        work = await _chat_message_work(_parse_payload(ChatMessageRequest, request.payload), container)
+    elif request.kind == "voice_message":
+        work = await _voice_message_work(_parse_payload(VoiceMessageRequest, request.payload), container)
+    else:
+        work = await _evaluation_work(request.payload, container)
+
+    try:
+        job = job_queue.submit(
+            request.kind,
+            work,
+            priority=request.priority,
+            callback_url=request.callback_url
+        )
+    except JobQueueFullError as e:
+        logger.warning(f"Rejected submit_job: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    return FastJSONResponse(job, status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str, job_queue=Depends(get_job_queue)):
+    """Status of a job, with its result or error once it has finished"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return FastJSONResponse(job)
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, job_queue=Depends(get_job_queue)):
+    """A finished job's result: 202 while it is queued or running, 409 if it failed or was cancelled"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if job.status == "succeeded":
+        return FastJSONResponse(job.result)
+    if job.status in ("queued", "running"):
+        return FastJSONResponse(
+            {"job_id": job.job_id, "status": job.status},
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Retry-After": "1"}
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Job {job.status}: {job.error}" if job.error else f"Job {job.status}"
+    )
+
+@router.delete("/{job_id}", response_model=Job)
+async def cancel_job(job_id: str, job_queue=Depends(get_job_queue)):
+    """Cancel a queued or running job"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    if not job_queue.cancel(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job already {job.status}"
+        )
+    return FastJSONResponse(job)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Optional
+
+from app.core.responses import FastJSONResponse
+from app.schemas.problem import Problem, ProblemListResponse, ProblemSummary
+from app.services.problem_catalog import problem_catalog
+
+router = APIRouter(prefix="/problems", tags=["problems"], default_response_class=FastJSONResponse)
+
+@router.get("", response_model=ProblemListResponse)
+async def list_problems(
+    difficulty: Optional[str] = Query(None, description="Easy, Medium or Hard"),
+    category: Optional[str] = Query(None, description="e.g. Arrays"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """List catalog problems, optionally filtered by difficulty and category"""
+    problems = problem_catalog.list(difficulty=difficulty, category=category)
+    page = problems[offset:offset + limit] if limit else problems[offset:]
+    return ProblemListResponse(
+        problems=[ProblemSummary(id=p.id, title=p.title, difficulty=p.difficulty, category=p.category) for p in page],
+        total=len(problems)
+    )
+
+@router.get("/categories", response_model=List[str])
+async def list_categories():
+    """Distinct problem categories"""
+    return problem_catalog.categories()
+
+@router.get("/{problem_id}", response_model=Problem)
+async def get_problem(problem_id: str):
+    """Full problem statement with examples, constraints, hints and starter code"""
+    problem = problem_catalog.get(problem_id)
+    if not problem:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Problem not found"
+        )
+    return FastJSONResponse(problem)
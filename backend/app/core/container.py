@@ -0,0 +1,109 @@
+import asyncio
+from typing import Optional, TYPE_CHECKING
+import logging
+
+from starlette.requests import HTTPConnection
+
+if TYPE_CHECKING:
+    from app.services.ai_service import AIService
+    from app.services.evaluation import EvaluationService
+    from app.services.job_queue import JobQueue
+    from app.core.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """Application-scoped services, built lazily on first use.
+
+    Created by the app lifespan and stored on ``app.state.container``; nothing
+    here runs at import time, so importing the app needs no API keys or
+    database. Tests can bypass it with ``app.dependency_overrides``.
+    """
+
+    def __init__(self, health_monitor=None):
+        self.health_monitor = health_monitor
+        self._ai_service: Optional["AIService"] = None
+        self._evaluation_service: Optional["EvaluationService"] = None
+        self._job_queue: Optional["JobQueue"] = None
+        self._rate_limiter: Optional["RateLimiter"] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def started_ai_service(self) -> Optional["AIService"]:
+        """The AI service if it has been built, without building it"""
+        return self._ai_service
+
+    async def get_ai_service(self) -> "AIService":
+        if self._ai_service is None:
+            async with self._lock:
+                if self._ai_service is None:
+                    self._ai_service = await self._build_ai_service()
+        return self._ai_service
+
+    async def get_evaluation_service(self) -> "EvaluationService":
+        if self._evaluation_service is None:
+            ai_service = await self.get_ai_service()
+            from app.services.evaluation import create_evaluation_service
+            self._evaluation_service = create_evaluation_service(ai_service, self.get_job_queue())
+        return self._evaluation_service
+
+    def get_job_queue(self) -> "JobQueue":
+        if self._job_queue is None:
+            from app.services.job_queue import create_job_queue
+            self._job_queue = create_job_queue()
+        return self._job_queue
+
+    def get_rate_limiter(self) -> "RateLimiter":
+        if self._rate_limiter is None:
+            from app.core.rate_limit import create_rate_limiter
+            self._rate_limiter = create_rate_limiter()
+        return self._rate_limiter
+
+    async def _build_ai_service(self) -> "AIService":
+        # Imported here: pulls in the OpenAI SDK and, with persistence, the database engine
+        from app.services.ai_service import AIService
+        
+        service = AIService()
+        if service.persister:
+            from app.db.database import init_db
+            await init_db()
+            await service.persister.start()
+        if self.health_monitor is not None:
+            service.register_health_probes(self.health_monitor)
+        logger.info("AI service initialized")
+        return service
+
+    async def shutdown(self):
+        """Flush and close whatever was built"""
+        # First, so no job (bulk evaluations included) is left running against services being closed
+        if self._job_queue is not None:
+            await self._job_queue.stop()
+        
+        if self._rate_limiter is not None:
+            await self._rate_limiter.close()
+        
+        service = self._ai_service
+        if service is None:
+            return
+        service.cancel_openings()
+        service.cancel_compactions()
+        if service.persister:
+            await service.persister.stop()
+        await service.sessions.close()
+        await service.client.close()
+
+def get_container(connection: HTTPConnection) -> ServiceContainer:
+    """FastAPI dependency for the lifespan-managed container (HTTP and WebSocket)"""
+    return connection.app.state.container
+
+async def get_ai_service(connection: HTTPConnection) -> "AIService":
+    """FastAPI dependency resolving the AI service, building it on first use"""
+    return await get_container(connection).get_ai_service()
+
+async def get_evaluation_service(connection: HTTPConnection) -> "EvaluationService":
+    """FastAPI dependency resolving the transcript evaluation service"""
+    return await get_container(connection).get_evaluation_service()
+
+def get_job_queue(connection: HTTPConnection) -> "JobQueue":
+    """FastAPI dependency for the background job queue"""
+    return get_container(connection).get_job_queue()
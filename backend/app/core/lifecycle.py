@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+def check_worker_count(workers: int):
+    """Refuse to serve with several worker processes behind one socket.
+
+    Per-session turn ordering, request coalescing, prefetched openings and
+    the job queue all live in process memory, and a load balancer cannot
+    pin a session to one of several workers sharing a listening socket.
+    Scale out with single-worker instances behind session affinity instead.
+    """
+    if workers > 1:
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={workers} is not supported: per-session state is process-local. "
+            "Run several instances with WEB_CONCURRENCY=1 behind a load balancer with session affinity"
+        )
+
+class InFlightTracker:
+    """Counts requests (including SSE streams and WebSockets) still being served"""
+
+    def __init__(self):
+        self.active = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self):
+        self.active += 1
+        self._idle.clear()
+
+    def exit(self):
+        self.active -= 1
+        if self.active <= 0:
+            self.active = 0
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait for in-flight work to finish; returns False if the timeout expired first"""
+        self.draining = True
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Shutdown drain timed out with {self.active} requests still in flight")
+            return False
+        logger.info(f"Drained in-flight requests in {time.monotonic() - started:.2f}s")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"active": self.active, "draining": self.draining}
+
+class InFlightMiddleware:
+    """ASGI middleware feeding an InFlightTracker.
+
+    Works at the raw ASGI level so a streaming response or WebSocket counts
+    as in flight until its last frame is sent.
+    """
+
+    def __init__(self, app, tracker: InFlightTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        self.tracker.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.exit()
+
+# Global in-flight tracker
+in_flight = InFlightTracker()
@@ -0,0 +1,431 @@
+import contextvars
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.responses import dump_json
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED_TOTAL = registry.counter(
+    "intervue_rate_limited_total",
+    "Requests rejected by the rate limiter, by the limit they hit",
+    ["limit"]
+)
+QUOTA_TOKENS_TOTAL = registry.counter(
+    "intervue_quota_tokens_total",
+    "Upstream tokens charged against daily quotas"
+)
+
+# (limiter, quota keys) of the request being served: the client IP, plus the
+# user for an authenticated one. Tasks started by the request inherit it, so
+# their upstream usage is charged too
+_quota: contextvars.ContextVar[Optional[Tuple["RateLimiter", Tuple[str, ...]]]] = contextvars.ContextVar("quota", default=None)
+
+_SESSION_PATH = re.compile(r"/(?:session|conversation)/([^/]+)")
+
+class Limit:
+    """Token bucket parameters: ``rate`` requests per second, bursts up to ``burst``"""
+
+    __slots__ = ("name", "rate", "burst")
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+
+def _seconds_until_utc_midnight(now: float) -> float:
+    return 86400 - now % 86400
+
+class RateLimitBackend(ABC):
+    """Where bucket levels and quota usage live"""
+
+    @abstractmethod
+    async def acquire(self, buckets: List[Tuple[str, Limit]]) -> Optional[Tuple[str, float]]:
+        """Take one token from every ``(key, limit)`` bucket, or from none of them.
+
+        None if all had a token, else (limit name, seconds until it has one)
+        for the first empty bucket.
+        """
+
+    @abstractmethod
+    async def usage(self, key: str) -> int:
+        """Tokens charged to ``key`` today (UTC)"""
+
+    @abstractmethod
+    async def add_usage(self, key: str, tokens: int) -> None:
+        """Charge ``tokens`` to ``key``'s daily quota"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters for monitoring"""
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local buckets; each worker process enforces its own limits.
+
+    Idle buckets (ones that have refilled completely) are dropped once there
+    are more than ``max_keys`` of them.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill (monotonic), seconds to refill from empty]
+        self._buckets: Dict[str, List[float]] = {}
+        # key -> [UTC day number, tokens used]
+        self._usage: Dict[str, List[int]] = {}
+        self.sweeps = 0
+
+    async def acquire(self, buckets: List[Tuple[str, Limit]]) -> Optional[Tuple[str, float]]:
+        now = time.monotonic()
+        levels = []
+        for key, limit in buckets:
+            bucket = self._buckets.get(key)
+            tokens = limit.burst if bucket is None else min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            if tokens < 1:
+                # Nothing is taken, so a request refused by one limit costs nothing against the others
+                return limit.name, (1 - tokens) / limit.rate
+            levels.append(tokens)
+
+        for (key, limit), tokens in zip(buckets, levels):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._sweep(now)
+                self._buckets[key] = [tokens - 1, now, limit.burst / limit.rate]
+            else:
+                bucket[0] = tokens - 1
+                bucket[1] = now
+        return None
+
+    def _sweep(self, now: float):
+        self.sweeps += 1
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket[1] < bucket[2]
+        }
+        if len(self._buckets) >= self.max_keys:
+            # Everything is active; forget the older half rather than grow without bound
+            keys = list(self._buckets)
+            self._buckets = {key: self._buckets[key] for key in keys[len(keys) // 2:]}
+
+    async def usage(self, key: str) -> int:
+        entry = self._usage.get(key)
+        if entry is None or entry[0] != int(time.time() // 86400):
+            return 0
+        return entry[1]
+
+    async def add_usage(self, key: str, tokens: int) -> None:
+        day = int(time.time() // 86400)
+        entry = self._usage.get(key)
+        if entry is None or entry[0] != day:
+            if entry is None and len(self._usage) >= self.max_keys:
+                self._usage = {k: v for k, v in self._usage.items() if v[0] == day}
+            self._usage[key] = [day, tokens]
+        else:
+            entry[1] += tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "buckets": len(self._buckets),
+            "quota_keys": len(self._usage),
+            "max_keys": self.max_keys,
+            "sweeps": self.sweeps,
+        }
+
+# KEYS: bucket keys; ARGV: rate and burst for each key in turn. Checks every
+# bucket before taking from any. Returns {0, "0"} if allowed, else the
+# 1-based index of the first empty bucket and the seconds to wait (as a string)
+_ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels = {}
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local burst = tonumber(ARGV[2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or burst
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+  if tokens < 1 then
+    return {i, tostring((1 - tokens) / rate)}
+  end
+  levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local burst = tonumber(ARGV[2 * i])
+  redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+  redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return {0, "0"}
+"""
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets and quotas shared by every worker over the Redis protocol.
+
+    All of a request's buckets are checked and updated in one atomic script
+    call. ``client`` can be any ``redis.asyncio`` compatible client; by
+    default one is created from ``url`` with a short ``socket_timeout``, since
+    every request waits on it. Errors and timeouts fail open.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key_prefix: str = "intervue:ratelimit:",
+        socket_timeout: float = 0.1,
+        client=None
+    ):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise ValueError("The redis package is required for the redis rate limit backend") from e
+            client = redis.Redis.from_url(
+                url or settings.REDIS_URL,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout
+            )
+        self.client = client
+        self.key_prefix = key_prefix
+        self._acquire = client.register_script(_ACQUIRE_SCRIPT)
+        self.errors = 0
+
+    def _quota_key(self, key: str) -> str:
+        return f"{self.key_prefix}quota:{int(time.time() // 86400)}:{key}"
+
+    async def acquire(self, buckets: List[Tuple[str, Limit]]) -> Optional[Tuple[str, float]]:
+        if not buckets:
+            return None
+        args = []
+        for _, limit in buckets:
+            args.extend((limit.rate, limit.burst))
+        try:
+            index, wait = await self._acquire(keys=[f"{self.key_prefix}{key}" for key, _ in buckets], args=args)
+        except Exception as e:
+            # Fail open: an unreachable Redis should not take the API down with it
+            self.errors += 1
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return None
+        if not index:
+            return None
+        return buckets[int(index) - 1][1].name, float(wait)
+
+    async def usage(self, key: str) -> int:
+        try:
+            return int(await self.client.get(self._quota_key(key)) or 0)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Quota lookup failed, allowing request: {e}")
+            return 0
+
+    async def add_usage(self, key: str, tokens: int) -> None:
+        quota_key = self._quota_key(key)
+        try:
+            pipe = self.client.pipeline()
+            pipe.incrby(quota_key, tokens)
+            pipe.expire(quota_key, 2 * 86400)
+            await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Failed to record quota usage for {key}: {e}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "errors": self.errors}
+
+class RateLimiter:
+    """Per-IP, per-user and per-session token buckets plus a daily upstream token quota.
+
+    Sessions are identified by the ``/session/{id}`` or ``/conversation/{id}``
+    path segment, or the ``session_header`` for routes that take the session
+    in the body. Users are identified by ``user_header`` only with
+    ``trust_user_header``, i.e. behind a gateway that authenticates the caller
+    and sets it; otherwise a client could pick a fresh id per request. The
+    quota is charged from the ``usage`` of every upstream call made while
+    serving the request, always to the client IP and also to the user when
+    there is one, and a request is refused once either is spent.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_limit: Optional[Limit] = None,
+        user_limit: Optional[Limit] = None,
+        session_limit: Optional[Limit] = None,
+        daily_token_quota: int = 0,
+        user_header: str = "x-user-id",
+        session_header: str = "x-session-id",
+        trust_forwarded: bool = False,
+        trust_user_header: bool = False
+    ):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.user_limit = user_limit
+        self.session_limit = session_limit
+        self.daily_token_quota = daily_token_quota
+        self.user_header = user_header.lower().encode("latin-1")
+        self.session_header = session_header.lower().encode("latin-1")
+        self.trust_forwarded = trust_forwarded
+        self.trust_user_header = trust_user_header
+
+    def identify(self, scope) -> Tuple[str, Optional[str], Optional[str]]:
+        """(client IP, authenticated user id, session id) for a request"""
+        user = session = forwarded = None
+        for name, value in scope["headers"]:
+            if name == self.user_header and self.trust_user_header:
+                user = value.decode("latin-1")
+            elif name == self.session_header:
+                session = value.decode("latin-1")
+            elif name == b"x-forwarded-for" and self.trust_forwarded:
+                forwarded = value.decode("latin-1").split(",", 1)[0].strip()
+
+        path = scope["path"]
+        if "/session/" in path or "/conversation/" in path:
+            match = _SESSION_PATH.search(path)
+            if match:
+                session = match.group(1)
+
+        client = scope.get("client")
+        ip = forwarded or (client[0] if client else "unknown")
+        return ip, user, session
+
+    async def check(self, scope) -> Optional[Tuple[str, float]]:
+        """None if the request may proceed, else (limit name, seconds to wait).
+
+        Every bucket is checked before any is charged. On success the
+        request's quota keys are bound for ``record_usage``.
+        """
+        ip, user, session = self.identify(scope)
+        quota_keys = (f"ip:{ip}", f"user:{user}") if user else (f"ip:{ip}",)
+
+        # Reads stay available once the quota is spent; only calls that can reach upstream are refused
+        if self.daily_token_quota > 0 and scope.get("method") not in ("GET", "HEAD"):
+            for key in quota_keys:
+                if await self.backend.usage(key) >= self.daily_token_quota:
+                    return "daily_token_quota", _seconds_until_utc_midnight(time.time())
+
+        buckets = [
+            (f"{limit.name}:{key}", limit)
+            for limit, key in ((self.ip_limit, ip), (self.user_limit, user), (self.session_limit, session))
+            if limit is not None and key is not None
+        ]
+        rejected = await self.backend.acquire(buckets)
+        if rejected is not None:
+            return rejected
+
+        _quota.set((self, quota_keys))
+        return None
+
+    async def charge(self, keys: Tuple[str, ...], tokens: int):
+        """Charge upstream tokens to each of a request's quota keys"""
+        if self.daily_token_quota <= 0 or tokens <= 0:
+            return
+        for key in keys:
+            await self.backend.add_usage(key, tokens)
+        QUOTA_TOKENS_TOTAL.inc(tokens)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.backend.stats(),
+            "limits": {
+                limit.name: {"rate": limit.rate, "burst": limit.burst}
+                for limit in (self.ip_limit, self.user_limit, self.session_limit) if limit is not None
+            },
+            "daily_token_quota": self.daily_token_quota,
+        }
+
+class RateLimitMiddleware:
+    """Reject over-limit requests with 429 and Retry-After before they reach a route.
+
+    WebSocket handshakes over the limit are closed with code 1013 (try again
+    later). Paths starting with one of ``exempt_paths`` are never limited.
+    """
+
+    def __init__(self, app, exempt_paths: Tuple[str, ...] = (), limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.exempt_paths = tuple(exempt_paths)
+        # Without an explicit limiter, the app's service container builds one on first use
+        self.limiter = limiter
+
+    def _limiter(self, scope) -> Optional[RateLimiter]:
+        if self.limiter is not None:
+            return self.limiter
+        container = getattr(scope["app"].state, "container", None)
+        return container.get_rate_limiter() if container is not None else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self._limiter(scope)
+        rejected = await limiter.check(scope) if limiter is not None else None
+        if rejected is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit, wait = rejected
+        RATE_LIMITED_TOTAL.inc(limit=limit)
+        retry_after = str(max(1, math.ceil(wait)))
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1013, "reason": f"Rate limited ({limit})"})
+            return
+
+        body = dump_json({"detail": f"Rate limit exceeded ({limit}), retry in {retry_after}s", "limit": limit})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", retry_after.encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def _limit(name: str, rate: float, burst: float) -> Optional[Limit]:
+    return Limit(name, rate, burst) if rate > 0 else None
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter selected by settings"""
+    backend_name = settings.RATE_LIMIT_BACKEND.lower()
+    if backend_name == "memory":
+        backend = InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    elif backend_name == "redis":
+        backend = RedisRateLimitBackend(url=settings.REDIS_URL, socket_timeout=settings.RATE_LIMIT_REDIS_TIMEOUT_SECONDS)
+    else:
+        raise ValueError(f"Unknown rate limit backend: {settings.RATE_LIMIT_BACKEND}")
+
+    return RateLimiter(
+        backend,
+        ip_limit=_limit("ip", settings.RATE_LIMIT_IP_PER_SECOND, settings.RATE_LIMIT_IP_BURST),
+        user_limit=_limit("user", settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST),
+        session_limit=_limit("session", settings.RATE_LIMIT_SESSION_PER_SECOND, settings.RATE_LIMIT_SESSION_BURST),
+        daily_token_quota=settings.DAILY_TOKEN_QUOTA,
+        user_header=settings.RATE_LIMIT_USER_HEADER,
+        session_header=settings.RATE_LIMIT_SESSION_HEADER,
+        trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+        trust_user_header=settings.RATE_LIMIT_TRUST_USER_HEADER
+    )
+
+async def record_usage(tokens: int):
+    """Charge upstream tokens to the quota of the request being served, if it was rate limited"""
+    bound = _quota.get()
+    if bound is not None:
+        limiter, keys = bound
+        await limiter.charge(keys, tokens)
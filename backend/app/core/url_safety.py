@@ -0,0 +1,61 @@
+import asyncio
+import ipaddress
+import socket
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+class UnsafeURLError(ValueError):
+    """Raised for an outbound URL that points somewhere the server must not call"""
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    return ip.is_global and not ip.is_multicast
+
+def is_allowed_host(host: str, allowed_hosts: Iterable[str]) -> bool:
+    return host.lower() in {allowed.lower() for allowed in allowed_hosts}
+
+def check_callback_url(url: str, allowed_hosts: Iterable[str] = ()) -> str:
+    """Reject callback URLs the server must not be made to call.
+
+    Only https is accepted. With an allowlist only its hosts are; otherwise
+    any host except literal non-public addresses (names are checked again
+    after resolution, see ``resolve_public_address``). Raises UnsafeURLError.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise UnsafeURLError("callback_url must use https")
+    host = parts.hostname
+    if not host:
+        raise UnsafeURLError("callback_url needs a host")
+    if parts.username or parts.password:
+        raise UnsafeURLError("callback_url must not carry credentials")
+
+    allowed_hosts = list(allowed_hosts)
+    if allowed_hosts:
+        if not is_allowed_host(host, allowed_hosts):
+            raise UnsafeURLError(f"callback_url host {host} is not allowed")
+        return url
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        # A name; its addresses are checked when the callback is sent
+        return url
+    if not _is_public(host):
+        raise UnsafeURLError(f"callback_url host {host} is not a public address")
+    return url
+
+async def resolve_public_address(host: str, port: Optional[int]) -> str:
+    """Resolve ``host`` and return one of its addresses, refusing non-public ones.
+
+    Every address the name resolves to must be public, so a name with one
+    private record cannot be used to reach internal services. Raises
+    UnsafeURLError for a non-public address and OSError if resolution fails.
+    """
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port or 443, proto=socket.IPPROTO_TCP)
+    addresses = [info[4][0] for info in infos]
+    if not addresses:
+        raise OSError(f"{host} did not resolve")
+    for address in addresses:
+        if not _is_public(address):
+            raise UnsafeURLError(f"{host} resolves to non-public address {address}")
+    return addresses[0]
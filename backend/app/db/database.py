@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
@@ -8,32 +8,55 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Convert PostgreSQL URL to async version
-async_database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+_engine = None
+_session_factory = None
 
-# Create async engine
-engine = create_async_engine(
-    async_database_url,
-    echo=settings.DEBUG,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
+def get_engine():
+    """Create the async engine on first use rather than at import"""
+    global _engine
+    if _engine is None:
+        # Convert PostgreSQL URL to async version
+        async_database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+        
+        # Pool sizing only applies to server databases; SQLite (aiosqlite) is used for local testing
+        engine_options = {"echo": settings.DEBUG}
+        if not async_database_url.startswith("sqlite"):
+            engine_options.update(
+                pool_size=10,
+                max_overflow=20,
+                pool_pre_ping=True,
+                pool_recycle=3600,
+            )
+        
+        # Create async engine
+        _engine = create_async_engine(async_database_url, **engine_options)
+    return _engine
 
-# Create async session factory
-AsyncSessionLocal = sessionmaker(
-    engine, 
-    class_=AsyncSession, 
-    expire_on_commit=False
-)
+def get_session_factory():
+    """Async session factory bound to the lazily created engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            get_engine(), 
+            class_=AsyncSession, 
+            expire_on_commit=False
+        )
+    return _session_factory
+
+def __getattr__(name):
+    # Backwards compatible module attributes, resolved lazily
+    if name == "engine":
+        return get_engine()
+    if name == "AsyncSessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Create base class for models
 Base = declarative_base()
 
 # Dependency to get async database session
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    async with get_session_factory()() as session:
         try:
             yield session
         except Exception as e:
@@ -47,8 +70,8 @@ async def get_db():
 async def test_database_connection():
     """Test database connection"""
     try:
-        async with engine.begin() as conn:
-            await conn.execute("SELECT 1")
+        async with get_engine().begin() as conn:
+            await conn.execute(text("SELECT 1"))
         logger.info("Database connection successful")
         return True
     except Exception as e:
@@ -58,8 +81,11 @@ async def test_database_connection():
 # Initialize database (create tables)
 async def init_db():
     """Initialize database tables"""
+    # Import models so they are registered on Base.metadata
+    import app.models.conversation  # noqa: F401
+    
     try:
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
         logger.info("Database tables created successfully")
     except Exception as e:
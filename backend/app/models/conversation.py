@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String, Text
+from datetime import datetime
+
+from app.models.base import BaseModel
+
+class Session(BaseModel):
+    """Persisted interview session; ``id`` is the API session_id"""
+    
+    context = Column(JSON, nullable=False, default=dict)
+    history_summary = Column(Text, nullable=True)
+    summarized_message_count = Column(Integer, nullable=False, default=0)
+
+class Message(BaseModel):
+    """Persisted chat message; ``id`` is the ChatMessage id"""
+    
+    session_id = Column(String, ForeignKey("session.id", ondelete="CASCADE"), nullable=False)
+    # Position within the session, used for ordering and keyset pagination
+    sequence = Column(Integer, nullable=False)
+    type = Column(String(16), nullable=False)
+    content = Column(Text, nullable=False)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    audio_url = Column(String, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_message_session_sequence", "session_id", "sequence", unique=True),
+    )
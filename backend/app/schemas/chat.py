@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -41,8 +41,22 @@ class QuestionContext(BaseModel):
 class ChatMessageRequest(BaseModel):
     content: str
     session_id: Optional[str] = None
+    # Either name a catalog problem (see /problems) or send the full context
+    question_id: Optional[str] = None
     question_context: Optional[QuestionContext] = None
     code_context: Optional[str] = None
+    # Alternative to code_context: a unified diff against the last code sent for this
+    # session, optionally pinned to that code's version (first 12 hex chars of its sha256)
+    code_patch: Optional[str] = None
+    code_base_version: Optional[str] = None
+
+class CreateSessionRequest(BaseModel):
+    # The upcoming question; when given, the interviewer's opening turn is prefetched
+    question_id: Optional[str] = None
+    question_context: Optional[QuestionContext] = None
+    question_number: Optional[int] = None
+    total_questions: Optional[int] = None
+    prefetch_opening: bool = True
 
 class ChatMessageResponse(BaseModel):
     message: ChatMessage
@@ -52,6 +66,18 @@ class VoiceMessageRequest(BaseModel):
     audio_data: str  # Base64 encoded audio data
     session_id: Optional[str] = None
     question_context: Optional[dict] = None
+    audio_format: str = "webm"
+
+class VoiceStreamStart(BaseModel):
+    """First frame on the voice WebSocket; raw audio frames follow, then {"type": "end"}"""
+    type: Literal["start"] = "start"
+    session_id: Optional[str] = None
+    question_id: Optional[str] = None
+    question_context: Optional[QuestionContext] = None
+    code_context: Optional[str] = None
+    code_patch: Optional[str] = None
+    code_base_version: Optional[str] = None
+    audio_format: str = "webm"
 
 class VoiceMessageResponse(BaseModel):
     transcribed_text: str
@@ -64,6 +90,8 @@ class ConversationContext(BaseModel):
     total_questions: int = 5
     interview_type: str = "mock_interview"
     user_code: Optional[str] = None
+    # Last code snapshot sent to the model in full; later turns send diffs against it
+    code_baseline: Optional[str] = None
     programming_language: str = "python"
 
 class ConversationSession(BaseModel):
@@ -72,9 +100,43 @@ class ConversationSession(BaseModel):
     context: ConversationContext
     created_at: datetime
     updated_at: datetime
+    # Rolling summary of messages[:summarized_message_count], maintained by the context budgeter
+    history_summary: Optional[str] = None
+    summarized_message_count: int = 0
 
 class ConversationHistoryResponse(BaseModel):
     session_id: str
     messages: List[ChatMessage]
     context: ConversationContext
-    message_count: int
\ No newline at end of file
+    message_count: int
+    # Pass back as ``cursor`` to fetch the next page; None when there is nothing more
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class InterviewEvaluation(BaseModel):
+    session_id: str
+    # Scores are 1-10
+    correctness: int
+    complexity_discussion: int
+    communication: int
+    overall: float
+    summary: str
+    strengths: List[str] = []
+    improvements: List[str] = []
+    transcript_hash: str
+    message_count: int
+    cached: bool = False
+
+class BulkEvaluationRequest(BaseModel):
+    session_ids: List[str]
+
+class BulkEvaluationJob(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed"]
+    total: int
+    completed: int = 0
+    failed: int = 0
+    results: Dict[str, InterviewEvaluation] = {}
+    errors: Dict[str, str] = {}
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional, Any, Dict, Literal
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.url_safety import check_callback_url
+
+JobKind = Literal["chat_message", "voice_message", "evaluation"]
+JobPriority = Literal["high", "normal", "low"]
+JobState = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+class JobSubmitRequest(BaseModel):
+    kind: JobKind
+    # Body of the matching endpoint: ChatMessageRequest, VoiceMessageRequest or {"session_id": ...}
+    payload: Dict[str, Any]
+    priority: JobPriority = "normal"
+    # POSTed the finished Job as JSON; https only, and never to private addresses
+    callback_url: Optional[str] = None
+
+    @field_validator("callback_url")
+    @classmethod
+    def _check_callback_url(cls, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return value
+        return check_callback_url(value, settings.JOB_CALLBACK_ALLOWED_HOSTS)
+
+class Job(BaseModel):
+    job_id: str
+    kind: JobKind
+    status: JobState
+    priority: JobPriority
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    callback_url: Optional[str] = None
+    callback_status: Optional[str] = None
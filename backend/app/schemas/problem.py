@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List, Dict
+
+from app.schemas.chat import ProblemExample
+
+class Problem(BaseModel):
+    id: str
+    title: str
+    difficulty: str
+    category: str
+    description: str
+    examples: List[ProblemExample] = []
+    constraints: List[str] = []
+    hints: List[str] = []
+    starter_code: Dict[str, str] = {}
+
+class ProblemSummary(BaseModel):
+    id: str
+    title: str
+    difficulty: str
+    category: str
+
+class ProblemListResponse(BaseModel):
+    problems: List[ProblemSummary]
+    total: int
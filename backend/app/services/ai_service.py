@@ -1,10 +1,26 @@
+import asyncio
+import base64
+import contextlib
+import hashlib
+import time
 import uuid
+import weakref
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, AsyncIterator, Tuple
 from openai import AsyncOpenAI
 import logging
 
 from app.core.config import settings
+from app.core.rate_limit import record_usage
+from app.core.metrics import (
+    CHAT_FALLBACKS_TOTAL,
+    CHAT_STAGE_SECONDS,
+    LLM_TOKENS_TOTAL,
+    OPENING_PREFETCH_TOTAL,
+    UPSTREAM_TTFT_SECONDS,
+    registry,
+    time_stage
+)
 from app.schemas.chat import (
     ChatMessage, 
     MessageType, 
@@ -12,113 +28,228 @@ from app.schemas.chat import (
     ConversationSession,
     QuestionContext
 )
+from app.services.code_diff import CodePatchError, apply_patch, code_version, plan_code_update
+from app.services.context_window import count_message_tokens, count_tokens, overflow_count, truncate_to_tokens
+from app.services.model_router import CLARIFICATION, SUMMARY, ModelRouter, create_model_router
+from app.services.problem_catalog import problem_catalog
+from app.services.prompts import prompt_renderer
+from app.services.response_cache import ResponseCache, create_response_cache
+from app.services.resilience import ResilientCaller, create_resilient_caller
+from app.services.session_store import SessionStore, create_session_store
+from app.services.transcription import Transcriber, create_transcriber
+from app.services.upstream import (
+    UpstreamLimiter,
+    UpstreamOverloadedError,
+    create_http_client,
+    create_upstream_limiter
+)
 
 logger = logging.getLogger(__name__)
 
+OPENING_INSTRUCTION = (
+    "The candidate has just opened this problem and has not said anything yet. "
+    "Greet them briefly, restate the problem in a sentence or two, and ask one "
+    "clarifying question to get them started."
+)
+
 class AIService:
     def __init__(self):
         if not settings.OPENAI_API_KEY:
             raise ValueError("OpenAI API key not configured")
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.conversations: Dict[str, ConversationSession] = {}
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL or None,
+            http_client=create_http_client(),
+            # Retries are handled by the resilience layer
+            max_retries=0
+        )
+        self.limiter: UpstreamLimiter = create_upstream_limiter()
+        self.resilience: ResilientCaller = create_resilient_caller()
+        self.router: ModelRouter = create_model_router()
+        self.response_cache: Optional[ResponseCache] = create_response_cache()
+        self.transcriber: Transcriber = create_transcriber(self.client)
+        self.persister = None
+        if settings.PERSISTENCE_ENABLED:
+            # Imported lazily so the database engine is only created when persistence is on
+            from app.services.persistence import create_persister
+            self.persister = create_persister()
+        
+        registry.register_collector(self._collect_metrics)
+        self.sessions: SessionStore = create_session_store()
+        # Per-session locks; entries disappear once no turn holds a reference
+        self._session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Coalescing key -> future of the in-flight (or just finished) response
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Session id -> background task generating that session's opening turn
+        self._openings: Dict[str, asyncio.Task] = {}
+        # Session id -> background task folding that session's history into its summary
+        self._compactions: Dict[str, asyncio.Task] = {}
     
-    def get_or_create_session(self, session_id: Optional[str] = None) -> str:
+    def _session_lock(self, session_id: Optional[str]):
+        """Lock serializing turns within a session (process-local)"""
+        if not session_id:
+            return contextlib.nullcontext()
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        return lock
+    
+    @staticmethod
+    def _coalesce_key(
+        user_message: str,
+        session_id: str,
+        question_context: Optional[QuestionContext],
+        code_context: Optional[str]
+    ) -> str:
+        """Identify requests that would produce the same turn"""
+        payload = "\x00".join([
+            session_id,
+            user_message.strip(),
+            code_context or "",
+            question_context.id if question_context else ""
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def get_or_create_session(self, session_id: Optional[str] = None) -> str:
         """Get existing session or create new one"""
-        if session_id and session_id in self.conversations:
-            return session_id
+        if session_id:
+            if await self.sessions.exists(session_id):
+                return session_id
+            # Evicted from the store but persisted: bring it back rather than starting over
+            session = await self.load_persisted_conversation(session_id)
+            if session is not None:
+                await self.sessions.put(session)
+                logger.info(f"Rehydrated session {session_id} with {len(session.messages)} messages")
+                return session_id
         
         new_session_id = str(uuid.uuid4())
-        self.conversations[new_session_id] = ConversationSession(
+        session = ConversationSession(
             session_id=new_session_id,
             messages=[],
             context=ConversationContext(),
             created_at=datetime.now(),
             updated_at=datetime.now()
         )
+        await self.sessions.put(session)
+        if self.persister:
+            self.persister.record_session(session)
         return new_session_id
     
-    def get_conversation(self, session_id: str) -> Optional[ConversationSession]:
+    async def get_conversation(self, session_id: str) -> Optional[ConversationSession]:
         """Get conversation by session ID"""
-        return self.conversations.get(session_id)
+        return await self.sessions.get(session_id)
+    
+    async def load_persisted_conversation(self, session_id: str, page_size: int = 500) -> Optional[ConversationSession]:
+        """Read a conversation back from the database (e.g. after it left the session store)"""
+        if not self.persister:
+            return None
+        from app.services.persistence import load_messages, load_session
+        
+        # Make sure buffered writes for this session are visible first
+        await self.persister.flush()
+        async with self.persister.session_factory() as db:
+            session = await load_session(db, session_id)
+            if session is None:
+                return None
+            after_sequence = None
+            while True:
+                page = await load_messages(db, session_id, after_sequence, page_size)
+                session.messages.extend(message for _, message in page)
+                if len(page) < page_size:
+                    break
+                after_sequence = page[-1][0]
+        return session
     
-    def add_message_to_session(self, session_id: str, message: ChatMessage):
+    async def load_persisted_page(
+        self,
+        session_id: str,
+        after_sequence: Optional[int] = None,
+        since_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        page_size: int = 500
+    ) -> Optional[Tuple[ConversationSession, List[Tuple[int, ChatMessage]], int, bool]]:
+        """One page of a persisted conversation, read with keyset pagination on ``sequence``.
+
+        Returns ``(session without messages, [(sequence, message)], message
+        count, has_more)``, or None if the session was never persisted.
+        Raises ValueError for a ``since_id`` that is not in the session.
+        """
+        if not self.persister:
+            return None
+        from app.services.persistence import count_messages, load_messages, load_session, message_sequence
+        
+        await self.persister.flush()
+        async with self.persister.session_factory() as db:
+            session = await load_session(db, session_id)
+            if session is None:
+                return None
+            if since_id is not None:
+                after_sequence = await message_sequence(db, session_id, since_id)
+                if after_sequence is None:
+                    raise ValueError("Unknown since_id")
+            message_count = await count_messages(db, session_id)
+            
+            if limit is not None:
+                # One extra row tells whether another page follows
+                page = await load_messages(db, session_id, after_sequence, limit + 1, since)
+                return session, page[:limit], message_count, len(page) > limit
+            
+            page = []
+            while True:
+                batch = await load_messages(db, session_id, after_sequence, page_size, since)
+                page.extend(batch)
+                if len(batch) < page_size:
+                    return session, page, message_count, False
+                after_sequence = batch[-1][0]
+    
+    async def add_message_to_session(self, session_id: str, message: ChatMessage):
         """Add message to conversation session"""
-        if session_id in self.conversations:
-            self.conversations[session_id].messages.append(message)
-            self.conversations[session_id].updated_at = datetime.now()
+        session = await self.sessions.get(session_id)
+        if session:
+            session.messages.append(message)
+            session.updated_at = datetime.now()
+            await self.sessions.put(session)
+            if self.persister:
+                self.persister.record_session(session)
+                self.persister.record_message(session_id, message, len(session.messages) - 1)
     
-    def update_session_context(self, session_id: str, context_updates: Dict[str, Any]):
+    async def update_session_context(self, session_id: str, context_updates: Dict[str, Any]):
         """Update conversation context"""
-        if session_id in self.conversations:
-            session = self.conversations[session_id]
+        session = await self.sessions.get(session_id)
+        if session:
+            question = context_updates.get("current_question")
+            previous = session.context.current_question or {}
+            if question is not None and question.get("id") != previous.get("id"):
+                # Code for a new problem starts a new baseline rather than a diff against the old one
+                session.context.code_baseline = None
             for key, value in context_updates.items():
                 if hasattr(session.context, key):
                     setattr(session.context, key, value)
             session.updated_at = datetime.now()
+            await self.sessions.put(session)
+            if self.persister:
+                self.persister.record_session(session)
+    
+    async def apply_code_patch(self, session_id: Optional[str], patch: str, base_version: Optional[str] = None) -> str:
+        """Full code after applying a client's patch to the session's last submitted code"""
+        session = await self.get_conversation(session_id) if session_id else None
+        base = (session.context.user_code or "") if session else ""
+        if base_version and base_version != code_version(base):
+            raise CodePatchError(f"Patch is against version {base_version}, current code is {code_version(base)}")
+        return apply_patch(base, patch)
     
     def build_interview_system_prompt(self, context: ConversationContext, question_context=None) -> str:
         """Build system prompt for interview context with problem-specific details"""
-        base_prompt = f"""You are an experienced technical interviewer conducting a mock interview. 
-
-Current context:
-- Question {context.question_number} of {context.total_questions}
-- Programming language: {context.programming_language}
-- Interview type: {context.interview_type}"""
-
-        # Add problem-specific context if available
-        if question_context and hasattr(question_context, 'title'):
-            base_prompt += f"""
-
-Current Problem: {question_context.title} ({question_context.difficulty})"""
-            
-            if hasattr(question_context, 'category') and question_context.category:
-                base_prompt += f"""
-- Category: {question_context.category}"""
-            
-            if hasattr(question_context, 'examples') and question_context.examples:
-                base_prompt += f"""
-- Examples available: {len(question_context.examples)} test cases"""
-                # Include first example for reference
-                if question_context.examples:
-                    first_example = question_context.examples[0]
-                    base_prompt += f"""
-- Sample: Input {first_example.input} → Output {first_example.output}"""
-            
-            if hasattr(question_context, 'constraints') and question_context.constraints:
-                base_prompt += f"""
-- Key constraints: {len(question_context.constraints)} requirements to consider"""
-            
-            if hasattr(question_context, 'hints') and question_context.hints:
-                base_prompt += f"""
-- Available hints: {len(question_context.hints)} strategic hints (use sparingly when stuck)"""
-
-        base_prompt += """
-
-Your role:
-1. Ask clarifying questions about the problem
-2. Guide the candidate through their thought process
-3. Reference specific examples and constraints when relevant
-4. Provide hints if they're stuck (but don't give away the solution)
-5. Comment on their approach and suggest improvements
-6. Ask about time/space complexity
-7. Be encouraging but honest about their performance
-
-Communication style:
-- Be conversational and supportive
-- Ask one question at a time
-- Keep responses concise (2-3 sentences typically)
-- Reference specific examples when helpful ("Looking at the example where...")
-- Mention constraints when relevant ("Remember the constraint that...")
-- Use problem category to guide suggestions (e.g., "This is an Arrays problem - consider...")
-- If they're coding, focus on their approach and logic
-- If it's a behavioral question, use the STAR method for evaluation
-
-Remember: You're helping them practice, so be constructive and educational. Use the problem's examples, constraints, and hints strategically to provide targeted guidance."""
-
-        return base_prompt
+        return prompt_renderer.render(context, question_context)
 
     def prepare_conversation_history(self, session: ConversationSession, question_context=None) -> List[Dict[str, str]]:
-        """Convert conversation history to OpenAI format"""
+        """Convert conversation history to OpenAI format.
+
+        Messages already folded into the session's rolling summary are replaced
+        by that summary; the rest are replayed verbatim.
+        """
         messages = [
             {
                 "role": "system",
@@ -126,40 +257,249 @@ Remember: You're helping them practice, so be constructive and educational. Use
             }
         ]
         
-        # Add conversation history
-        for msg in session.messages:
-            role = "user" if msg.type == MessageType.USER else "assistant"
+        if session.history_summary:
             messages.append({
-                "role": role,
-                "content": msg.content
+                "role": "system",
+                "content": f"Summary of the interview so far:\n{session.history_summary}"
             })
         
+        # Add conversation history. A fold may still be summarizing in the background;
+        # until it lands, the oldest turns are left out so the prompt stays within budget
+        history = self._unsummarized_history(session)
+        messages.extend(history[overflow_count(history, self._history_budget(session), settings.CONTEXT_KEEP_RECENT_MESSAGES):])
+        
         return messages
 
-    async def generate_ai_response(
-        self, 
-        user_message: str, 
-        session_id: str,
+    @staticmethod
+    def _unsummarized_history(session: ConversationSession) -> List[Dict[str, str]]:
+        return [
+            {
+                "role": "user" if msg.type == MessageType.USER else "assistant",
+                "content": msg.content
+            }
+            for msg in session.messages[session.summarized_message_count:]
+        ]
+
+    @staticmethod
+    def _history_budget(session: ConversationSession) -> int:
+        return settings.CONTEXT_HISTORY_MAX_TOKENS - count_tokens(session.history_summary or "")
+
+    def schedule_compaction(self, session_id: str):
+        """Fold old turns into the summary in the background, off the request path"""
+        task = self._compactions.get(session_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self.compact_history(session_id))
+        self._compactions[session_id] = task
+        task.add_done_callback(
+            lambda _: self._compactions.pop(session_id, None) if self._compactions.get(session_id) is task else None
+        )
+
+    def cancel_compactions(self):
+        for task in list(self._compactions.values()):
+            task.cancel()
+        self._compactions.clear()
+
+    async def compact_history(self, session_id: str):
+        """Fold the oldest turns into the rolling summary once history exceeds its token budget.
+
+        The summary call runs outside the session lock; its result is applied
+        under the lock, and only if no other fold landed in the meantime.
+        """
+        session = await self.get_conversation(session_id)
+        if not session:
+            return
+        
+        start = session.summarized_message_count
+        pending = self._unsummarized_history(session)
+        budget = self._history_budget(session)
+        # Fold down to a low-water mark, so the summary call happens every few turns rather than every turn
+        fold = overflow_count(
+            pending,
+            budget,
+            settings.CONTEXT_KEEP_RECENT_MESSAGES,
+            target_tokens=int(budget * settings.CONTEXT_COMPACT_TARGET_RATIO)
+        )
+        if not fold:
+            return
+        
+        try:
+            summary = await self.summarize_turns(session.history_summary, pending[:fold])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error compacting history for session {session_id}: {e}")
+            return
+        
+        async with self._session_lock(session_id):
+            session = await self.get_conversation(session_id)
+            if session is None or session.summarized_message_count != start:
+                return
+            session.history_summary = summary
+            session.summarized_message_count = start + fold
+            await self.sessions.put(session)
+            if self.persister:
+                self.persister.record_session(session)
+        logger.info(f"Folded {fold} messages into summary for session {session_id}")
+
+    async def summarize_turns(self, previous_summary: Optional[str], turns: List[Dict[str, str]]) -> str:
+        """Extend the rolling summary with the given turns"""
+        transcript = "\n".join(
+            f"{'Candidate' if t['role'] == 'user' else 'Interviewer'}: {t['content']}" for t in turns
+        )
+        route = self.router.routes[SUMMARY]
+        max_tokens = route.max_tokens
+        try:
+            upstream_started = time.perf_counter()
+            response = await self.create_completion(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You maintain running notes on a mock technical interview. "
+                                   "Update the notes with the new exchange. Keep the candidate's approach, "
+                                   "code decisions, complexity discussion, hints given and open questions. "
+                                   f"Reply with the updated notes only, under {max_tokens} tokens."
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Current notes:\n{previous_summary or '(none)'}\n\nNew exchange:\n{transcript}"
+                    }
+                ],
+                **route.completion_kwargs()
+            )
+            if response.usage:
+                self.router.record(SUMMARY, route, upstream_started, response.usage.prompt_tokens, response.usage.completion_tokens)
+            return response.choices[0].message.content
+        except Exception as e:
+            logger.error(f"Error summarizing conversation history: {e}")
+            # Fall back to a truncated transcript so the budget still holds
+            combined = f"{previous_summary}\n{transcript}" if previous_summary else transcript
+            return truncate_to_tokens(combined, max_tokens)
+
+    async def _cache_scope(self, session_id: str, code_context: Optional[str], system_prompt: str) -> Optional[str]:
+        """Cache partition for a turn that does not depend on the conversation so far, or None.
+
+        That is the candidate's first message, either opening the session or
+        answering the interviewer's prefetched opening (itself cached per
+        question, so the exchange repeats across sessions).
+        """
+        if self.response_cache is None or code_context:
+            return None
+        session = await self.get_conversation(session_id)
+        if session is None:
+            return None
+        earlier = session.messages[:-1]
+        if not earlier:
+            return system_prompt
+        if len(earlier) == 1 and earlier[0].type == MessageType.AI:
+            return f"{system_prompt}\x00{earlier[0].content}"
+        return None
+
+    def _collect_metrics(self):
+        """Scrape-time samples for state owned by the service's components"""
+        # Scrapes must not do I/O; a shared store reports its size as of the last health probe
+        store_size = self.sessions.stats().get("size")
+        if store_size is not None:
+            yield ("intervue_session_store_size", "gauge", "Live sessions in the session store", {}, store_size)
+        
+        prompt_stats = prompt_renderer.stats()
+        yield ("intervue_prompt_cache_hits_total", "counter", "System prompt cache hits", {}, prompt_stats["hits"])
+        yield ("intervue_prompt_cache_misses_total", "counter", "System prompt cache misses", {}, prompt_stats["misses"])
+        
+        if self.response_cache:
+            cache_stats = self.response_cache.stats()
+            yield ("intervue_response_cache_hits_total", "counter", "Response cache hits", {}, cache_stats["hits"])
+            yield ("intervue_response_cache_misses_total", "counter", "Response cache misses", {}, cache_stats["misses"])
+        
+        limiter_stats = self.limiter.stats()
+        yield ("intervue_upstream_in_flight", "gauge", "Upstream requests in flight", {}, limiter_stats["in_flight"])
+        yield ("intervue_upstream_waiting", "gauge", "Requests queued for an upstream slot", {}, limiter_stats["waiting"])
+        yield ("intervue_upstream_rejected_total", "counter", "Requests shed by the upstream limiter", {}, limiter_stats["rejected"] + limiter_stats["timed_out"])
+        
+        resilience_stats = self.resilience.stats()
+        yield ("intervue_upstream_retries_total", "counter", "Upstream retries", {}, resilience_stats["retries"])
+        yield ("intervue_upstream_hedges_total", "counter", "Hedged upstream requests started", {}, resilience_stats["hedges_started"])
+        breaker_open = resilience_stats["circuit_breaker"]["state"] != "closed"
+        yield ("intervue_circuit_breaker_open", "gauge", "1 while the upstream circuit breaker is open or half open", {}, 1 if breaker_open else 0)
+        
+        if self.persister:
+            yield ("intervue_persistence_pending", "gauge", "Writes buffered for the database", {}, self.persister.pending)
+
+    def register_health_probes(self, monitor):
+        """Add dependency probes for the components this service owns"""
+        async def session_store_probe():
+            return {"size": await self.sessions.size()}
+        monitor.add_probe("session_store", session_store_probe)
+        
+        async def upstream_probe():
+            if not settings.HEALTH_PROBE_UPSTREAM:
+                return {"status": "disabled"}
+            await self.client.models.list()
+            return {"circuit_breaker": self.resilience.breaker.state}
+        monitor.add_probe("upstream_ai", upstream_probe)
+        
+        async def database_probe():
+            if not self.persister:
+                return {"status": "disabled"}
+            from app.db.database import test_database_connection
+            if not await test_database_connection():
+                raise RuntimeError("Database connection failed")
+            return {}
+        monitor.add_probe("database", database_probe)
+
+    def upstream_stats(self) -> Dict[str, Any]:
+        """Limiter and resilience counters for the upstream AI provider"""
+        return {
+            "limiter": self.limiter.stats(),
+            "resilience": self.resilience.stats(),
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "routes": self.router.stats(),
+        }
+
+    async def create_completion(self, **kwargs):
+        """Non-streaming completion call with retries, hedging and circuit breaking.
+
+        Each attempt (including a hedged duplicate) takes its own limiter slot.
+        """
+        async def attempt():
+            async with self.limiter.slot():
+                return await self.client.chat.completions.create(**kwargs)
+        
+        response = await self.resilience.call(attempt)
+        if response.usage:
+            await record_usage(response.usage.total_tokens)
+        return response
+
+    async def _prepare_turn(
+        self,
+        user_message: str,
+        session_id: Optional[str],
         question_context: Optional[QuestionContext] = None,
         code_context: Optional[str] = None
-    ) -> ChatMessage:
-        """Generate AI response using OpenAI"""
-        try:
+    ) -> tuple[str, List[Dict[str, str]]]:
+        """Record the user turn and build the OpenAI message list for it"""
+        with time_stage("session_update"):
             # Get or create session
-            session_id = self.get_or_create_session(session_id)
-            session = self.conversations[session_id]
-            
+            session_id = await self.get_or_create_session(session_id)
+        
             # Update context if provided
             if question_context:
-                self.update_session_context(session_id, {
-                    "current_question": question_context
+                await self.update_session_context(session_id, {
+                    "current_question": question_context.model_dump()
                 })
-            
+        
             if code_context:
-                self.update_session_context(session_id, {
-                    "user_code": code_context
+                # Keep the model's full copy unless the code has drifted too far from it
+                baseline, _ = plan_code_update(
+                    (await self.get_conversation(session_id)).context.code_baseline,
+                    code_context,
+                    settings.CODE_DIFF_MAX_RATIO
+                )
+                await self.update_session_context(session_id, {
+                    "user_code": code_context,
+                    "code_baseline": baseline
                 })
-            
+        
             # Create user message
             user_msg = ChatMessage(
                 id=str(uuid.uuid4()),
@@ -168,108 +508,401 @@ Remember: You're helping them practice, so be constructive and educational. Use
                 timestamp=datetime.now(),
                 session_id=session_id
             )
-            
+        
             # Add to session
-            self.add_message_to_session(session_id, user_msg)
-            
-            # Prepare messages for OpenAI with enhanced context
+            await self.add_message_to_session(session_id, user_msg)
+        
+        with time_stage("prompt_build"):
+            # History ends with the current user message
+            session = await self.get_conversation(session_id)
             messages = self.prepare_conversation_history(session, question_context)
-            
-            # Add current user message
-            messages.append({
+            self._append_turn_context(messages, session, question_context, code_context)
+        
+        return session_id, messages
+
+    def _append_turn_context(
+        self,
+        messages: List[Dict[str, str]],
+        session: ConversationSession,
+        question_context: Optional[QuestionContext],
+        code_context: Optional[str]
+    ):
+        """Append problem details and the candidate's code after the history"""
+        # Add enhanced problem context if available
+        if question_context:
+            problem_context = problem_catalog.problem_context(question_context)
+            if problem_context:
+                messages.append({
+                    "role": "user",
+                    "content": problem_context
+                })
+        
+        # Add code context if available: the full baseline sits right after the system
+        # prompt, where it stays byte-identical across turns, and only changes go last
+        if code_context:
+            language = session.context.programming_language
+            baseline = session.context.code_baseline or code_context
+            _, diff = plan_code_update(baseline, code_context, settings.CODE_DIFF_MAX_RATIO)
+            messages.insert(1, {
                 "role": "user",
-                "content": user_message
+                "content": f"My code (version {code_version(baseline)}):\n```{language}\n{baseline}\n```"
             })
-            
-            # Add enhanced problem context if available
-            if question_context:
-                context_details = []
-                
-                if question_context.examples:
-                    context_details.append(f"Problem examples:")
-                    for i, example in enumerate(question_context.examples[:2], 1):  # Limit to first 2 examples
-                        context_details.append(f"Example {i}: Input {example.input} → Output {example.output}")
-                        if example.explanation:
-                            context_details.append(f"Explanation: {example.explanation}")
-                
-                if question_context.constraints:
-                    context_details.append(f"Constraints:")
-                    for constraint in question_context.constraints:
-                        context_details.append(f"- {constraint}")
-                
-                if question_context.hints:
-                    context_details.append(f"Available hints (use strategically):")
-                    for i, hint in enumerate(question_context.hints, 1):
-                        context_details.append(f"Hint {i}: {hint}")
-                
-                if context_details:
-                    messages.append({
-                        "role": "user",
-                        "content": f"Problem context:\n" + "\n".join(context_details)
-                    })
-            
-            # Add code context if available
-            if code_context:
+            if diff:
                 messages.append({
-                    "role": "user", 
-                    "content": f"Current code I'm working on:\n```{session.context.programming_language}\n{code_context}\n```"
+                    "role": "user",
+                    "content": f"Current code I'm working on, as changes to version {code_version(baseline)}:\n```diff\n{diff}\n```"
                 })
-            
-            # Make OpenAI API call
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500,
-                presence_penalty=0.1,
-                frequency_penalty=0.1
+
+    def schedule_opening(self, session_id: str, question_context: QuestionContext) -> bool:
+        """Start generating the interviewer's opening turn for a question in the background.
+
+        Replaces (and cancels) any opening still pending for the session.
+        Returns False when prefetching is disabled or upstream is saturated,
+        since speculative work should never take capacity from real turns.
+        """
+        if not settings.OPENING_PREFETCH_ENABLED:
+            return False
+        self.cancel_opening(session_id)
+        try:
+            self.limiter.ensure_capacity()
+        except UpstreamOverloadedError:
+            OPENING_PREFETCH_TOTAL.inc(outcome="skipped")
+            return False
+        
+        task = asyncio.create_task(self._generate_opening(session_id, question_context))
+        self._openings[session_id] = task
+        
+        def forget(_):
+            # Keep the finished task around for a while so the client can collect it
+            asyncio.get_running_loop().call_later(
+                settings.OPENING_RESULT_TTL_SECONDS,
+                lambda: self._openings.pop(session_id, None) if self._openings.get(session_id) is task else None
+            )
+        task.add_done_callback(forget)
+        return True
+
+    def cancel_opening(self, session_id: Optional[str]):
+        """Drop a pending opening because the session moved on"""
+        task = self._openings.pop(session_id, None) if session_id else None
+        if task is not None and not task.done():
+            task.cancel()
+            OPENING_PREFETCH_TOTAL.inc(outcome="cancelled")
+
+    def opening_pending(self, session_id: str) -> bool:
+        task = self._openings.get(session_id)
+        return task is not None and not task.done()
+
+    def cancel_openings(self):
+        for session_id in list(self._openings):
+            self.cancel_opening(session_id)
+
+    async def get_opening(self, session_id: str, wait: float = 0) -> tuple[bool, Optional[ChatMessage]]:
+        """``(scheduled, message)`` for a session's opening turn, waiting up to ``wait`` seconds.
+
+        ``message`` is None while it is still generating, or if it was
+        discarded or failed.
+        """
+        task = self._openings.get(session_id)
+        if task is None:
+            return False, None
+        if not task.done() and wait > 0:
+            # Wait for the task without letting our timeout cancel it
+            await asyncio.wait({task}, timeout=wait)
+        if not task.done() or task.cancelled():
+            return True, None
+        return True, task.result()
+
+    async def _generate_opening(self, session_id: str, question_context: QuestionContext) -> Optional[ChatMessage]:
+        session = await self.get_conversation(session_id)
+        if session is None:
+            return None
+        message_count = len(session.messages)
+        messages = self.prepare_conversation_history(session, question_context)
+        self._append_turn_context(messages, session, question_context, None)
+        messages.append({"role": "user", "content": OPENING_INSTRUCTION})
+        
+        # A fresh session's opening depends only on the question, so it can be shared
+        cacheable = self.response_cache is not None and message_count == 0
+        content = self.response_cache.get(messages[0]["content"], question_context.id, OPENING_INSTRUCTION) if cacheable else None
+        outcome = "cached" if content is not None else "ready"
+        try:
+            if content is None:
+                route = self.router.routes[CLARIFICATION]
+                upstream_started = time.perf_counter()
+                response = await self.create_completion(messages=messages, **route.completion_kwargs())
+                prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+                completion_tokens = response.usage.completion_tokens if response.usage else 0
+                LLM_TOKENS_TOTAL.inc(prompt_tokens, direction="in")
+                LLM_TOKENS_TOTAL.inc(completion_tokens, direction="out")
+                self.router.record("opening", route, upstream_started, prompt_tokens, completion_tokens)
+                content = response.choices[0].message.content
+                if cacheable:
+                    self.response_cache.put(messages[0]["content"], question_context.id, OPENING_INSTRUCTION, content)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Opening prefetch failed for session {session_id}: {e}")
+            OPENING_PREFETCH_TOTAL.inc(outcome="failed")
+            return None
+        
+        async with self._session_lock(session_id):
+            session = await self.get_conversation(session_id)
+            current_question = (session.context.current_question or {}) if session else {}
+            # The candidate spoke first or the question changed while this was generating
+            if session is None or len(session.messages) != message_count or current_question.get("id") != question_context.id:
+                OPENING_PREFETCH_TOTAL.inc(outcome="discarded")
+                return None
+            OPENING_PREFETCH_TOTAL.inc(outcome=outcome)
+            return await self._record_ai_message(session_id, content)
+
+    async def _record_ai_message(self, session_id: str, ai_content: str) -> ChatMessage:
+        """Create the AI message for a finished completion and add it to the session"""
+        ai_message = ChatMessage(
+            id=str(uuid.uuid4()),
+            type=MessageType.AI,
+            content=ai_content,
+            timestamp=datetime.now(),
+            session_id=session_id
+        )
+        await self.add_message_to_session(session_id, ai_message)
+        self.schedule_compaction(session_id)
+        return ai_message
+
+    async def _fallback_message(self, session_id: Optional[str]) -> ChatMessage:
+        """Canned reply used when the upstream call fails"""
+        CHAT_FALLBACKS_TOTAL.inc()
+        return ChatMessage(
+            id=str(uuid.uuid4()),
+            type=MessageType.AI,
+            content="I apologize, but I'm having trouble processing your message right now. Could you please try again?",
+            timestamp=datetime.now(),
+            session_id=session_id or await self.get_or_create_session()
+        )
+
+    async def generate_ai_response(
+        self, 
+        user_message: str, 
+        session_id: str,
+        question_context: Optional[QuestionContext] = None,
+        code_context: Optional[str] = None
+    ) -> ChatMessage:
+        """Generate AI response using OpenAI.
+
+        Turns for the same session are serialized, and an identical request
+        (same session, message, code and question) arriving while the first is
+        in flight, or within REQUEST_COALESCE_WINDOW_SECONDS of it finishing,
+        shares the first request's response instead of calling upstream again.
+        """
+        if not session_id:
+            return await self._generate_turn(user_message, session_id, question_context, code_context)
+        
+        # The candidate spoke first; a still-generating opening would land out of order
+        self.cancel_opening(session_id)
+        key = self._coalesce_key(user_message, session_id, question_context, code_context)
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            logger.info(f"Coalesced duplicate request for session {session_id}")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling() or not inflight.cancelled():
+                    raise
+                # The first request was cancelled (its client went away), which answers nothing
+                logger.info(f"Coalesced request for session {session_id} lost its leader, running it")
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            async with self._session_lock(session_id):
+                ai_message = await self._generate_turn(user_message, session_id, question_context, code_context)
+            future.set_result(ai_message)
+            return ai_message
+        except asyncio.CancelledError:
+            future.cancel()
+            self._forget_inflight(key, future)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve the exception so an unawaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            if not future.cancelled():
+                loop.call_later(settings.REQUEST_COALESCE_WINDOW_SECONDS, self._forget_inflight, key, future)
+
+    def _forget_inflight(self, key: str, future: asyncio.Future):
+        # A later request may have taken the key over since
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    async def _generate_turn(
+        self,
+        user_message: str,
+        session_id: Optional[str],
+        question_context: Optional[QuestionContext] = None,
+        code_context: Optional[str] = None
+    ) -> ChatMessage:
+        """Run a single non-streaming turn against OpenAI"""
+        # Shed load before the user message is recorded
+        self.limiter.ensure_capacity()
+        try:
+            session_id, messages = await self._prepare_turn(
+                user_message, session_id, question_context, code_context
             )
             
-            ai_content = response.choices[0].message.content
+            question_id = question_context.id if question_context else None
+            cache_scope = await self._cache_scope(session_id, code_context, messages[0]["content"])
+            if cache_scope is not None:
+                cached = self.response_cache.get(cache_scope, question_id, user_message)
+                if cached is not None:
+                    logger.info(f"Served cached AI response for session {session_id}")
+                    return await self._record_ai_message(session_id, cached)
             
-            # Create AI message
-            ai_message = ChatMessage(
-                id=str(uuid.uuid4()),
-                type=MessageType.AI,
-                content=ai_content,
-                timestamp=datetime.now(),
-                session_id=session_id
-            )
+            # Make OpenAI API call with the model and budget for this kind of turn
+            route_name, route = self.router.route(user_message, code_context)
+            upstream_started = time.perf_counter()
+            with time_stage("upstream"):
+                response = await self.create_completion(
+                    messages=messages,
+                    **route.completion_kwargs()
+                )
             
-            # Add to session
-            self.add_message_to_session(session_id, ai_message)
+            prompt_tokens = response.usage.prompt_tokens if response.usage else 0
+            completion_tokens = response.usage.completion_tokens if response.usage else 0
+            LLM_TOKENS_TOTAL.inc(prompt_tokens, direction="in")
+            LLM_TOKENS_TOTAL.inc(completion_tokens, direction="out")
+            self.router.record(route_name, route, upstream_started, prompt_tokens, completion_tokens)
+            
+            ai_content = response.choices[0].message.content
+            if cache_scope is not None:
+                self.response_cache.put(cache_scope, question_id, user_message, ai_content)
+            
+            # Create AI message and add to session
+            ai_message = await self._record_ai_message(session_id, ai_content)
             
             logger.info(f"Generated AI response for session {session_id}")
             return ai_message
             
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
             # Return fallback response
-            return ChatMessage(
-                id=str(uuid.uuid4()),
-                type=MessageType.AI,
-                content="I apologize, but I'm having trouble processing your message right now. Could you please try again?",
-                timestamp=datetime.now(),
-                session_id=session_id or self.get_or_create_session()
-            )
+            return await self._fallback_message(session_id)
+
+    async def stream_ai_response(
+        self,
+        user_message: str,
+        session_id: Optional[str],
+        question_context: Optional[QuestionContext] = None,
+        code_context: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream an AI response token by token.
+
+        Yields ``("session", session_id)`` first, then ``("delta", text)`` for
+        each chunk, and finally ``("done", ChatMessage)`` once the completed
+        message has been added to the session.
+        """
+        # Shed load before the user message is recorded
+        self.limiter.ensure_capacity()
+        self.cancel_opening(session_id)
+        
+        # Turns for one session run strictly one after another
+        async with self._session_lock(session_id):
+            parts: List[str] = []
+            cache_scope = None
+            stream_completed = False
+            try:
+                session_id, messages = await self._prepare_turn(
+                    user_message, session_id, question_context, code_context
+                )
+                yield "session", session_id
+                
+                question_id = question_context.id if question_context else None
+                cache_scope = await self._cache_scope(session_id, code_context, messages[0]["content"])
+                cached = self.response_cache.get(cache_scope, question_id, user_message) if cache_scope is not None else None
+                if cached is not None:
+                    yield "delta", cached
+                    yield "done", await self._record_ai_message(session_id, cached)
+                    return
+            
+                route_name, route = self.router.route(user_message, code_context)
+                async with self.limiter.slot():
+                    upstream_started = time.perf_counter()
+                    first_token_seen = False
+                    # Only opening the stream is retried; hedging would open a second stream
+                    stream = await self.resilience.call(
+                        lambda: self.client.chat.completions.create(
+                            messages=messages,
+                            stream=True,
+                            **route.completion_kwargs()
+                        ),
+                        hedge=False
+                    )
+                    
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if not first_token_seen:
+                                first_token_seen = True
+                                UPSTREAM_TTFT_SECONDS.observe(time.perf_counter() - upstream_started)
+                            parts.append(delta)
+                            yield "delta", delta
+                    stream_completed = True
+                    CHAT_STAGE_SECONDS.observe(time.perf_counter() - upstream_started, stage="upstream")
+                    # Streamed responses carry no usage block, so estimate
+                    prompt_tokens = count_message_tokens(messages)
+                    completion_tokens = count_tokens("".join(parts))
+                    LLM_TOKENS_TOTAL.inc(prompt_tokens, direction="in")
+                    LLM_TOKENS_TOTAL.inc(completion_tokens, direction="out")
+                    await record_usage(prompt_tokens + completion_tokens)
+                    self.router.record(route_name, route, upstream_started, prompt_tokens, completion_tokens)
+            
+            except (GeneratorExit, asyncio.CancelledError):
+                # Client went away mid-stream; keep the partial reply in the transcript
+                if parts:
+                    await self._record_ai_message(session_id, "".join(parts))
+                raise
+            except UpstreamOverloadedError:
+                if parts:
+                    await self._record_ai_message(session_id, "".join(parts))
+                raise
+            except Exception as e:
+                logger.error(f"Error streaming AI response: {e}")
+                if not parts:
+                    yield "done", await self._fallback_message(session_id)
+                    return
+        
+            # Keep whatever was streamed, even if the stream was cut short
+            ai_content = "".join(parts)
+            if cache_scope is not None and stream_completed:
+                self.response_cache.put(cache_scope, question_id, user_message, ai_content)
+            ai_message = await self._record_ai_message(session_id, ai_content)
+            logger.info(f"Streamed AI response for session {session_id}")
+            yield "done", ai_message
 
     async def process_voice_message(
         self, 
         audio_data: str, 
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        audio_format: str = "webm"
     ) -> tuple[str, ChatMessage]:
         """Process voice message - transcribe and generate response"""
-        # TODO: Implement voice transcription using Azure Speech Services
-        # For now, return placeholder
-        transcribed_text = "[Voice message processed - transcription not yet implemented]"
+        # Decode once; the transcriber works on raw bytes
+        audio = base64.b64decode(audio_data)
+        transcribed_text = await self.transcriber.transcribe(audio, audio_format)
+        if not transcribed_text:
+            raise ValueError("No speech recognized in the audio")
         
         # Generate AI response to the transcribed text
         ai_response = await self.generate_ai_response(
             transcribed_text,
-            session_id or self.get_or_create_session()
+            session_id or await self.get_or_create_session()
         )
         
         return transcribed_text, ai_response
-
-# Global AI service instance
-ai_service = AIService()
\ No newline at end of file
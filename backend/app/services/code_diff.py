@@ -0,0 +1,94 @@
+import difflib
+import hashlib
+import re
+from typing import List, Optional, Tuple
+
+from app.services.context_window import count_tokens
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+class CodePatchError(ValueError):
+    """Raised when a client's code patch does not apply to the stored code"""
+
+def code_version(code: Optional[str]) -> str:
+    """Short content hash clients and prompts use to refer to a code snapshot"""
+    return hashlib.sha256((code or "").encode("utf-8")).hexdigest()[:12]
+
+def unified_diff(old: str, new: str) -> str:
+    """Unified diff between two code snapshots, labelled with their versions"""
+    return "\n".join(difflib.unified_diff(
+        old.splitlines(),
+        new.splitlines(),
+        fromfile=f"version {code_version(old)}",
+        tofile=f"version {code_version(new)}",
+        lineterm="",
+        n=1
+    ))
+
+def plan_code_update(baseline: Optional[str], code: str, max_diff_ratio: float) -> Tuple[str, Optional[str]]:
+    """Decide how to show ``code`` to the model given the baseline it already has.
+
+    Returns ``(baseline, diff)``. The diff is None when the code is sent in
+    full, either as a new baseline or because it is unchanged. A full resend
+    happens when there is no baseline yet or when the diff would cost more
+    than ``max_diff_ratio`` of the full code's tokens.
+    """
+    if baseline is None or baseline == code:
+        return code, None
+    
+    diff = unified_diff(baseline, code)
+    if count_tokens(diff) > max_diff_ratio * max(count_tokens(code), 1):
+        return code, None
+    return baseline, diff
+
+def apply_patch(base: str, patch: str) -> str:
+    """Apply a unified diff (as produced by ``diff -u`` or difflib) to ``base``"""
+    lines = base.splitlines()
+    result: List[str] = []
+    position = 0
+    patch_lines = patch.splitlines()
+    i = 0
+    saw_hunk = False
+    
+    while i < len(patch_lines):
+        match = _HUNK_HEADER.match(patch_lines[i])
+        i += 1
+        if not match:
+            # File headers and anything else outside hunks
+            continue
+        saw_hunk = True
+        
+        old_start = int(match.group(1))
+        # A zero-length hunk's start refers to the line before the insertion point
+        old_index = old_start - 1 if match.group(2) != "0" else old_start
+        if old_index < position or old_index > len(lines):
+            raise CodePatchError(f"Hunk at line {old_start} is out of order or out of range")
+        result.extend(lines[position:old_index])
+        position = old_index
+        
+        while i < len(patch_lines) and not patch_lines[i].startswith("@@"):
+            line = patch_lines[i]
+            i += 1
+            if line.startswith("\\"):
+                # "\ No newline at end of file"
+                continue
+            tag, text = (line[0], line[1:]) if line else (" ", "")
+            if tag == "+":
+                result.append(text)
+            elif tag in (" ", "-"):
+                if position >= len(lines) or lines[position] != text:
+                    raise CodePatchError(f"Patch does not match the stored code at line {position + 1}")
+                if tag == " ":
+                    result.append(text)
+                position += 1
+            else:
+                raise CodePatchError(f"Unexpected patch line: {line[:40]!r}")
+    
+    if not saw_hunk and patch.strip():
+        raise CodePatchError("Patch contains no hunks")
+    
+    result.extend(lines[position:])
+    patched = "\n".join(result)
+    if base.endswith("\n") or (not base and result):
+        patched += "\n"
+    return patched
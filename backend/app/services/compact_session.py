@@ -0,0 +1,171 @@
+import hashlib
+import json
+import uuid
+import weakref
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from app.schemas.chat import ChatMessage, ConversationContext, ConversationSession, MessageType
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_USER, _AI = 0, 1
+
+class _InternedQuestion:
+    __slots__ = ("data", "__weakref__")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+# One copy of each distinct question, shared by every session on it; dropped with the last session
+_questions: "weakref.WeakValueDictionary[str, _InternedQuestion]" = weakref.WeakValueDictionary()
+
+def _intern_question(question: Optional[Dict[str, Any]]) -> Optional[_InternedQuestion]:
+    if question is None:
+        return None
+    key = hashlib.sha1(json.dumps(question, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    interned = _questions.get(key)
+    if interned is None:
+        interned = _InternedQuestion(question)
+        _questions[key] = interned
+    return interned
+
+def _to_micros(timestamp: datetime) -> Optional[int]:
+    if timestamp.tzinfo is not None:
+        return None
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+def _id_bytes(message_id: str) -> Optional[bytes]:
+    try:
+        encoded = uuid.UUID(message_id)
+    except ValueError:
+        return None
+    # Only canonical ids round-trip exactly
+    return encoded.bytes if str(encoded) == message_id else None
+
+class CompactSession:
+    """Columnar, slotted encoding of a ConversationSession.
+
+    Messages are stored as parallel arrays (16-byte ids, one-byte types,
+    integer microsecond timestamps, content strings) with no per-message
+    object and no repeated session id. Messages that do not fit the
+    encoding (non-uuid ids, timezone-aware timestamps, an audio_url) keep
+    their original model in ``extras``. The current question is interned.
+    """
+
+    __slots__ = (
+        "session_id", "created_at", "updated_at",
+        "question", "question_number", "total_questions", "interview_type",
+        "user_code", "code_baseline", "programming_language",
+        "history_summary", "summarized_message_count",
+        "ids", "types", "timestamps", "contents", "extras",
+    )
+
+    def __init__(self, session: ConversationSession):
+        self.session_id = session.session_id
+        self.ids = bytearray()
+        self.types = bytearray()
+        self.timestamps = array("q")
+        self.contents = []
+        self.extras: Optional[Dict[int, ChatMessage]] = None
+        self.question: Optional[_InternedQuestion] = None
+        self.update(session)
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def _append(self, message: ChatMessage):
+        index = len(self.contents)
+        id_bytes = _id_bytes(message.id)
+        micros = _to_micros(message.timestamp)
+        if (
+            id_bytes is None
+            or micros is None
+            or message.audio_url is not None
+            or message.session_id != self.session_id
+        ):
+            if self.extras is None:
+                self.extras = {}
+            self.extras[index] = message
+            id_bytes, micros = bytes(16), 0
+
+        self.ids += id_bytes
+        self.types.append(_USER if message.type == MessageType.USER else _AI)
+        self.timestamps.append(micros)
+        self.contents.append(message.content)
+
+    def _message_id(self, index: int) -> str:
+        return str(uuid.UUID(bytes=bytes(self.ids[index * 16:(index + 1) * 16])))
+
+    def _same_prefix(self, session: ConversationSession) -> bool:
+        count = len(self.contents)
+        if count > len(session.messages):
+            return False
+        if count == 0:
+            return True
+        last = session.messages[count - 1]
+        if self.extras and count - 1 in self.extras:
+            return self.extras[count - 1].id == last.id
+        return self._message_id(count - 1) == last.id
+
+    def update(self, session: ConversationSession):
+        """Re-encode from ``session``, appending only new messages when history just grew"""
+        if not self._same_prefix(session):
+            self.ids = bytearray()
+            self.types = bytearray()
+            self.timestamps = array("q")
+            self.contents = []
+            self.extras = None
+        for message in session.messages[len(self.contents):]:
+            self._append(message)
+
+        context = session.context
+        self.created_at = session.created_at
+        self.updated_at = session.updated_at
+        if self.question is None or self.question.data is not context.current_question:
+            self.question = _intern_question(context.current_question)
+        self.question_number = context.question_number
+        self.total_questions = context.total_questions
+        self.interview_type = context.interview_type
+        self.user_code = context.user_code
+        self.code_baseline = context.code_baseline
+        self.programming_language = context.programming_language
+        self.history_summary = session.history_summary
+        self.summarized_message_count = session.summarized_message_count
+
+    def to_session(self) -> ConversationSession:
+        """Decode to the public schema; models are built without re-validation"""
+        messages = []
+        for index, content in enumerate(self.contents):
+            if self.extras and index in self.extras:
+                messages.append(self.extras[index])
+                continue
+            messages.append(ChatMessage.model_construct(
+                id=self._message_id(index),
+                type=MessageType.USER if self.types[index] == _USER else MessageType.AI,
+                content=content,
+                timestamp=_EPOCH + self.timestamps[index] * _MICROSECOND,
+                audio_url=None,
+                session_id=self.session_id
+            ))
+
+        # The question dict is shared between sessions; callers replace it rather than mutate it
+        context = ConversationContext.model_construct(
+            current_question=self.question.data if self.question else None,
+            question_number=self.question_number,
+            total_questions=self.total_questions,
+            interview_type=self.interview_type,
+            user_code=self.user_code,
+            code_baseline=self.code_baseline,
+            programming_language=self.programming_language
+        )
+        return ConversationSession.model_construct(
+            session_id=self.session_id,
+            messages=messages,
+            context=context,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            history_summary=self.history_summary,
+            summarized_message_count=self.summarized_message_count
+        )
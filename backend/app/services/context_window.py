@@ -0,0 +1,67 @@
+from functools import lru_cache
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing overhead used by the chat completions format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tiktoken encoding once, or None if tiktoken is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.info(f"tiktoken unavailable, using approximate token counts: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text (approximate when tiktoken is not installed)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly 4 characters per token for English text
+    return len(text) // 4 + 1
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Count tokens for a list of OpenAI-format messages"""
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+def overflow_count(
+    history: List[Dict[str, str]],
+    budget_tokens: int,
+    keep_recent: int,
+    target_tokens: Optional[int] = None
+) -> int:
+    """Return how many of the oldest history messages must be dropped to fit the budget.
+
+    Nothing is dropped while history fits ``budget_tokens``; once it does not,
+    enough is dropped to get down to ``target_tokens`` (default: the budget),
+    so a low target leaves headroom for several turns before the next drop.
+    The last ``keep_recent`` messages are never dropped, even if they alone
+    exceed the budget.
+    """
+    total = count_message_tokens(history)
+    if total <= budget_tokens:
+        return 0
+    target_tokens = budget_tokens if target_tokens is None else min(target_tokens, budget_tokens)
+    foldable = max(len(history) - keep_recent, 0)
+    
+    dropped = 0
+    while dropped < foldable and total > target_tokens:
+        total -= count_tokens(history[dropped]["content"]) + MESSAGE_OVERHEAD_TOKENS
+        dropped += 1
+    return dropped
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the tail of text that fits in max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[-max_tokens:])
+    return text[-max_tokens * 4:]
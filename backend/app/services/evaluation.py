@@ -0,0 +1,240 @@
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+
+from app.core.config import settings
+from app.schemas.chat import (
+    BulkEvaluationJob,
+    ConversationSession,
+    InterviewEvaluation,
+    MessageType
+)
+from app.schemas.job import Job
+from app.services.context_window import count_tokens
+from app.services.job_queue import JobQueue, JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_PROMPT = """You are grading a finished mock technical interview.
+Score the candidate from 1 (poor) to 10 (excellent) on:
+- correctness: whether their final approach and code solve the problem
+- complexity_discussion: how well they analysed time and space complexity
+- communication: clarity, structure and responsiveness to the interviewer
+
+Reply with a JSON object with exactly these keys:
+{"correctness": int, "complexity_discussion": int, "communication": int,
+ "summary": str, "strengths": [str], "improvements": [str]}"""
+
+class SessionNotFoundError(Exception):
+    """Raised when an evaluation targets an unknown session"""
+
+def transcript_hash(session: ConversationSession) -> str:
+    """Stable hash of a transcript's content, used as the evaluation cache key"""
+    digest = hashlib.sha256()
+    question = session.context.current_question or {}
+    digest.update(str(question.get("id", "")).encode("utf-8"))
+    for message in session.messages:
+        digest.update(b"\x00")
+        digest.update(message.type.value.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(message.content.encode("utf-8"))
+    return digest.hexdigest()
+
+def _transcript_turns(session: ConversationSession) -> List[Dict[str, str]]:
+    return [
+        {"role": "user" if m.type == MessageType.USER else "assistant", "content": m.content}
+        for m in session.messages
+    ]
+
+def _render_turns(turns: List[Dict[str, str]]) -> str:
+    return "\n".join(
+        f"{'Candidate' if t['role'] == 'user' else 'Interviewer'}: {t['content']}" for t in turns
+    )
+
+def _clamp_score(value: Any) -> int:
+    try:
+        return max(1, min(10, int(value)))
+    except (TypeError, ValueError):
+        return 1
+
+class EvaluationService:
+    """Grades finished interviews, one at a time or in bulk on the shared job queue.
+
+    Long transcripts are read in windows that fit EVALUATION_WINDOW_TOKENS,
+    carrying rolling notes from one window to the next, so a transcript of
+    any length costs a bounded prompt per call. A bulk evaluation queues one
+    low-priority job per session, so it shares JOB_WORKERS with (and yields
+    to) other background work.
+    """
+
+    def __init__(self, ai_service, job_queue: JobQueue, window_tokens: int, cache_size: int = 1000, max_jobs: int = 100):
+        self.ai_service = ai_service
+        self.job_queue = job_queue
+        self.window_tokens = window_tokens
+        self.cache_size = cache_size
+        self.max_jobs = max_jobs
+        self._cache: "OrderedDict[str, InterviewEvaluation]" = OrderedDict()
+        self._jobs: "OrderedDict[str, BulkEvaluationJob]" = OrderedDict()
+
+    async def _load_session(self, session_id: str) -> ConversationSession:
+        session = await self.ai_service.get_conversation(session_id)
+        if session is None:
+            session = await self.ai_service.load_persisted_conversation(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session {session_id} not found")
+        return session
+
+    def _windows(self, turns: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+        windows, current, used = [], [], 0
+        for turn in turns:
+            tokens = count_tokens(turn["content"])
+            if current and used + tokens > self.window_tokens:
+                windows.append(current)
+                current, used = [], 0
+            current.append(turn)
+            used += tokens
+        if current:
+            windows.append(current)
+        return windows
+
+    async def _score(self, session: ConversationSession) -> Dict[str, Any]:
+        question = session.context.current_question or {}
+        problem = f"Problem: {question.get('title', 'unknown')} ({question.get('difficulty', 'unknown')})"
+        windows = self._windows(_transcript_turns(session))
+        
+        # Fold all but the last window into rolling notes
+        notes: Optional[str] = None
+        for window in windows[:-1]:
+            notes = await self.ai_service.summarize_turns(notes, window)
+        
+        transcript = _render_turns(windows[-1]) if windows else "(empty transcript)"
+        if notes:
+            transcript = f"Notes on the earlier part of the interview:\n{notes}\n\nFinal part of the transcript:\n{transcript}"
+        
+        response = await self.ai_service.create_completion(
+            model=settings.EVALUATION_MODEL,
+            messages=[
+                {"role": "system", "content": EVALUATION_PROMPT},
+                {"role": "user", "content": f"{problem}\n\n{transcript}"}
+            ],
+            temperature=0,
+            max_tokens=600,
+            response_format={"type": "json_object"}
+        )
+        try:
+            scores = json.loads(response.choices[0].message.content)
+        except (TypeError, ValueError):
+            scores = None
+        if not isinstance(scores, dict):
+            raise ValueError("Model returned an evaluation that is not a JSON object")
+        return scores
+
+    async def evaluate_session(self, session_id: str) -> InterviewEvaluation:
+        """Grade one session, reusing the cached result if its transcript is unchanged"""
+        session = await self._load_session(session_id)
+        key = transcript_hash(session)
+        
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached.model_copy(update={"session_id": session_id, "cached": True})
+        
+        scores = await self._score(session)
+        correctness = _clamp_score(scores.get("correctness"))
+        complexity = _clamp_score(scores.get("complexity_discussion"))
+        communication = _clamp_score(scores.get("communication"))
+        evaluation = InterviewEvaluation(
+            session_id=session_id,
+            correctness=correctness,
+            complexity_discussion=complexity,
+            communication=communication,
+            overall=round((correctness + complexity + communication) / 3, 1),
+            summary=str(scores.get("summary", "")),
+            strengths=[str(s) for s in scores.get("strengths", [])],
+            improvements=[str(s) for s in scores.get("improvements", [])],
+            transcript_hash=key,
+            message_count=len(session.messages)
+        )
+        
+        self._cache[key] = evaluation
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return evaluation
+
+    def start_bulk(self, session_ids: List[str]) -> BulkEvaluationJob:
+        """Queue a bulk evaluation and return its job for progress polling.
+
+        Raises JobQueueFullError if the queue cannot take every session.
+        """
+        session_ids = list(dict.fromkeys(session_ids))
+        free = self.job_queue.max_queue_depth - self.job_queue.depth
+        if len(session_ids) > free:
+            raise JobQueueFullError(f"Job queue has room for {max(free, 0)} of {len(session_ids)} evaluations")
+        
+        job = BulkEvaluationJob(
+            job_id=str(uuid.uuid4()),
+            status="queued",
+            total=len(session_ids),
+            created_at=datetime.now()
+        )
+        if not session_ids:
+            # Nothing to wait for; an unfinished empty job would never become prunable
+            job.status = "completed"
+            job.finished_at = job.created_at
+        self._jobs[job.job_id] = job
+        self._prune_jobs()
+        
+        for session_id in session_ids:
+            self.job_queue.submit(
+                "evaluation",
+                self._bulk_work(job, session_id),
+                priority="low",
+                on_complete=self._bulk_listener(job, session_id)
+            )
+        return job
+
+    def _prune_jobs(self):
+        """Forget the oldest finished bulk jobs beyond ``max_jobs``; unfinished ones stay pollable"""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self._jobs.items() if job.status == "completed"]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+
+    def _bulk_work(self, job: BulkEvaluationJob, session_id: str):
+        async def work():
+            job.status = "running"
+            evaluation = await self.evaluate_session(session_id)
+            job.results[session_id] = evaluation
+            return evaluation
+        return work
+
+    def _bulk_listener(self, job: BulkEvaluationJob, session_id: str):
+        def on_complete(queued: Job):
+            if queued.status == "succeeded":
+                job.completed += 1
+            else:
+                job.errors[session_id] = queued.error or queued.status
+                job.failed += 1
+            if job.completed + job.failed == job.total:
+                job.status = "completed"
+                job.finished_at = datetime.now()
+                logger.info(f"Bulk evaluation {job.job_id} finished: {job.completed} ok, {job.failed} failed")
+        return on_complete
+
+    def get_job(self, job_id: str) -> Optional[BulkEvaluationJob]:
+        return self._jobs.get(job_id)
+
+def create_evaluation_service(ai_service, job_queue: JobQueue) -> EvaluationService:
+    return EvaluationService(
+        ai_service,
+        job_queue,
+        window_tokens=settings.EVALUATION_WINDOW_TOKENS,
+        cache_size=settings.EVALUATION_CACHE_SIZE,
+        max_jobs=settings.EVALUATION_MAX_BULK_JOBS,
+    )
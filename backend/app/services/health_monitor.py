@@ -0,0 +1,106 @@
+import asyncio
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Any, Optional
+import logging
+
+import psutil
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _sample_system() -> Dict[str, Any]:
+    """Blocking psutil sampling; runs in a worker thread"""
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    return {
+        "python_version": sys.version,
+        # Non-blocking: measured since the previous call
+        "cpu_usage_percent": psutil.cpu_percent(interval=None),
+        "memory_usage_percent": memory.percent,
+        "memory_available_mb": memory.available / (1024 * 1024),
+        "disk_usage": {
+            "total_gb": disk.total / (1024**3),
+            "used_gb": disk.used / (1024**3),
+            "free_gb": disk.free / (1024**3)
+        }
+    }
+
+class HealthMonitor:
+    """Samples system stats and dependency probes in the background.
+
+    The health endpoint only reads ``snapshot``, so a load balancer polling it
+    every second costs nothing on the event loop.
+    """
+
+    def __init__(self, interval_seconds: float, probe_timeout_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._probes: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_probe(self, name: str, probe: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Register a dependency probe; it should return a dict and raise on failure"""
+        self._probes[name] = probe
+
+    async def _run_probe(self, probe: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(probe(), timeout=self.probe_timeout_seconds)
+            result = {"status": "ok", **(details or {})}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["latency_ms"] = (time.perf_counter() - started) * 1000
+        return result
+
+    async def collect(self) -> Dict[str, Any]:
+        """Take a fresh snapshot now"""
+        names = list(self._probes)
+        system, *results = await asyncio.gather(
+            asyncio.to_thread(_sample_system),
+            *(self._run_probe(self._probes[name]) for name in names)
+        )
+        dependencies = dict(zip(names, results))
+        healthy = all(d["status"] in ("ok", "disabled") for d in dependencies.values())
+        
+        self.snapshot = {
+            "status": "healthy" if healthy else "degraded",
+            "sampled_at": datetime.now().isoformat(),
+            "system": system,
+            "dependencies": dependencies,
+        }
+        return self.snapshot
+
+    async def _run(self):
+        while True:
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Health collection failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self):
+        if self._task is None:
+            # Prime cpu_percent so the first background sample is meaningful
+            psutil.cpu_percent(interval=None)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Global health monitor instance
+health_monitor = HealthMonitor(
+    interval_seconds=settings.HEALTH_SAMPLE_INTERVAL_SECONDS,
+    probe_timeout_seconds=settings.HEALTH_PROBE_TIMEOUT_SECONDS
+)
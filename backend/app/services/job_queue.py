@@ -0,0 +1,273 @@
+import asyncio
+import contextvars
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import logging
+
+import httpx
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.url_safety import UnsafeURLError, is_allowed_host, resolve_public_address
+from app.schemas.job import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_TOTAL = registry.counter(
+    "intervue_jobs_total",
+    "Background jobs finished, by kind and final status",
+    ["kind", "status"]
+)
+JOB_RUN_SECONDS = registry.histogram(
+    "intervue_job_run_seconds",
+    "Time background jobs spend running",
+    ["kind"]
+)
+JOB_WAIT_SECONDS = registry.histogram(
+    "intervue_job_wait_seconds",
+    "Time background jobs spend queued before a worker picks them up",
+    ["kind"]
+)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+FINISHED = ("succeeded", "failed", "cancelled")
+
+class JobQueueFullError(Exception):
+    """Raised when the queue is at JOB_MAX_QUEUE_DEPTH"""
+
+class JobQueue:
+    """In-process priority queue for slow AI work, drained by a fixed worker pool.
+
+    Jobs are (coroutine factory, Job record) pairs; the record is what the
+    status endpoints return. Higher priorities run first, FIFO within a
+    priority. Finished jobs are kept for ``result_ttl_seconds`` (at most
+    ``max_finished`` of them) so clients can poll for results, and an
+    optional callback URL is POSTed the finished job. Callbacks go only to
+    public addresses (or ``callback_allowed_hosts``) and redirects are not
+    followed.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue_depth: int = 1000,
+        result_ttl_seconds: float = 3600,
+        max_finished: int = 10000,
+        callback_timeout_seconds: float = 10,
+        callback_retries: int = 3,
+        callback_allowed_hosts: Iterable[str] = ()
+    ):
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_finished = max_finished
+        self.callback_timeout_seconds = callback_timeout_seconds
+        self.callback_retries = callback_retries
+        self.callback_allowed_hosts = list(callback_allowed_hosts)
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        # Finished job id -> finish time (monotonic), oldest first
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._running: Dict[str, asyncio.Task] = {}
+        # Queued job id -> submit time (perf_counter); its size is the queue depth
+        self._queued_at: Dict[str, float] = {}
+        self._listeners: Dict[str, List[Callable[[Job], Any]]] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._callback_tasks: "set[asyncio.Task]" = set()
+        self._http: Optional[httpx.AsyncClient] = None
+        registry.register_collector(self._collect_metrics)
+
+    def start(self):
+        if self._worker_tasks:
+            return
+        self._http = httpx.AsyncClient(timeout=self.callback_timeout_seconds, follow_redirects=False)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers, cancelling running jobs, then cancel the jobs still queued"""
+        # Workers first: cancelling one cancels the job it is awaiting, and the
+        # worker records that job as cancelled before exiting
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in ("queued", "running")]:
+            self.cancel(job_id)
+        if self._callback_tasks:
+            # One more attempt's worth of time for callbacks still retrying
+            _, pending = await asyncio.wait(set(self._callback_tasks), timeout=self.callback_timeout_seconds)
+            for task in pending:
+                task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker"""
+        return len(self._queued_at)
+
+    def submit(
+        self,
+        kind: str,
+        work: Callable[[], Awaitable[Any]],
+        priority: str = "normal",
+        callback_url: Optional[str] = None,
+        on_complete: Optional[Callable[[Job], Any]] = None
+    ) -> Job:
+        """Queue ``work`` (a zero-argument coroutine function) and return its job record"""
+        if self.depth >= self.max_queue_depth:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queue_depth} jobs waiting)")
+        self.start()
+        self._expire_finished()
+
+        job = Job(
+            job_id=str(uuid.uuid4()),
+            kind=kind,
+            status="queued",
+            priority=priority,
+            created_at=datetime.now(),
+            callback_url=callback_url
+        )
+        self._jobs[job.job_id] = job
+        self._queued_at[job.job_id] = time.perf_counter()
+        if on_complete is not None:
+            self._listeners[job.job_id] = [on_complete]
+        # Run in the submitter's context, so request-scoped state (quota accounting) follows the job
+        context = contextvars.copy_context()
+        self._queue.put_nowait((PRIORITIES[priority], next(self._sequence), job.job_id, work, context))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it already finished or does not exist"""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        task = self._running.get(job_id)
+        if task is not None:
+            # The worker records the cancellation
+            task.cancel()
+        else:
+            # Still queued; the worker skips it when it comes up
+            self._finish(job, "cancelled")
+        return True
+
+    async def _worker(self):
+        while True:
+            _, _, job_id, work, context = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                continue
+
+            job.status = "running"
+            job.started_at = datetime.now()
+            JOB_WAIT_SECONDS.observe(time.perf_counter() - self._queued_at.pop(job_id, time.perf_counter()), kind=job.kind)
+            started = time.perf_counter()
+            task = asyncio.create_task(work(), context=context)
+            self._running[job_id] = task
+            try:
+                result = await task
+                job.result = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+                self._finish(job, "succeeded")
+            except asyncio.CancelledError:
+                task.cancel()
+                self._finish(job, "cancelled")
+                if asyncio.current_task().cancelling():
+                    # The worker itself is being stopped, not just this job
+                    raise
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job.kind}) failed: {e}")
+                job.error = str(e)
+                self._finish(job, "failed")
+            finally:
+                self._running.pop(job_id, None)
+                JOB_RUN_SECONDS.observe(time.perf_counter() - started, kind=job.kind)
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = datetime.now()
+        self._queued_at.pop(job.job_id, None)
+        self._finished[job.job_id] = time.monotonic()
+        JOBS_TOTAL.inc(kind=job.kind, status=status)
+
+        for listener in self._listeners.pop(job.job_id, []):
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Completion listener for job {job.job_id} failed: {e}")
+
+        if job.callback_url and self._http is not None:
+            task = asyncio.create_task(self._send_callback(job))
+            self._callback_tasks.add(task)
+            task.add_done_callback(self._callback_tasks.discard)
+
+    async def _send_callback(self, job: Job):
+        payload = job.model_dump(mode="json", exclude={"callback_status"})
+        for attempt in range(1, self.callback_retries + 1):
+            try:
+                response = await self._post_callback(httpx.URL(job.callback_url), payload)
+                if response.status_code < 500:
+                    job.callback_status = f"delivered ({response.status_code})"
+                    return
+                job.callback_status = f"failed ({response.status_code})"
+            except UnsafeURLError as e:
+                job.callback_status = "refused"
+                logger.warning(f"Refused callback for job {job.job_id}: {e}")
+                return
+            except (httpx.HTTPError, OSError) as e:
+                job.callback_status = f"failed ({type(e).__name__})"
+            if attempt < self.callback_retries:
+                await asyncio.sleep(2 ** (attempt - 1))
+        logger.warning(f"Giving up on callback for job {job.job_id}: {job.callback_status}")
+
+    async def _post_callback(self, url: httpx.URL, payload: Dict[str, Any]) -> httpx.Response:
+        if is_allowed_host(url.host, self.callback_allowed_hosts):
+            return await self._http.post(url, json=payload)
+        # Connect to the address that was checked, so a second lookup cannot point elsewhere
+        address = await resolve_public_address(url.host, url.port)
+        return await self._http.post(
+            url.copy_with(host=address),
+            json=payload,
+            headers={"Host": url.netloc.decode("ascii")},
+            extensions={"sni_hostname": url.host}
+        )
+
+    def _expire_finished(self):
+        now = time.monotonic()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at <= self.result_ttl_seconds:
+                break
+            self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {status: 0 for status in ("queued", "running") + FINISHED}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {"workers": len(self._worker_tasks), "max_queue_depth": self.max_queue_depth, **counts}
+
+    def _collect_metrics(self):
+        stats = self.stats()
+        yield ("intervue_jobs_queued", "gauge", "Background jobs waiting for a worker", {}, stats["queued"])
+        yield ("intervue_jobs_running", "gauge", "Background jobs running", {}, stats["running"])
+
+def create_job_queue() -> JobQueue:
+    return JobQueue(
+        workers=settings.JOB_WORKERS,
+        max_queue_depth=settings.JOB_MAX_QUEUE_DEPTH,
+        result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+        callback_timeout_seconds=settings.JOB_CALLBACK_TIMEOUT_SECONDS,
+        callback_retries=settings.JOB_CALLBACK_RETRIES,
+        callback_allowed_hosts=settings.JOB_CALLBACK_ALLOWED_HOSTS
+    )
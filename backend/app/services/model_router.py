@@ -0,0 +1,153 @@
+import json
+import re
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Optional
+import logging
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ROUTE_REQUESTS_TOTAL = registry.counter(
+    "intervue_route_requests_total",
+    "Chat turns sent upstream, by route and model",
+    ["route", "model"]
+)
+ROUTE_UPSTREAM_SECONDS = registry.histogram(
+    "intervue_route_upstream_seconds",
+    "Upstream completion latency by route and model",
+    ["route", "model"]
+)
+ROUTE_TOKENS_TOTAL = registry.counter(
+    "intervue_route_tokens_total",
+    "Tokens sent to and received from the model, by route (estimated for streamed turns)",
+    ["route", "model", "direction"]
+)
+
+@dataclass(frozen=True)
+class RouteConfig:
+    model: str
+    max_tokens: int
+    temperature: float = 0.7
+    presence_penalty: float = 0.1
+    frequency_penalty: float = 0.1
+
+    def completion_kwargs(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "presence_penalty": self.presence_penalty,
+            "frequency_penalty": self.frequency_penalty,
+        }
+
+CHIT_CHAT = "chit_chat"
+CLARIFICATION = "clarification"
+CODE_REVIEW = "code_review"
+DISCUSSION = "discussion"
+# Background history compaction, not a chat turn; never picked by classify_turn
+SUMMARY = "summary"
+
+def default_routes(model: str) -> Dict[str, RouteConfig]:
+    """Route table used unless MODEL_ROUTES overrides it; "discussion" matches the old fixed parameters"""
+    return {
+        CHIT_CHAT: RouteConfig(model=model, max_tokens=120),
+        CLARIFICATION: RouteConfig(model=model, max_tokens=300, temperature=0.5),
+        CODE_REVIEW: RouteConfig(model=model, max_tokens=700, temperature=0.4),
+        DISCUSSION: RouteConfig(model=model, max_tokens=500),
+        SUMMARY: RouteConfig(
+            model=model,
+            max_tokens=settings.CONTEXT_SUMMARY_MAX_TOKENS,
+            temperature=0.2,
+            presence_penalty=0.0,
+            frequency_penalty=0.0
+        ),
+    }
+
+_ACKNOWLEDGMENT = re.compile(
+    r"^(ok(ay)?|k|sure|yes|yeah|yep|no|nope|thanks?( you)?|thx|got it|makes sense|cool|great|"
+    r"sounds good|alright|right|i see|understood|hi|hello|hey|ready|let'?s (go|start))\b",
+    re.IGNORECASE
+)
+_QUESTION_START = re.compile(
+    r"^(what|why|how|when|where|which|who|can|could|should|would|is|are|do|does|did|will|may)\b",
+    re.IGNORECASE
+)
+
+def classify_turn(user_message: str, code_context: Optional[str] = None) -> str:
+    """Cheap local classification of a turn; no model call involved"""
+    text = user_message.strip()
+    if code_context:
+        return CODE_REVIEW
+    
+    words = len(text.split())
+    if words <= 6 and _ACKNOWLEDGMENT.match(text):
+        return CHIT_CHAT
+    if words <= 40 and (text.endswith("?") or _QUESTION_START.match(text)):
+        return CLARIFICATION
+    return DISCUSSION
+
+class ModelRouter:
+    """Maps each turn to a model and token budget, and accounts usage per route"""
+
+    def __init__(self, routes: Dict[str, RouteConfig]):
+        self.routes = routes
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {"requests": 0, "latency_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+            for name in routes
+        }
+
+    def route(self, user_message: str, code_context: Optional[str] = None) -> tuple[str, RouteConfig]:
+        name = classify_turn(user_message, code_context)
+        return name, self.routes.get(name, self.routes[DISCUSSION])
+
+    def record(self, route: str, config: RouteConfig, started: float, prompt_tokens: int, completion_tokens: int):
+        """Account one finished upstream call; ``started`` is a time.perf_counter() reading"""
+        elapsed = time.perf_counter() - started
+        ROUTE_REQUESTS_TOTAL.inc(route=route, model=config.model)
+        ROUTE_UPSTREAM_SECONDS.observe(elapsed, route=route, model=config.model)
+        ROUTE_TOKENS_TOTAL.inc(prompt_tokens, route=route, model=config.model, direction="in")
+        ROUTE_TOKENS_TOTAL.inc(completion_tokens, route=route, model=config.model, direction="out")
+        
+        stats = self._stats.setdefault(
+            route, {"requests": 0, "latency_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        stats["requests"] += 1
+        stats["latency_seconds"] += elapsed
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        result = {}
+        for name, stats in self._stats.items():
+            requests = stats["requests"]
+            config = self.routes.get(name)
+            result[name] = {
+                "model": config.model if config else None,
+                "max_tokens": config.max_tokens if config else None,
+                "requests": requests,
+                "avg_latency_seconds": stats["latency_seconds"] / requests if requests else 0.0,
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+            }
+        return result
+
+def create_model_router() -> ModelRouter:
+    routes = default_routes(settings.CHAT_MODEL)
+    if settings.MODEL_ROUTES:
+        try:
+            overrides = json.loads(settings.MODEL_ROUTES)
+            # Built aside, so a bad entry leaves the defaults intact rather than half overridden
+            updated = dict(routes)
+            for name, values in overrides.items():
+                base = updated.get(name, updated[DISCUSSION])
+                updated[name] = replace(base, **values)
+            # Summaries run on the cheap tier unless they are given a model of their own
+            if "model" not in overrides.get(SUMMARY, {}):
+                updated[SUMMARY] = replace(updated[SUMMARY], model=updated[CHIT_CHAT].model)
+            routes = updated
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Ignoring invalid MODEL_ROUTES: {e}")
+    return ModelRouter(routes)
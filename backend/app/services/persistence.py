@@ -0,0 +1,272 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import settings
+from app.models.conversation import Message, Session
+from app.schemas.chat import ChatMessage, ConversationContext, ConversationSession, MessageType
+
+logger = logging.getLogger(__name__)
+
+def _upsert_sessions(dialect: str, rows: List[Dict[str, Any]]):
+    """Dialect-specific INSERT ... ON CONFLICT DO UPDATE for session rows"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"Unsupported database dialect for session upserts: {dialect}")
+    
+    statement = dialect_insert(Session).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[Session.id],
+        set_={
+            "context": statement.excluded.context,
+            "history_summary": statement.excluded.history_summary,
+            "summarized_message_count": statement.excluded.summarized_message_count,
+            "updated_at": statement.excluded.updated_at,
+        }
+    )
+
+class ConversationPersister:
+    """Write-behind persistence for sessions and messages.
+
+    Writes are buffered in memory and flushed in one transaction every
+    ``flush_interval_ms`` or as soon as ``batch_size`` messages are pending,
+    so the request path never waits on the database. If a batch fails it is
+    retried row by row: rows the database rejects are dead-lettered, and if
+    the database cannot be reached at all the rest is kept for the next flush.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int = 50,
+        flush_interval_ms: int = 200,
+        max_buffer: int = 10000,
+        max_dead_letters: int = 100
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.max_buffer = max_buffer
+        # Latest state per session; only the newest snapshot needs writing
+        self._pending_sessions: Dict[str, Dict[str, Any]] = {}
+        self._pending_messages: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # One flush at a time, so a caller that finds another flush running waits for its commit
+        self._flush_lock = asyncio.Lock()
+        # Most recent rows the database refused, with the error, for inspection
+        self.dead_letters: deque = deque(maxlen=max_dead_letters)
+        
+        self.flushes = 0
+        self.messages_written = 0
+        self.failed_flushes = 0
+        self.dropped_messages = 0
+        self.dead_lettered = 0
+
+    def record_session(self, session: ConversationSession):
+        self._pending_sessions[session.session_id] = {
+            "id": session.session_id,
+            "context": session.context.model_dump(mode="json"),
+            "history_summary": session.history_summary,
+            "summarized_message_count": session.summarized_message_count,
+            "created_at": session.created_at,
+            "updated_at": session.updated_at,
+        }
+
+    def record_message(self, session_id: str, message: ChatMessage, sequence: int):
+        self._pending_messages.append({
+            "id": message.id,
+            "session_id": session_id,
+            "sequence": sequence,
+            "type": message.type.value,
+            "content": message.content,
+            "timestamp": message.timestamp,
+            "audio_url": message.audio_url,
+            "created_at": message.timestamp,
+            "updated_at": message.timestamp,
+        })
+        if len(self._pending_messages) >= self.batch_size:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_messages) + len(self._pending_sessions)
+
+    async def flush(self):
+        """Write everything buffered so far.
+
+        When this returns, everything buffered before the call has been
+        committed or given up on, even if another flush was already running.
+        """
+        async with self._flush_lock:
+            if not self._pending_sessions and not self._pending_messages:
+                return
+            
+            sessions, self._pending_sessions = self._pending_sessions, {}
+            messages, self._pending_messages = self._pending_messages, []
+            try:
+                await self._write(list(sessions.values()), messages)
+                self.flushes += 1
+                self.messages_written += len(messages)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Failed to persist {len(messages)} messages, retrying row by row: {e}")
+                await self._write_rows(sessions, messages)
+
+    async def _write(self, sessions: List[Dict[str, Any]], messages: List[Dict[str, Any]]):
+        async with self.session_factory() as db:
+            # Sessions first so message foreign keys resolve
+            if sessions:
+                await db.execute(_upsert_sessions(db.bind.dialect.name, sessions))
+            if messages:
+                await db.execute(insert(Message), messages)
+            await db.commit()
+
+    async def _write_rows(self, sessions: Dict[str, Dict[str, Any]], messages: List[Dict[str, Any]]):
+        """Retry a failed batch one row per transaction"""
+        rows = [("session", row) for row in sessions.values()] + [("message", row) for row in messages]
+        for index, (kind, row) in enumerate(rows):
+            try:
+                if kind == "session":
+                    await self._write([row], [])
+                else:
+                    await self._write([], [row])
+                    self.messages_written += 1
+            except (IntegrityError, DataError) as e:
+                # The row itself is bad; retrying it would fail the same way
+                self.dead_lettered += 1
+                self.dead_letters.append({"kind": kind, "row": row, "error": str(e)})
+                logger.error(f"Dead-lettered {kind} {row['id']}: {e}")
+            except Exception as e:
+                remaining = rows[index:]
+                logger.error(f"Database unavailable, keeping {len(remaining)} rows for the next flush: {e}")
+                self._requeue(
+                    {row["id"]: row for kind, row in remaining if kind == "session"},
+                    [row for kind, row in remaining if kind == "message"]
+                )
+                return
+
+    def _requeue(self, sessions: Dict[str, Dict[str, Any]], messages: List[Dict[str, Any]]):
+        # Keep newer session snapshots recorded since the flush started
+        for session_id, row in sessions.items():
+            self._pending_sessions.setdefault(session_id, row)
+        self._pending_messages = messages + self._pending_messages
+        overflow = len(self._pending_messages) - self.max_buffer
+        if overflow > 0:
+            del self._pending_messages[:overflow]
+            self.dropped_messages += overflow
+            logger.warning(f"Persistence buffer full, dropped {overflow} oldest messages")
+
+    async def _run(self):
+        interval = self.flush_interval_ms / 1000
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Conversation persister started")
+
+    async def stop(self):
+        """Stop the flush loop and write out anything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("Conversation persister stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_messages": len(self._pending_messages),
+            "pending_sessions": len(self._pending_sessions),
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "messages_written": self.messages_written,
+            "dropped_messages": self.dropped_messages,
+            "dead_lettered": self.dead_lettered,
+        }
+
+async def load_session(db, session_id: str) -> Optional[ConversationSession]:
+    """Load a persisted session without its messages"""
+    row = await db.get(Session, session_id)
+    if row is None:
+        return None
+    return ConversationSession(
+        session_id=row.id,
+        messages=[],
+        context=ConversationContext.model_validate(row.context or {}),
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        history_summary=row.history_summary,
+        summarized_message_count=row.summarized_message_count,
+    )
+
+async def count_messages(db, session_id: str) -> int:
+    """Number of persisted messages in a session"""
+    query = select(func.count()).select_from(Message).where(Message.session_id == session_id)
+    return (await db.execute(query)).scalar_one()
+
+async def message_sequence(db, session_id: str, message_id: str) -> Optional[int]:
+    """Sequence of a persisted message, or None if it is not in the session"""
+    query = select(Message.sequence).where(Message.session_id == session_id, Message.id == message_id)
+    return (await db.execute(query)).scalar_one_or_none()
+
+async def load_messages(
+    db,
+    session_id: str,
+    after_sequence: Optional[int] = None,
+    limit: int = 100,
+    since: Optional[datetime] = None
+) -> List[Tuple[int, ChatMessage]]:
+    """One page of a session's messages in order, as (sequence, message) pairs"""
+    query = select(Message).where(Message.session_id == session_id)
+    if after_sequence is not None:
+        query = query.where(Message.sequence > after_sequence)
+    if since is not None:
+        query = query.where(Message.timestamp > since)
+    query = query.order_by(Message.sequence).limit(limit)
+    
+    rows = (await db.execute(query)).scalars().all()
+    return [
+        (
+            row.sequence,
+            ChatMessage(
+                id=row.id,
+                type=MessageType(row.type),
+                content=row.content,
+                timestamp=row.timestamp,
+                audio_url=row.audio_url,
+                session_id=row.session_id,
+            )
+        )
+        for row in rows
+    ]
+
+def create_persister() -> Optional[ConversationPersister]:
+    """Build the write-behind persister if enabled in settings"""
+    if not settings.PERSISTENCE_ENABLED:
+        return None
+    from app.db.database import get_session_factory
+    return ConversationPersister(
+        get_session_factory(),
+        batch_size=settings.PERSIST_BATCH_SIZE,
+        flush_interval_ms=settings.PERSIST_FLUSH_INTERVAL_MS,
+        max_buffer=settings.PERSIST_MAX_BUFFER,
+    )
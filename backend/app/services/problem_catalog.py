@@ -0,0 +1,92 @@
+import json
+from typing import Dict, List, Optional
+import logging
+
+from app.core.config import settings
+from app.schemas.chat import QuestionContext
+from app.schemas.problem import Problem
+from app.services.prompts import render_problem_context
+
+logger = logging.getLogger(__name__)
+
+class ProblemCatalog:
+    """Interview problems loaded once and indexed by id, difficulty and category.
+
+    Each problem's QuestionContext and its "Problem context" prompt fragment
+    are built at load time, so requests that name a problem by id skip
+    validation and rendering.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._loaded = False
+        self._problems: List[Problem] = []
+        self._by_id: Dict[str, Problem] = {}
+        self._by_difficulty: Dict[str, List[Problem]] = {}
+        self._by_category: Dict[str, List[Problem]] = {}
+        self._contexts: Dict[str, QuestionContext] = {}
+        self._fragments: Dict[str, Optional[str]] = {}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with open(self.path, encoding="utf-8") as f:
+            raw = json.load(f)
+        
+        for entry in raw.get("problems", []):
+            problem = Problem.model_validate(entry)
+            self._problems.append(problem)
+            self._by_id[problem.id] = problem
+            self._by_difficulty.setdefault(problem.difficulty.lower(), []).append(problem)
+            self._by_category.setdefault(problem.category.lower(), []).append(problem)
+            
+            context = QuestionContext(
+                id=problem.id,
+                number=1,
+                type="Coding Challenge",
+                difficulty=problem.difficulty,
+                title=problem.title,
+                description=problem.description,
+                category=problem.category,
+                examples=problem.examples,
+                constraints=problem.constraints,
+                hints=problem.hints
+            )
+            self._contexts[problem.id] = context
+            self._fragments[problem.id] = render_problem_context(context)
+        
+        self._loaded = True
+        logger.info(f"Loaded {len(self._problems)} problems from {self.path}")
+
+    def get(self, problem_id: str) -> Optional[Problem]:
+        self._ensure_loaded()
+        return self._by_id.get(problem_id)
+
+    def list(self, difficulty: Optional[str] = None, category: Optional[str] = None) -> List[Problem]:
+        """Problems in catalog order, narrowed through the smallest matching index"""
+        self._ensure_loaded()
+        candidates = self._problems
+        if difficulty:
+            candidates = self._by_difficulty.get(difficulty.lower(), [])
+        if category:
+            by_category = self._by_category.get(category.lower(), [])
+            candidates = by_category if not difficulty else [p for p in candidates if p in by_category]
+        return candidates
+
+    def categories(self) -> List[str]:
+        self._ensure_loaded()
+        return sorted({p.category for p in self._problems})
+
+    def question_context(self, problem_id: str) -> Optional[QuestionContext]:
+        """Shared, prebuilt QuestionContext for a catalog problem (do not mutate)"""
+        self._ensure_loaded()
+        return self._contexts.get(problem_id)
+
+    def problem_context(self, question_context: QuestionContext) -> Optional[str]:
+        """Prompt fragment for a question, precomputed when it came from the catalog"""
+        if self._contexts.get(question_context.id) is question_context:
+            return self._fragments[question_context.id]
+        return render_problem_context(question_context)
+
+# Global problem catalog instance; the JSON file is read on first use
+problem_catalog = ProblemCatalog(settings.PROBLEM_CATALOG_PATH)
@@ -0,0 +1,175 @@
+import hashlib
+import json
+from collections import OrderedDict
+from string import Template
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+from app.schemas.chat import ConversationContext, QuestionContext
+
+logger = logging.getLogger(__name__)
+
+# Static instructions come first and never vary, so every system prompt shares
+# a byte-identical prefix that upstream prompt-prefix caching can reuse.
+INTERVIEWER_PROMPT_PREFIX = """You are an experienced technical interviewer conducting a mock interview.
+
+Your role:
+1. Ask clarifying questions about the problem
+2. Guide the candidate through their thought process
+3. Reference specific examples and constraints when relevant
+4. Provide hints if they're stuck (but don't give away the solution)
+5. Comment on their approach and suggest improvements
+6. Ask about time/space complexity
+7. Be encouraging but honest about their performance
+
+Communication style:
+- Be conversational and supportive
+- Ask one question at a time
+- Keep responses concise (2-3 sentences typically)
+- Reference specific examples when helpful ("Looking at the example where...")
+- Mention constraints when relevant ("Remember the constraint that...")
+- Use problem category to guide suggestions (e.g., "This is an Arrays problem - consider...")
+- If they're coding, focus on their approach and logic
+- If it's a behavioral question, use the STAR method for evaluation
+
+Remember: You're helping them practice, so be constructive and educational. Use the problem's examples, constraints, and hints strategically to provide targeted guidance."""
+
+_CONTEXT_TEMPLATE = Template("""
+
+Current context:
+- Question $question_number of $total_questions
+- Programming language: $programming_language
+- Interview type: $interview_type""")
+
+_PROBLEM_TEMPLATE = Template("""
+
+Current Problem: $title ($difficulty)""")
+_CATEGORY_TEMPLATE = Template("""
+- Category: $category""")
+_EXAMPLES_TEMPLATE = Template("""
+- Examples available: $count test cases
+- Sample: Input $input → Output $output""")
+_CONSTRAINTS_TEMPLATE = Template("""
+- Key constraints: $count requirements to consider""")
+_HINTS_TEMPLATE = Template("""
+- Available hints: $count strategic hints (use sparingly when stuck)""")
+
+def render_problem_context(question_context: QuestionContext) -> Optional[str]:
+    """Examples, constraints and hints sent alongside each turn, or None if there are none"""
+    context_details = []
+    
+    if question_context.examples:
+        context_details.append("Problem examples:")
+        for i, example in enumerate(question_context.examples[:2], 1):  # Limit to first 2 examples
+            context_details.append(f"Example {i}: Input {example.input} → Output {example.output}")
+            if example.explanation:
+                context_details.append(f"Explanation: {example.explanation}")
+    
+    if question_context.constraints:
+        context_details.append("Constraints:")
+        for constraint in question_context.constraints:
+            context_details.append(f"- {constraint}")
+    
+    if question_context.hints:
+        context_details.append("Available hints (use strategically):")
+        for i, hint in enumerate(question_context.hints, 1):
+            context_details.append(f"Hint {i}: {hint}")
+    
+    if not context_details:
+        return None
+    return "Problem context:\n" + "\n".join(context_details)
+
+class PromptRenderer:
+    """Renders interviewer system prompts with a bounded LRU cache.
+
+    Prompts are keyed by a hash of only the fields that appear in the output,
+    so unrelated context changes (e.g. the candidate's code) do not miss.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _fields(context: ConversationContext, question_context: Optional[QuestionContext]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        context_fields = {
+            "question_number": context.question_number,
+            "total_questions": context.total_questions,
+            "programming_language": context.programming_language,
+            "interview_type": context.interview_type,
+        }
+        if question_context is None:
+            return context_fields, None
+        
+        first_example = question_context.examples[0] if question_context.examples else None
+        question_fields = {
+            "title": question_context.title,
+            "difficulty": question_context.difficulty,
+            "category": question_context.category,
+            "example_count": len(question_context.examples or []),
+            "example_input": first_example.input if first_example else None,
+            "example_output": first_example.output if first_example else None,
+            "constraint_count": len(question_context.constraints or []),
+            "hint_count": len(question_context.hints or []),
+        }
+        return context_fields, question_fields
+
+    @staticmethod
+    def fingerprint(context_fields: Dict[str, Any], question_fields: Optional[Dict[str, Any]]) -> str:
+        """Stable hash of the fields a prompt depends on"""
+        payload = json.dumps([context_fields, question_fields], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _render(context_fields: Dict[str, Any], question_fields: Optional[Dict[str, Any]]) -> str:
+        parts = [INTERVIEWER_PROMPT_PREFIX, _CONTEXT_TEMPLATE.substitute(context_fields)]
+        
+        if question_fields:
+            parts.append(_PROBLEM_TEMPLATE.substitute(question_fields))
+            if question_fields["category"]:
+                parts.append(_CATEGORY_TEMPLATE.substitute(category=question_fields["category"]))
+            if question_fields["example_count"]:
+                parts.append(_EXAMPLES_TEMPLATE.substitute(
+                    count=question_fields["example_count"],
+                    input=question_fields["example_input"],
+                    output=question_fields["example_output"]
+                ))
+            if question_fields["constraint_count"]:
+                parts.append(_CONSTRAINTS_TEMPLATE.substitute(count=question_fields["constraint_count"]))
+            if question_fields["hint_count"]:
+                parts.append(_HINTS_TEMPLATE.substitute(count=question_fields["hint_count"]))
+        
+        return "".join(parts)
+
+    def render(self, context: ConversationContext, question_context: Optional[QuestionContext] = None) -> str:
+        """Return the system prompt for this context, rendering it on a cache miss"""
+        context_fields, question_fields = self._fields(context, question_context)
+        key = self.fingerprint(context_fields, question_fields)
+        
+        prompt = self._cache.get(key)
+        if prompt is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return prompt
+        
+        self.misses += 1
+        prompt = self._render(context_fields, question_fields)
+        self._cache[key] = prompt
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return prompt
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# Global prompt renderer instance
+prompt_renderer = PromptRenderer()
@@ -0,0 +1,246 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Any, Optional, TypeVar
+import logging
+
+import openai
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and transport failures are worth retrying"""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures and lets a probe through after a cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call should not reach upstream"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout_seconds:
+                self.short_circuited += 1
+                raise CircuitOpenError("AI provider unavailable, failing fast")
+            self.state = self.HALF_OPEN
+        
+        if self.state == self.HALF_OPEN:
+            # Only one probe at a time while half open
+            if self._probe_in_flight:
+                self.short_circuited += 1
+                raise CircuitOpenError("AI provider recovering, failing fast")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info("Circuit breaker closed")
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit breaker opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Forget a probe whose outcome says nothing about upstream health"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+        }
+
+class LatencyTracker:
+    """Rolling window of recent upstream latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: "deque[float]" = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < 20:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+class ResilientCaller:
+    """Runs upstream calls with jittered retries, optional hedging and a circuit breaker"""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_retries: int,
+        base_delay_seconds: float,
+        max_delay_seconds: float,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_delay_seconds: float = 1.0
+    ):
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.latency = LatencyTracker()
+        
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay_seconds)
+        # Full jitter
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** attempt))
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        threshold = self.latency.percentile(self.hedge_percentile)
+        if threshold is None:
+            return None
+        return max(threshold, self.hedge_min_delay_seconds)
+
+    async def _attempt(self, make_call: Callable[[], Awaitable[T]], hedge: bool) -> T:
+        delay = self._hedge_delay() if hedge else None
+        if delay is None:
+            return await make_call()
+        
+        primary = asyncio.ensure_future(make_call())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        
+        self.hedges_started += 1
+        backup = asyncio.ensure_future(make_call())
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, make_call: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """Await ``make_call()`` with retries; ``make_call`` must start a fresh request each time.
+
+        Only hedged calls feed the latency window the hedge delay comes from;
+        calls like opening a stream finish far sooner than a full completion.
+        """
+        self.calls += 1
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            started = time.monotonic()
+            try:
+                result = await self._attempt(make_call, hedge)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Client errors and local rejections say nothing about provider health
+                    self.breaker.release()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Upstream call failed ({e}); retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            
+            if hedge:
+                self.latency.record(time.monotonic() - started)
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hedges_started": self.hedges_started,
+            "hedges_won": self.hedges_won,
+            "p95_latency_seconds": self.latency.percentile(95),
+            "circuit_breaker": self.breaker.stats(),
+        }
+
+def create_resilient_caller() -> ResilientCaller:
+    """Build the resilience layer configured in settings"""
+    return ResilientCaller(
+        breaker=CircuitBreaker(
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout_seconds=settings.CIRCUIT_BREAKER_RESET_SECONDS,
+        ),
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        base_delay_seconds=settings.OPENAI_RETRY_BASE_DELAY_SECONDS,
+        max_delay_seconds=settings.OPENAI_RETRY_MAX_DELAY_SECONDS,
+        hedge_enabled=settings.OPENAI_HEDGE_ENABLED,
+        hedge_percentile=settings.OPENAI_HEDGE_PERCENTILE,
+        hedge_min_delay_seconds=settings.OPENAI_HEDGE_MIN_DELAY_SECONDS,
+    )
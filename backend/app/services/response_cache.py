@@ -0,0 +1,97 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[^\w]+|[^\w]+$")
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and trim surrounding punctuation"""
+    text = _WHITESPACE.sub(" ", text.lower()).strip()
+    return _EDGE_PUNCTUATION.sub("", text)
+
+@dataclass
+class _CacheEntry:
+    response: str
+    stored_at: float
+
+class ResponseCache:
+    """LRU + TTL cache of AI replies, keyed by the exact normalized message.
+
+    Entries are partitioned by (system prompt, question id). Only exact
+    matches (after lowercasing and trimming whitespace and edge punctuation)
+    are served: near-identical wording such as "ascending" vs "descending"
+    can need a different answer, so there is no similarity tier.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(system_prompt: str, question_id: Optional[str], user_message: str) -> str:
+        payload = f"{normalize_text(system_prompt)}\x00{question_id or ''}\x00{normalize_text(user_message)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.stored_at > self.ttl_seconds
+
+    def get(self, system_prompt: str, question_id: Optional[str], user_message: str) -> Optional[str]:
+        """Return the cached reply for the same turn, if any"""
+        key = self._key(system_prompt, question_id, user_message)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self._expired(entry, time.monotonic()):
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.response
+
+    def put(self, system_prompt: str, question_id: Optional[str], user_message: str, response: str):
+        """Store a reply for later identical turns"""
+        key = self._key(system_prompt, question_id, user_message)
+        self._entries[key] = _CacheEntry(response=response, stored_at=time.monotonic())
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Build the response cache if enabled in settings"""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    return ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    )
@@ -0,0 +1,279 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+import logging
+
+from app.core.config import settings
+from app.schemas.chat import ConversationSession
+from app.services.compact_session import CompactSession
+
+logger = logging.getLogger(__name__)
+
+class SessionStore(ABC):
+    """Storage backend for conversation sessions.
+
+    Sessions returned by ``get`` may be copies, so callers must ``put`` a
+    session back after mutating it. The methods are coroutines so a network
+    backend never blocks the event loop.
+    """
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        """Return the session, or None if it does not exist or has expired"""
+
+    @abstractmethod
+    async def put(self, session: ConversationSession) -> None:
+        """Insert or replace a session"""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Remove a session if present"""
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Number of live sessions"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters for monitoring; must not do I/O"""
+
+    async def exists(self, session_id: str) -> bool:
+        return await self.get(session_id) is not None
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
+
+class InMemorySessionStore(SessionStore):
+    """Process-local LRU store with an idle timeout.
+
+    With ``compact`` (the default) sessions are held as CompactSession
+    records; otherwise the models are kept as-is. Decoding a long transcript
+    costs milliseconds, so the ``hot_sessions`` most recently used sessions
+    also keep their decoded model until the next ``put`` replaces it. Only
+    idle sessions pay the decode, once, when they come back.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        idle_ttl_seconds: float = 3600,
+        compact: bool = True,
+        hot_sessions: int = 256
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.compact = compact
+        self.hot_sessions = hot_sessions
+        # session_id -> (session, last access time); ordered oldest access first
+        self._sessions: "OrderedDict[str, tuple[Any, float]]" = OrderedDict()
+        # session_id -> decoded model of a compact entry; ordered oldest use first
+        self._decoded: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return self.idle_ttl_seconds > 0 and now - last_access > self.idle_ttl_seconds
+
+    def _evict_expired(self, now: float):
+        # Entries are in access order, so expired ones are all at the front
+        while self._sessions:
+            session_id, (_, last_access) = next(iter(self._sessions.items()))
+            if not self._expired(last_access, now):
+                break
+            del self._sessions[session_id]
+            self._decoded.pop(session_id, None)
+            self.ttl_evictions += 1
+
+    def _keep_decoded(self, session: ConversationSession):
+        if self.hot_sessions <= 0:
+            return
+        self._decoded[session.session_id] = session
+        self._decoded.move_to_end(session.session_id)
+        while len(self._decoded) > self.hot_sessions:
+            self._decoded.popitem(last=False)
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        entry = self._sessions.get(session_id)
+        now = time.monotonic()
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        session, last_access = entry
+        if self._expired(last_access, now):
+            del self._sessions[session_id]
+            self._decoded.pop(session_id, None)
+            self.ttl_evictions += 1
+            self.misses += 1
+            return None
+        
+        self._sessions[session_id] = (session, now)
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        if not self.compact:
+            return session
+        
+        decoded = self._decoded.get(session_id)
+        if decoded is None:
+            decoded = session.to_session()
+            self.decodes += 1
+        self._keep_decoded(decoded)
+        return decoded
+
+    async def put(self, session: ConversationSession) -> None:
+        now = time.monotonic()
+        stored = session
+        if self.compact:
+            entry = self._sessions.get(session.session_id)
+            if entry is not None:
+                # Usually just appends the turn that was added since the last put
+                stored = entry[0]
+                stored.update(session)
+            else:
+                stored = CompactSession(session)
+            # The model just written is the current version, so later gets need not decode
+            self._keep_decoded(session)
+        self._sessions[session.session_id] = (stored, now)
+        self._sessions.move_to_end(session.session_id)
+        
+        self._evict_expired(now)
+        while len(self._sessions) > self.max_sessions:
+            evicted_id, _ = self._sessions.popitem(last=False)
+            self._decoded.pop(evicted_id, None)
+            self.lru_evictions += 1
+            logger.debug(f"Evicted least recently used session {evicted_id}")
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._decoded.pop(session_id, None)
+
+    async def exists(self, session_id: str) -> bool:
+        # Existence check without decoding the session
+        entry = self._sessions.get(session_id)
+        return entry is not None and not self._expired(entry[1], time.monotonic())
+
+    async def size(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "compact": self.compact,
+            "hot_sessions": len(self._decoded),
+            "decodes": self.decodes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions,
+        }
+
+class RedisSessionStore(SessionStore):
+    """Shared store over the Redis protocol so several workers see the same sessions.
+
+    ``client`` can be any ``redis.asyncio`` compatible client (e.g.
+    ``fakeredis.aioredis.FakeRedis`` in local tests); by default one is
+    created from ``url`` with ``socket_timeout`` applied to connects and
+    commands, so a stalled server fails the request instead of hanging it.
+    Puts overwrite without a version check; that relies on each session being
+    served by one instance at a time (see ``check_worker_count``).
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        idle_ttl_seconds: int = 3600,
+        key_prefix: str = "intervue:session:",
+        socket_timeout: float = 1.0,
+        client=None
+    ):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise ValueError("The redis package is required for the redis session store") from e
+            client = redis.Redis.from_url(
+                url or settings.REDIS_URL,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout
+            )
+        self.client = client
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        # Counting keys is a SCAN, so stats() reports the last count instead of doing one
+        self.last_size: Optional[int] = None
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        key = self._key(session_id)
+        pipe = self.client.pipeline()
+        pipe.get(key)
+        if self.idle_ttl_seconds > 0:
+            # Sliding expiry: every read counts as activity
+            pipe.expire(key, int(self.idle_ttl_seconds))
+        raw = (await pipe.execute())[0]
+        
+        if raw is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return ConversationSession.model_validate_json(raw)
+
+    async def put(self, session: ConversationSession) -> None:
+        ttl = int(self.idle_ttl_seconds) if self.idle_ttl_seconds > 0 else None
+        await self.client.set(self._key(session.session_id), session.model_dump_json(), ex=ttl)
+
+    async def delete(self, session_id: str) -> None:
+        await self.client.delete(self._key(session_id))
+
+    async def exists(self, session_id: str) -> bool:
+        return bool(await self.client.exists(self._key(session_id)))
+
+    async def size(self) -> int:
+        count = 0
+        async for _ in self.client.scan_iter(match=f"{self.key_prefix}*", count=500):
+            count += 1
+        self.last_size = count
+        return count
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        # Evictions are done by Redis key expiry, so only lookups are counted here
+        return {
+            "backend": "redis",
+            "size": self.last_size,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by settings"""
+    backend = settings.SESSION_STORE_BACKEND.lower()
+    if backend == "memory":
+        return InMemorySessionStore(
+            max_sessions=settings.SESSION_MAX_SESSIONS,
+            idle_ttl_seconds=settings.SESSION_IDLE_TTL_SECONDS,
+            compact=settings.SESSION_COMPACT_STORAGE,
+            hot_sessions=settings.SESSION_HOT_SESSIONS
+        )
+    if backend == "redis":
+        return RedisSessionStore(
+            url=settings.REDIS_URL,
+            idle_ttl_seconds=settings.SESSION_IDLE_TTL_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
+        )
+    raise ValueError(f"Unknown session store backend: {settings.SESSION_STORE_BACKEND}")
@@ -0,0 +1,156 @@
+import asyncio
+import codecs
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TranscriptSegment:
+    """A piece of transcript; ``is_final`` marks the complete transcript for the turn"""
+    text: str
+    is_final: bool = False
+
+async def _single_chunk(audio: bytes) -> AsyncIterator[bytes]:
+    yield audio
+
+class Transcriber(ABC):
+    """Speech-to-text backend fed with raw audio chunks as they arrive"""
+
+    @abstractmethod
+    def transcribe_stream(self, chunks: AsyncIterator[bytes], audio_format: str = "webm") -> AsyncIterator[TranscriptSegment]:
+        """Yield interim segments while audio arrives, then exactly one final segment"""
+
+    async def transcribe(self, audio: bytes, audio_format: str = "webm") -> str:
+        """Transcribe a complete recording"""
+        text = ""
+        async for segment in self.transcribe_stream(_single_chunk(audio), audio_format):
+            if segment.is_final:
+                text = segment.text
+        return text
+
+class StubTranscriber(Transcriber):
+    """Local backend for tests and offline development: audio bytes are treated as UTF-8 text"""
+
+    async def transcribe_stream(self, chunks: AsyncIterator[bytes], audio_format: str = "webm") -> AsyncIterator[TranscriptSegment]:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        parts: List[str] = []
+        async for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                parts.append(text)
+                yield TranscriptSegment("".join(parts))
+        parts.append(decoder.decode(b"", final=True))
+        yield TranscriptSegment("".join(parts).strip(), is_final=True)
+
+class WhisperTranscriber(Transcriber):
+    """OpenAI Whisper backend; the API is not streaming, so chunks are buffered until the end"""
+
+    def __init__(self, client, model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+
+    async def transcribe_stream(self, chunks: AsyncIterator[bytes], audio_format: str = "webm") -> AsyncIterator[TranscriptSegment]:
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer += chunk
+        
+        response = await self.client.audio.transcriptions.create(
+            model=self.model,
+            file=(f"audio.{audio_format}", bytes(buffer))
+        )
+        yield TranscriptSegment(response.text.strip(), is_final=True)
+
+class AzureTranscriber(Transcriber):
+    """Azure Speech backend using a push stream, so recognition runs while audio is still arriving"""
+
+    # Compressed formats need GStreamer on the host; anything else is sent as 16 kHz PCM
+    _CONTAINER_FORMATS = {
+        "ogg": "OGG_OPUS",
+        "mp3": "MP3",
+        "webm": "ANY",
+    }
+
+    def __init__(self, speech_key: str, region: str, language: str = "en-US"):
+        try:
+            import azure.cognitiveservices.speech as speechsdk
+        except ImportError as e:
+            raise ValueError("azure-cognitiveservices-speech is required for the azure transcriber") from e
+        self._sdk = speechsdk
+        self.speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=region)
+        self.speech_config.speech_recognition_language = language
+
+    def _stream_format(self, audio_format: str):
+        container = self._CONTAINER_FORMATS.get(audio_format)
+        if container is None:
+            return self._sdk.audio.AudioStreamFormat()
+        return self._sdk.audio.AudioStreamFormat(
+            compressed_stream_format=getattr(self._sdk.AudioStreamContainerFormat, container)
+        )
+
+    async def transcribe_stream(self, chunks: AsyncIterator[bytes], audio_format: str = "webm") -> AsyncIterator[TranscriptSegment]:
+        sdk = self._sdk
+        loop = asyncio.get_running_loop()
+        events: "asyncio.Queue[Optional[TranscriptSegment]]" = asyncio.Queue()
+        recognized: List[str] = []
+        
+        push_stream = sdk.audio.PushAudioInputStream(stream_format=self._stream_format(audio_format))
+        recognizer = sdk.SpeechRecognizer(
+            speech_config=self.speech_config,
+            audio_config=sdk.audio.AudioConfig(stream=push_stream)
+        )
+        
+        # SDK callbacks run on its own threads
+        def on_recognizing(evt):
+            interim = " ".join(recognized + [evt.result.text]).strip()
+            loop.call_soon_threadsafe(events.put_nowait, TranscriptSegment(interim))
+        
+        def on_recognized(evt):
+            if evt.result.reason == sdk.ResultReason.RecognizedSpeech and evt.result.text:
+                recognized.append(evt.result.text)
+                loop.call_soon_threadsafe(events.put_nowait, TranscriptSegment(" ".join(recognized)))
+        
+        def on_stopped(evt):
+            loop.call_soon_threadsafe(events.put_nowait, None)
+        
+        recognizer.recognizing.connect(on_recognizing)
+        recognizer.recognized.connect(on_recognized)
+        recognizer.session_stopped.connect(on_stopped)
+        recognizer.canceled.connect(on_stopped)
+        
+        async def feed():
+            try:
+                async for chunk in chunks:
+                    push_stream.write(chunk)
+            finally:
+                push_stream.close()
+        
+        await loop.run_in_executor(None, lambda: recognizer.start_continuous_recognition_async().get())
+        feeder = asyncio.ensure_future(feed())
+        try:
+            while True:
+                segment = await events.get()
+                if segment is None:
+                    break
+                yield segment
+            await feeder
+        finally:
+            feeder.cancel()
+            await loop.run_in_executor(None, lambda: recognizer.stop_continuous_recognition_async().get())
+        
+        yield TranscriptSegment(" ".join(recognized).strip(), is_final=True)
+
+def create_transcriber(client=None) -> Transcriber:
+    """Build the transcriber selected by settings; ``client`` is the OpenAI client for whisper"""
+    backend = settings.TRANSCRIBER_BACKEND.lower()
+    if backend == "stub":
+        return StubTranscriber()
+    if backend == "whisper":
+        return WhisperTranscriber(client)
+    if backend == "azure":
+        return AzureTranscriber(settings.AZURE_SPEECH_KEY, settings.AZURE_SPEECH_REGION)
+    raise ValueError(f"Unknown transcriber backend: {settings.TRANSCRIBER_BACKEND}")
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class UpstreamOverloadedError(Exception):
+    """Raised when the upstream request queue is too deep to accept more work"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate`` tokens per second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+class UpstreamLimiter:
+    """Caps concurrent upstream calls, paces them to a rate limit and sheds excess load.
+
+    Callers wait for a slot in FIFO order; once ``max_queue_depth`` callers are
+    already waiting, new ones are rejected immediately with UpstreamOverloadedError.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue_depth: int,
+        queue_timeout_seconds: float,
+        requests_per_second: float = 0
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_second) if requests_per_second > 0 else None
+        
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+
+    async def _admit(self):
+        await self._semaphore.acquire()
+        if self._bucket is not None:
+            try:
+                await self._bucket.acquire()
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+    def ensure_capacity(self):
+        """Reject up front, before any work is done, when the queue is already full"""
+        if self.waiting >= self.max_queue_depth:
+            self.rejected += 1
+            raise UpstreamOverloadedError("Too many pending AI requests, please retry shortly")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one upstream slot for the duration of the block"""
+        self.ensure_capacity()
+        
+        self.waiting += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._admit(), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise UpstreamOverloadedError("Timed out waiting for an AI request slot")
+        finally:
+            self.waiting -= 1
+        
+        queued = time.monotonic() - started
+        self.admitted += 1
+        self.total_queue_seconds += queued
+        self.max_queue_seconds = max(self.max_queue_seconds, queued)
+        
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_queue_seconds": self.total_queue_seconds / self.admitted if self.admitted else 0.0,
+            "max_queue_seconds": self.max_queue_seconds,
+        }
+
+def create_http_client() -> httpx.AsyncClient:
+    """Shared HTTP transport for the OpenAI client, tuned from settings"""
+    http2 = settings.OPENAI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("OPENAI_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS),
+    )
+
+def create_upstream_limiter() -> UpstreamLimiter:
+    """Build the upstream limiter configured in settings"""
+    return UpstreamLimiter(
+        max_concurrency=settings.OPENAI_MAX_CONCURRENT_REQUESTS,
+        max_queue_depth=settings.OPENAI_MAX_QUEUE_DEPTH,
+        queue_timeout_seconds=settings.OPENAI_QUEUE_TIMEOUT_SECONDS,
+        requests_per_second=settings.OPENAI_REQUESTS_PER_SECOND,
+    )
@@ -0,0 +1,110 @@
+"""Local stand-in for the OpenAI chat completions API used by the benchmarks.
+
+Run with:  uvicorn benchmarks.fake_openai:app --port 8100
+
+Behaviour is controlled with environment variables:
+  FAKE_OPENAI_LATENCY_MS      base latency before the first token (default 300)
+  FAKE_OPENAI_JITTER_MS       uniform random extra latency (default 100)
+  FAKE_OPENAI_TOKEN_DELAY_MS  delay between streamed tokens (default 15)
+  FAKE_OPENAI_ERROR_RATE      fraction of requests answered with an error (default 0)
+  FAKE_OPENAI_ERROR_STATUS    status code used for injected errors (default 500)
+  FAKE_OPENAI_REPLY_TOKENS    words per reply (default 40)
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "300"))
+JITTER_MS = float(os.getenv("FAKE_OPENAI_JITTER_MS", "100"))
+TOKEN_DELAY_MS = float(os.getenv("FAKE_OPENAI_TOKEN_DELAY_MS", "15"))
+ERROR_RATE = float(os.getenv("FAKE_OPENAI_ERROR_RATE", "0"))
+ERROR_STATUS = int(os.getenv("FAKE_OPENAI_ERROR_STATUS", "500"))
+REPLY_TOKENS = int(os.getenv("FAKE_OPENAI_REPLY_TOKENS", "40"))
+
+WORDS = (
+    "Good start. What is the time complexity of that approach? Could you walk me through "
+    "the example input and consider the edge cases before optimizing with a hash map?"
+).split()
+
+app = FastAPI(title="Fake OpenAI")
+
+def _reply_words():
+    return [WORDS[i % len(WORDS)] for i in range(REPLY_TOKENS)]
+
+def _prompt_tokens(body: dict) -> int:
+    return sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return JSONResponse(
+            status_code=ERROR_STATUS,
+            content={"error": {"message": "Injected failure", "type": "server_error"}}
+        )
+    
+    await asyncio.sleep((LATENCY_MS + random.uniform(0, JITTER_MS)) / 1000)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = body.get("model", "gpt-3.5-turbo")
+    words = _reply_words()
+    
+    if not body.get("stream"):
+        content = " ".join(words)
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            # Enough shape for the evaluation endpoint
+            content = json.dumps({
+                "correctness": 7,
+                "complexity_discussion": 6,
+                "communication": 8,
+                "summary": content,
+                "strengths": ["Clear explanation"],
+                "improvements": ["Discuss edge cases earlier"],
+            })
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": _prompt_tokens(body),
+                "completion_tokens": len(words),
+                "total_tokens": _prompt_tokens(body) + len(words),
+            },
+        }
+    
+    async def events():
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(TOKEN_DELAY_MS / 1000)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/v1/audio/transcriptions")
+async def audio_transcriptions():
+    await asyncio.sleep(LATENCY_MS / 1000)
+    return {"text": "Can you clarify the input format?"}
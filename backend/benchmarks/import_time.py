@@ -0,0 +1,72 @@
+"""Import-time budget check for the application module.
+
+Imports ``main`` in a fresh interpreter with no API keys or database
+configured, and fails if that takes longer than the budget or pulls in
+modules that should only load on first use (the OpenAI SDK, the tokenizer,
+the DB engine). tests/test_import_time.py runs the same probe.
+
+  python -m benchmarks.import_time              # default 1.5s budget
+  python -m benchmarks.import_time --budget 0.8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported just by loading the app
+LAZY_MODULES = ("openai", "tiktoken", "sqlalchemy", "asyncpg", "app.services.ai_service")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+def measure(runs: int) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "DATABASE_URL")}
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE % (LAZY_MODULES,)],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return {"best_seconds": min(samples), "samples": samples, "eagerly_loaded": sorted(loaded)}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.5, help="maximum seconds to import main")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to sample; the best run is used")
+    args = parser.parse_args()
+    
+    try:
+        result = measure(args.runs)
+    except subprocess.CalledProcessError as e:
+        print(f"Importing main failed without configuration:\n{e.stderr}")
+        return 1
+    
+    print(f"import main: {result['best_seconds']:.3f}s (budget {args.budget:.3f}s)")
+    failed = False
+    if result["best_seconds"] > args.budget:
+        print("Import time over budget")
+        failed = True
+    if result["eagerly_loaded"]:
+        print(f"Loaded at import but should be lazy: {', '.join(result['eagerly_loaded'])}")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
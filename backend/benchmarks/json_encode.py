@@ -0,0 +1,99 @@
+"""Encode cost of conversation history responses: FastAPI's default path vs FastJSONResponse.
+
+The default path is what a route returning a model gets: response_model
+validation, jsonable_encoder, then json.dumps. The fast path encodes the
+model directly (pydantic-core) with validation skipped. Reports wall and
+CPU time per response for transcripts of increasing length, plus the
+gzip/brotli size of the body.
+
+  python -m benchmarks.json_encode
+  python -m benchmarks.json_encode --messages 50,200,1000 --repeat 200
+"""
+import argparse
+import asyncio
+import gzip
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import FastJSONResponse, brotli
+from app.schemas.chat import ChatMessage, ConversationContext, ConversationHistoryResponse, MessageType
+
+TURN = (
+    "I'd iterate once and keep a hash map from value to index. For each number I check whether "
+    "target minus the number is already in the map, which makes it O(n) time and O(n) space."
+)
+
+def _history(messages: int) -> ConversationHistoryResponse:
+    session_id = str(uuid.uuid4())
+    started = datetime.now()
+    return ConversationHistoryResponse(
+        session_id=session_id,
+        messages=[
+            ChatMessage(
+                id=str(uuid.uuid4()),
+                type=MessageType.USER if i % 2 == 0 else MessageType.AI,
+                content=f"{TURN} ({i})",
+                timestamp=started + timedelta(seconds=i * 20),
+                session_id=session_id
+            )
+            for i in range(messages)
+        ],
+        context=ConversationContext(user_code="def twoSum(nums, target):\n    seen = {}\n" * 10),
+        message_count=messages
+    )
+
+def _timed(fn, repeat: int) -> tuple[float, float, bytes]:
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(repeat):
+        body = fn()
+    return (
+        (time.perf_counter() - wall_started) / repeat,
+        (time.process_time() - cpu_started) / repeat,
+        body,
+    )
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", default="50,200,1000", help="comma-separated transcript lengths")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_history", type_=ConversationHistoryResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def default_path(model):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model))
+        return JSONResponse(content).body
+
+    def fast_path(model):
+        return FastJSONResponse(model).body
+
+    print(f"{'messages':>8} {'path':>8} {'wall ms':>9} {'cpu ms':>9} {'bytes':>9} {'gzip':>8} {'brotli':>8}")
+    for count in [int(n) for n in args.messages.split(",")]:
+        model = _history(count)
+        results = {}
+        for label, fn in (("default", default_path), ("fast", fast_path)):
+            wall, cpu, body = _timed(lambda: fn(model), args.repeat)
+            results[label] = wall
+            compressed = len(gzip.compress(body, compresslevel=6))
+            br = len(brotli.compress(body, quality=4)) if brotli else None
+            print(
+                f"{count:>8} {label:>8} {wall * 1000:>9.3f} {cpu * 1000:>9.3f} {len(body):>9} "
+                f"{compressed:>8} {br if br is not None else '-':>8}"
+            )
+        print(f"{'':>8} speedup  {results['default'] / results['fast']:.1f}x")
+
+    loop.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Per-request cost of the rate limiter check.
+
+Times ``RateLimiter.check`` on its own and the full ``RateLimitMiddleware``
+hop in front of a no-op ASGI app, for a realistic request scope (user and
+session headers, a session id in the path) spread over many clients. The
+limits are high enough that every request is admitted, so each call pays
+for three bucket checks, their updates and the quota lookup.
+
+  python -m benchmarks.rate_limit
+  python -m benchmarks.rate_limit --clients 10000 --requests 200000
+  python -m benchmarks.rate_limit --backend redis --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    Limit,
+    RateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimitBackend,
+)
+
+def _scopes(clients: int) -> list:
+    return [
+        {
+            "type": "http",
+            "method": "POST",
+            "path": f"/api/v1/chat/session/session-{i}/context",
+            "client": (f"10.0.{i // 256 % 256}.{i % 256}", 50000),
+            "headers": [
+                (b"host", b"api.intervue.test"),
+                (b"content-type", b"application/json"),
+                (b"accept-encoding", b"gzip, br"),
+                (b"x-user-id", f"user-{i}".encode()),
+                (b"x-session-id", f"session-{i}".encode()),
+            ],
+        }
+        for i in range(clients)
+    ]
+
+def _limiter(backend) -> RateLimiter:
+    # High limits: the benchmark measures admitted requests
+    return RateLimiter(
+        backend,
+        ip_limit=Limit("ip", 1e9, 1e9),
+        user_limit=Limit("user", 1e9, 1e9),
+        session_limit=Limit("session", 1e9, 1e9),
+        daily_token_quota=10 ** 12
+    )
+
+async def _noop_app(scope, receive, send):
+    return None
+
+async def _per_check(limiter: RateLimiter, scopes: list, requests: int) -> float:
+    count = len(scopes)
+    started = time.perf_counter()
+    for i in range(requests):
+        await limiter.check(scopes[i % count])
+    return (time.perf_counter() - started) / requests
+
+async def _per_request(app, scopes: list, requests: int) -> float:
+    count = len(scopes)
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % count], None, None)
+    return (time.perf_counter() - started) / requests
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000, help="distinct IP/user/session triples")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--backend", choices=("memory", "redis"), default="memory")
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    if args.backend == "redis":
+        backend = RedisRateLimitBackend(url=args.redis_url)
+        # Network round trips dominate; keep the run short
+        args.requests = min(args.requests, 5000)
+    else:
+        backend = InMemoryRateLimitBackend(max_keys=max(100000, args.clients * 3))
+    limiter = _limiter(backend)
+    scopes = _scopes(args.clients)
+
+    loop = asyncio.new_event_loop()
+    # Warm up: create every bucket so the timed loop measures steady-state updates
+    loop.run_until_complete(_per_check(limiter, scopes, len(scopes)))
+
+    check = loop.run_until_complete(_per_check(limiter, scopes, args.requests))
+    bare = loop.run_until_complete(_per_request(_noop_app, scopes, args.requests))
+    wrapped = loop.run_until_complete(
+        _per_request(RateLimitMiddleware(_noop_app, exempt_paths=("/api/v1/health",), limiter=limiter), scopes, args.requests)
+    )
+    loop.run_until_complete(limiter.close())
+    loop.close()
+
+    print(f"backend: {args.backend}, {args.clients} clients, {args.requests} requests")
+    print(f"  RateLimiter.check:      {check * 1e6:7.2f} us/request")
+    print(f"  middleware hop (added): {(wrapped - bare) * 1e6:7.2f} us/request")
+    print(f"  {backend.stats()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Load test for the chat API against a local fake OpenAI server.
+
+Starts ``benchmarks.fake_openai:app`` and ``main:app`` as subprocesses, then
+replays interview traces built from the frontend's problems.json at rising
+concurrency and reports latency percentiles, throughput and memory per session.
+
+Examples (run from backend/):
+  python -m benchmarks.run_benchmark
+  python -m benchmarks.run_benchmark --stream --levels 1,10,50
+  python -m benchmarks.run_benchmark --save-baseline benchmarks/baseline.json
+  python -m benchmarks.run_benchmark --baseline benchmarks/baseline.json   # exits 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import httpx
+import psutil
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PROBLEMS_PATH = BACKEND_DIR.parent / "frontend" / "src" / "data" / "problems.json"
+
+def load_problems() -> List[Dict[str, Any]]:
+    with open(PROBLEMS_PATH) as f:
+        return json.load(f)["problems"]
+
+def question_context(problem: Dict[str, Any], number: int) -> Dict[str, Any]:
+    """Same shape the frontend sends (problemService.problemToQuestion)"""
+    return {
+        "id": problem["id"],
+        "number": number,
+        "type": "Coding Challenge",
+        "difficulty": problem["difficulty"],
+        "title": problem["title"],
+        "description": problem["description"],
+        "category": problem.get("category"),
+        "examples": problem.get("examples"),
+        "constraints": problem.get("constraints"),
+        "hints": problem.get("hints"),
+    }
+
+def build_trace(problem: Dict[str, Any], number: int) -> List[Dict[str, Any]]:
+    """A realistic interview: clarify, plan, code, complexity, optimize, wrap up"""
+    context = question_context(problem, number)
+    starter = problem["starter_code"]["python"]
+    draft = starter.replace("pass", "result = []\n    for i in range(len(nums)):\n        result.append(i)\n    return result")
+    hint = (problem.get("hints") or ["a better data structure"])[0]
+    return [
+        {"content": "Can you clarify the input?", "question_context": context},
+        {"content": "I'm thinking of starting with a brute force approach and then optimizing.", "question_context": context},
+        {"content": "Here is my first attempt.", "question_context": context, "code_context": draft},
+        {"content": "What is the time complexity of this solution?", "question_context": context, "code_context": draft},
+        {"content": f"Could I optimize it? Maybe: {hint.lower()}", "question_context": context, "code_context": draft},
+        {"content": "Are there any edge cases I have missed?", "question_context": context, "code_context": draft},
+    ]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def start_process(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args, "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+
+async def wait_until_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+async def send_turn(client: httpx.AsyncClient, base_url: str, session_id: str, turn: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+    payload = {**turn, "session_id": session_id}
+    started = time.perf_counter()
+    ttft = None
+    
+    if not stream:
+        response = await client.post(f"{base_url}/api/v1/chat/message", json=payload)
+        ok = response.status_code == 200
+    else:
+        ok = False
+        async with client.stream("POST", f"{base_url}/api/v1/chat/message/stream", json=payload) as response:
+            async for line in response.aiter_lines():
+                if line == "event: delta" and ttft is None:
+                    ttft = time.perf_counter() - started
+                elif line == "event: done":
+                    ok = response.status_code == 200
+                elif line == "event: error":
+                    ok = False
+    
+    return {"latency": time.perf_counter() - started, "ttft": ttft, "ok": ok}
+
+async def run_session(client: httpx.AsyncClient, base_url: str, trace: List[Dict[str, Any]], stream: bool, results: List[Dict[str, Any]]):
+    response = await client.post(f"{base_url}/api/v1/chat/session")
+    session_id = response.json()["session_id"]
+    for turn in trace:
+        try:
+            results.append(await send_turn(client, base_url, session_id, turn, stream))
+        except httpx.HTTPError:
+            results.append({"latency": 0.0, "ttft": None, "ok": False})
+
+async def run_level(base_url: str, server: psutil.Process, traces: List[List[Dict[str, Any]]], concurrency: int, sessions: int, stream: bool) -> Dict[str, Any]:
+    queue: "asyncio.Queue[List[Dict[str, Any]]]" = asyncio.Queue()
+    for i in range(sessions):
+        queue.put_nowait(traces[i % len(traces)])
+    
+    results: List[Dict[str, Any]] = []
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    rss_before = server.memory_info().rss
+    started = time.perf_counter()
+    
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        async def worker():
+            while not queue.empty():
+                trace = queue.get_nowait()
+                await run_session(client, base_url, trace, stream, results)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    
+    elapsed = time.perf_counter() - started
+    rss_after = server.memory_info().rss
+    latencies = [r["latency"] * 1000 for r in results if r["ok"]]
+    ttfts = [r["ttft"] * 1000 for r in results if r["ok"] and r["ttft"] is not None]
+    
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "requests": len(results),
+        "errors": sum(1 for r in results if not r["ok"]),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p95_ms": percentile(ttfts, 95),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "rss_mb": rss_after / (1024 * 1024),
+        "rss_per_session_kb": max(rss_after - rss_before, 0) / sessions / 1024,
+    }
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Regressions of p95 latency or throughput beyond ``tolerance`` (a fraction)"""
+    by_level = {r["concurrency"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        base = by_level.get(result["concurrency"])
+        if base is None:
+            continue
+        if base["p95_ms"] and result["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"concurrency {result['concurrency']}: p95 {result['p95_ms']:.1f}ms vs baseline {base['p95_ms']:.1f}ms"
+            )
+        if base["throughput_rps"] and result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"concurrency {result['concurrency']}: throughput {result['throughput_rps']:.1f}rps "
+                f"vs baseline {base['throughput_rps']:.1f}rps"
+            )
+    return regressions
+
+def print_table(results: List[Dict[str, Any]]):
+    header = f"{'conc':>5} {'reqs':>6} {'err':>4} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'ttft95':>8} {'rps':>8} {'KB/sess':>8}"
+    print(header)
+    print("-" * len(header))
+    fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'-':>8}"
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['requests']:>6} {r['errors']:>4} {fmt(r['p50_ms'])} {fmt(r['p95_ms'])} "
+            f"{fmt(r['p99_ms'])} {fmt(r['ttft_p95_ms'])} {fmt(r['throughput_rps'])} {fmt(r['rss_per_session_kb'])}"
+        )
+
+async def main(args) -> int:
+    fake_env = {
+        "FAKE_OPENAI_LATENCY_MS": str(args.latency_ms),
+        "FAKE_OPENAI_TOKEN_DELAY_MS": str(args.token_delay_ms),
+        "FAKE_OPENAI_ERROR_RATE": str(args.error_rate),
+    }
+    api_env = {
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        "DEBUG": "False",
+        "LOG_LEVEL": "WARNING",
+    }
+    fake = start_process(["benchmarks.fake_openai:app", "--port", str(args.fake_port)], fake_env)
+    api = start_process(["main:app", "--port", str(args.api_port)], api_env)
+    base_url = f"http://127.0.0.1:{args.api_port}"
+    
+    try:
+        await wait_until_ready(f"http://127.0.0.1:{args.fake_port}/docs")
+        await wait_until_ready(f"{base_url}/api/v1/health")
+        
+        problems = load_problems()
+        traces = [build_trace(problem, i + 1) for i, problem in enumerate(problems)]
+        server = psutil.Process(api.pid)
+        
+        results = []
+        for level in args.levels:
+            sessions = max(level * args.sessions_per_worker, 1)
+            result = await run_level(base_url, server, traces, level, sessions, args.stream)
+            results.append(result)
+            print(f"concurrency {level}: {result['requests']} requests, p95 {result['p95_ms']}ms", file=sys.stderr)
+    finally:
+        for process in (api, fake):
+            process.terminate()
+            process.wait(timeout=10)
+    
+    print_table(results)
+    report = {"mode": "stream" if args.stream else "message", "latency_ms": args.latency_ms, "results": results}
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,5,10,25,50", type=lambda v: [int(x) for x in v.split(",")],
+                        help="comma separated concurrency levels")
+    parser.add_argument("--sessions-per-worker", type=int, default=2, help="interview sessions per concurrent worker")
+    parser.add_argument("--stream", action="store_true", help="use the SSE endpoint and record time to first token")
+    parser.add_argument("--latency-ms", type=float, default=300, help="fake upstream latency before the first token")
+    parser.add_argument("--token-delay-ms", type=float, default=15, help="fake upstream delay between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--api-port", type=int, default=8001)
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--save-baseline", help="write the JSON report as a new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression as a fraction")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
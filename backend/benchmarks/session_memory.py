@@ -0,0 +1,148 @@
+"""Per-session memory and access latency of the in-memory session store, model vs compact storage.
+
+Fills a store with synthetic interviews (every session on one of a few
+catalog questions, alternating candidate/interviewer turns) and reports
+traced allocations per session and per message for both encodings. Then
+times ``get`` and an append-one-message ``put`` on long transcripts: for a
+session in the hot set (an interview in progress) and for one that has
+fallen out of it, which pays the compact decode.
+
+  python -m benchmarks.session_memory
+  python -m benchmarks.session_memory --sessions 2000 --messages 40
+  python -m benchmarks.session_memory --latency-messages 400
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas.chat import ChatMessage, ConversationContext, ConversationSession, MessageType
+from app.services.session_store import InMemorySessionStore
+
+CANDIDATE_TURN = "I think we can keep a hash map from value to index and look up the complement as we go."
+INTERVIEWER_TURN = "Good. What is the time complexity of that, and what happens with duplicate values?"
+
+def _question(index: int) -> dict:
+    return {
+        "id": f"problem-{index}",
+        "number": 1,
+        "type": "Coding Challenge",
+        "difficulty": "Medium",
+        "title": f"Problem {index}",
+        "description": "Given an array of integers, return indices of the two numbers that add up to a target. " * 3,
+        "category": "Arrays",
+        "examples": [{"input": "nums = [2,7,11,15], target = 9", "output": "[0,1]", "explanation": None}],
+        "constraints": ["2 <= nums.length <= 10^4", "Only one valid answer exists."],
+        "hints": ["Try a hash map", "Look for the complement"],
+    }
+
+def _session(index: int, messages: int, questions: int) -> ConversationSession:
+    session_id = str(uuid.uuid4())
+    started = datetime.now()
+    return ConversationSession(
+        session_id=session_id,
+        messages=[
+            ChatMessage(
+                id=str(uuid.uuid4()),
+                type=MessageType.USER if i % 2 == 0 else MessageType.AI,
+                # Unique strings, as real turns would be
+                content=f"{CANDIDATE_TURN if i % 2 == 0 else INTERVIEWER_TURN} ({i})",
+                timestamp=started + timedelta(seconds=i * 20),
+                session_id=session_id
+            )
+            for i in range(messages)
+        ],
+        # Each session gets its own copy, as it would after a request is parsed
+        context=ConversationContext(current_question=_question(index % questions)),
+        created_at=started,
+        updated_at=started
+    )
+
+def measure(compact: bool, sessions: int, messages: int, questions: int, hot_sessions: int) -> int:
+    """Bytes still allocated after filling a store, excluding the input sessions"""
+    async def fill(store):
+        for i in range(sessions):
+            await store.put(_session(i, messages, questions))
+    
+    # The loop is created outside the traced window so only the store is counted
+    loop = asyncio.new_event_loop()
+    gc.collect()
+    tracemalloc.start()
+    store = InMemorySessionStore(max_sessions=sessions, idle_ttl_seconds=0, compact=compact, hot_sessions=hot_sessions)
+    loop.run_until_complete(fill(store))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Keep the store alive until it has been measured
+    assert loop.run_until_complete(store.size()) == sessions
+    loop.close()
+    return current
+
+async def latency(compact: bool, messages: int, hot_sessions: int, rounds: int) -> dict:
+    """Seconds per get (hot and cold session) and per append-and-put"""
+    store = InMemorySessionStore(idle_ttl_seconds=0, compact=compact, hot_sessions=hot_sessions)
+    # One more session than the hot set holds, visited round robin, so every get is cold
+    cold_ids = []
+    for i in range(hot_sessions + 1):
+        session = _session(i, messages, 1)
+        cold_ids.append(session.session_id)
+        await store.put(session)
+    hot = _session(0, messages, 1)
+    await store.put(hot)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await store.get(hot.session_id)
+    hot_get = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for i in range(rounds):
+        await store.get(cold_ids[i % len(cold_ids)])
+    cold_get = (time.perf_counter() - started) / rounds
+
+    template = hot.messages[0]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        session = await store.get(hot.session_id)
+        session.messages.append(template.model_copy(update={"id": str(uuid.uuid4())}))
+        await store.put(session)
+    append_put = (time.perf_counter() - started) / rounds - hot_get
+    return {"hot get": hot_get, "cold get": cold_get, "append+put": append_put}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=30, help="messages per session")
+    parser.add_argument("--questions", type=int, default=20, help="distinct questions across sessions")
+    parser.add_argument("--hot-sessions", type=int, default=256, help="decoded sessions kept by the compact store")
+    parser.add_argument("--latency-messages", type=int, default=200, help="messages per session in the latency runs")
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    total_messages = args.sessions * args.messages
+    results = {}
+    for label, compact in (("models", False), ("compact", True)):
+        used = measure(compact, args.sessions, args.messages, args.questions, args.hot_sessions)
+        results[label] = used
+        print(
+            f"{label:>8}: {used / 1024 / 1024:8.1f} MiB  "
+            f"{used / args.sessions:9.0f} B/session  {used / total_messages:7.0f} B/message"
+        )
+    print(f"compact storage uses {results['compact'] / results['models']:.0%} of the model footprint "
+          f"({args.hot_sessions} hot sessions kept decoded)")
+
+    print(f"\nlatency, {args.latency_messages}-message sessions:")
+    for label, compact in (("models", False), ("compact", True)):
+        timings = asyncio.run(latency(compact, args.latency_messages, args.hot_sessions, args.rounds))
+        print(f"{label:>8}: " + "  ".join(f"{name} {seconds * 1e6:8.1f} us" for name, seconds in timings.items()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
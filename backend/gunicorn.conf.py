@@ -0,0 +1,23 @@
+# Production entry point: gunicorn -c gunicorn.conf.py main:app
+# One worker per instance: session state is process-local, so scale out with more
+# instances behind a load balancer with session affinity (see README, "Scaling Out").
+from app.core.config import settings
+from app.core.lifecycle import check_worker_count
+
+check_worker_count(settings.WEB_CONCURRENCY)
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# On SIGTERM workers stop accepting connections, then the app's shutdown handler
+# drains in-flight requests/streams and flushes buffered writes within this window
+graceful_timeout = int(settings.GRACEFUL_SHUTDOWN_TIMEOUT_SECONDS) + 5
+timeout = 120
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = 10000
+max_requests_jitter = 1000
+
+loglevel = settings.LOG_LEVEL.lower()
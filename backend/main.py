@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -6,20 +7,59 @@ import uvicorn
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.container import ServiceContainer
+from app.core.lifecycle import InFlightMiddleware, check_worker_count, in_flight
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.responses import CompressionMiddleware
 from app.api.health import router as health_router
 from app.api.chat import router as chat_router
+from app.api.metrics import router as metrics_router
+from app.api.problems import router as problems_router
+from app.api.jobs import router as jobs_router
+from app.services.health_monitor import health_monitor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting Intervue API...")
+    logger.info(f"Environment: {settings.ENVIRONMENT}")
+    logger.info(f"Database URL: {settings.DATABASE_URL[:20]}...")
+    
+    check_worker_count(settings.WEB_CONCURRENCY)
+    
+    # Services are built lazily on first use
+    app.state.container = ServiceContainer(health_monitor=health_monitor)
+    await health_monitor.start()
+    
+    yield
+    
+    logger.info("Shutting down Intervue API...")
+    await health_monitor.stop()
+    
+    # Let in-flight turns and streams finish before flushing their writes
+    await in_flight.drain(settings.GRACEFUL_SHUTDOWN_TIMEOUT_SECONDS)
+    await app.state.container.shutdown()
+    logger.info("Shutdown complete")
+
 app = FastAPI(
     title="Intervue API",
     description="Backend API for Intervue - AI-powered interview preparation platform",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+if settings.RATE_LIMIT_ENABLED:
+    # Inside CORS, so preflights are never limited and 429s carry CORS headers.
+    # The limiter itself comes from the service container, built on first request
+    app.add_middleware(
+        RateLimitMiddleware,
+        exempt_paths=("/api/v1/health", "/api/v1/metrics", "/docs", "/redoc", "/openapi.json")
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -28,6 +68,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.RESPONSE_COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES)
+
+# Outermost, so shutdown can wait for every in-flight request and stream
+app.add_middleware(InFlightMiddleware, tracker=in_flight)
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Global exception handler: {exc}")
@@ -36,18 +82,11 @@ async def global_exception_handler(request, exc):
         content={"message": "Internal server error", "detail": str(exc)}
     )
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting Intervue API...")
-    logger.info(f"Environment: {settings.ENVIRONMENT}")
-    logger.info(f"Database URL: {settings.DATABASE_URL[:20]}...")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Shutting down Intervue API...")
-
 app.include_router(health_router, prefix="/api/v1")
 app.include_router(chat_router, prefix="/api/v1")
+app.include_router(metrics_router, prefix="/api/v1")
+app.include_router(problems_router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -58,10 +97,20 @@ async def root():
     }
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    if settings.ENVIRONMENT == "production":
+        check_worker_count(settings.WEB_CONCURRENCY)
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            timeout_graceful_shutdown=int(settings.GRACEFUL_SHUTDOWN_TIMEOUT_SECONDS),
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
\ No newline at end of file
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+class _Upstream:
+    """Stands in for the OpenAI client: counts calls, answers after ``delay``"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"reply {self.calls}"))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        )
+
+@pytest.fixture
+async def ai_service(monkeypatch):
+    from app.core.config import settings
+    from app.services.ai_service import AIService
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+    service = AIService()
+    service.client = _Upstream()
+    yield service
+    await service.sessions.close()
+
+async def test_identical_sends_share_one_turn(ai_service):
+    session_id = await ai_service.get_or_create_session()
+    first, second = await asyncio.gather(
+        ai_service.generate_ai_response("how about a hash map?", session_id),
+        ai_service.generate_ai_response("how about a hash map?", session_id)
+    )
+    assert first is second
+    assert ai_service.client.calls == 1
+    session = await ai_service.get_conversation(session_id)
+    assert [message.content for message in session.messages] == ["how about a hash map?", "reply 1"]
+
+async def test_waiter_runs_the_turn_when_the_first_request_is_cancelled(ai_service):
+    session_id = await ai_service.get_or_create_session()
+    leader = asyncio.create_task(ai_service.generate_ai_response("hi", session_id))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(ai_service.generate_ai_response("hi", session_id))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    message = await waiter
+    assert message.content == "reply 2"
+    assert leader.cancelled()
+    assert ai_service.client.calls == 2
+
+async def test_cancelled_waiter_does_not_cancel_the_turn(ai_service):
+    session_id = await ai_service.get_or_create_session()
+    leader = asyncio.create_task(ai_service.generate_ai_response("hi", session_id))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(ai_service.generate_ai_response("hi", session_id))
+    await asyncio.sleep(0.01)
+
+    waiter.cancel()
+    assert (await leader).content == "reply 1"
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
@@ -0,0 +1,60 @@
+import pytest
+
+from app.services.code_diff import CodePatchError, apply_patch, code_version, plan_code_update, unified_diff
+
+BASE = "\n".join(f"    total += values[{i}]" for i in range(40)) + "\n"
+
+def _edit(code: str, line: int, text: str) -> str:
+    lines = code.splitlines(keepends=True)
+    lines[line] = text + "\n"
+    return "".join(lines)
+
+def test_patch_round_trip():
+    new = _edit(_edit(BASE, 3, "    total -= values[3]"), 30, "    return total")
+    assert apply_patch(BASE, unified_diff(BASE, new)) == new
+
+    appended = BASE + "print(total)\n"
+    assert apply_patch(BASE, unified_diff(BASE, appended)) == appended
+    assert apply_patch("", unified_diff("", "x = 1\n")) == "x = 1\n"
+
+def test_stale_patch_is_rejected():
+    patch = unified_diff(BASE, _edit(BASE, 3, "    total -= values[3]"))
+    with pytest.raises(CodePatchError):
+        apply_patch(_edit(BASE, 3, "    pass"), patch)
+    with pytest.raises(CodePatchError):
+        apply_patch(BASE, "not a diff")
+
+def test_first_snapshot_becomes_the_baseline():
+    assert plan_code_update(None, BASE, 0.5) == (BASE, None)
+
+def test_unchanged_code_needs_no_diff():
+    assert plan_code_update(BASE, BASE, 0.5) == (BASE, None)
+
+def test_small_change_is_sent_as_a_diff():
+    new = _edit(BASE, 3, "    total -= values[3]")
+    baseline, diff = plan_code_update(BASE, new, 0.5)
+    assert baseline == BASE
+    assert f"version {code_version(BASE)}" in diff
+    assert apply_patch(BASE, diff) == new
+
+def test_large_diff_falls_back_to_the_full_snapshot():
+    rewritten = "\n".join(f"    result.append(items[{i}] * 2)" for i in range(40)) + "\n"
+    assert plan_code_update(BASE, rewritten, 0.5) == (rewritten, None)
+
+async def test_new_question_resets_the_baseline(monkeypatch):
+    from app.core.config import settings
+    from app.services.ai_service import AIService
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+    service = AIService()
+    session_id = await service.get_or_create_session()
+    await service.update_session_context(session_id, {"current_question": {"id": "two-sum"}})
+    await service.update_session_context(session_id, {"user_code": BASE, "code_baseline": BASE})
+
+    # The turn path re-sends the current question; that keeps the baseline
+    await service.update_session_context(session_id, {"current_question": {"id": "two-sum"}})
+    assert (await service.get_conversation(session_id)).context.code_baseline == BASE
+
+    await service.update_session_context(session_id, {"current_question": {"id": "valid-parentheses"}})
+    assert (await service.get_conversation(session_id)).context.code_baseline is None
+    await service.sessions.close()
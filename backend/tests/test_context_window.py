@@ -0,0 +1,124 @@
+import asyncio
+
+from app.services.context_window import count_message_tokens, overflow_count
+
+def _history(count: int, words: int = 40):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": " ".join(f"word{i}x{j}" for j in range(words))}
+        for i in range(count)
+    ]
+
+def test_nothing_folded_within_budget():
+    history = _history(4)
+    assert overflow_count(history, count_message_tokens(history), keep_recent=2) == 0
+
+def test_folds_down_to_the_low_water_mark():
+    history = _history(20)
+    budget = count_message_tokens(history) - 1
+    minimal = overflow_count(history, budget, keep_recent=2)
+    to_half = overflow_count(history, budget, keep_recent=2, target_tokens=budget // 2)
+
+    assert minimal == 1
+    assert to_half > minimal
+    assert count_message_tokens(history[to_half:]) <= budget // 2
+
+def test_low_water_mark_spaces_out_folds():
+    """Adding a turn at a time, folding to half the budget only folds every few turns"""
+    budget = count_message_tokens(_history(10))
+    history, folds = [], 0
+    for message in _history(60):
+        history.append(message)
+        fold = overflow_count(history, budget, keep_recent=2, target_tokens=budget // 2)
+        if fold:
+            folds += 1
+            history = history[fold:]
+    assert 0 < folds <= 60 // 4
+
+def test_recent_messages_are_kept():
+    history = _history(6, words=400)
+    assert overflow_count(history, 10, keep_recent=4, target_tokens=0) == 2
+
+def test_summaries_follow_the_cheap_route(monkeypatch):
+    from app.core.config import settings
+    from app.services.model_router import SUMMARY, create_model_router
+
+    monkeypatch.setattr(settings, "MODEL_ROUTES", '{"chit_chat": {"model": "small"}, "discussion": {"model": "large"}}')
+    assert create_model_router().routes[SUMMARY].model == "small"
+
+    monkeypatch.setattr(settings, "MODEL_ROUTES", '{"chit_chat": {"model": "small"}, "summary": {"model": "notes"}}')
+    routes = create_model_router().routes
+    assert routes[SUMMARY].model == "notes"
+    assert routes[SUMMARY].max_tokens == settings.CONTEXT_SUMMARY_MAX_TOKENS
+
+async def _service_with_history(monkeypatch, count: int):
+    import uuid
+    from datetime import datetime
+    from app.core.config import settings
+    from app.schemas.chat import ChatMessage, MessageType
+    from app.services.ai_service import AIService
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(settings, "CONTEXT_HISTORY_MAX_TOKENS", 600)
+    monkeypatch.setattr(settings, "CONTEXT_KEEP_RECENT_MESSAGES", 4)
+    service = AIService()
+    session_id = await service.get_or_create_session()
+
+    async def add(content: str):
+        await service.add_message_to_session(session_id, ChatMessage(
+            id=str(uuid.uuid4()),
+            type=MessageType.USER,
+            content=content,
+            timestamp=datetime.now(),
+            session_id=session_id
+        ))
+
+    for text in _history(count, words=60):
+        await add(text["content"])
+    return service, session_id, add
+
+async def test_fold_lands_when_messages_arrive_during_the_summary(monkeypatch):
+    service, session_id, add = await _service_with_history(monkeypatch, 12)
+    started, release = asyncio.Event(), asyncio.Event()
+    folded = []
+
+    async def summarize_turns(previous, turns):
+        folded.extend(turns)
+        started.set()
+        await release.wait()
+        return "notes"
+    service.summarize_turns = summarize_turns
+
+    task = asyncio.create_task(service.compact_history(session_id))
+    await started.wait()
+    await add("a new turn while the summary is being written")
+    release.set()
+    await task
+
+    session = await service.get_conversation(session_id)
+    assert session.history_summary == "notes"
+    assert session.summarized_message_count == len(folded) > 0
+    assert len(session.messages) == 13
+    assert session.messages[-1].content == "a new turn while the summary is being written"
+    await service.sessions.close()
+
+async def test_fold_is_dropped_when_another_fold_landed_first(monkeypatch):
+    service, session_id, _ = await _service_with_history(monkeypatch, 12)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def summarize_turns(previous, turns):
+        started.set()
+        await release.wait()
+        return "stale notes"
+    service.summarize_turns = summarize_turns
+
+    task = asyncio.create_task(service.compact_history(session_id))
+    await started.wait()
+    session = await service.get_conversation(session_id)
+    session.history_summary, session.summarized_message_count = "newer notes", 2
+    await service.sessions.put(session)
+    release.set()
+    await task
+
+    session = await service.get_conversation(session_id)
+    assert (session.history_summary, session.summarized_message_count) == ("newer notes", 2)
+    await service.sessions.close()
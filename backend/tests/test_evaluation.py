@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.schemas.chat import InterviewEvaluation
+from app.services.evaluation import EvaluationService, SessionNotFoundError
+from app.services.job_queue import JobQueue, JobQueueFullError
+
+class _Evaluations(EvaluationService):
+    """Skips the model: known sessions get a fixed score"""
+
+    async def evaluate_session(self, session_id: str) -> InterviewEvaluation:
+        await asyncio.sleep(0.01)
+        if session_id == "missing":
+            raise SessionNotFoundError(f"Session {session_id} not found")
+        return InterviewEvaluation(
+            session_id=session_id,
+            correctness=7,
+            complexity_discussion=6,
+            communication=8,
+            overall=7.0,
+            summary="ok",
+            strengths=[],
+            improvements=[],
+            transcript_hash=session_id,
+            message_count=2
+        )
+
+async def test_bulk_evaluation_runs_on_the_shared_queue():
+    queue = JobQueue(workers=2)
+    service = _Evaluations(None, queue, window_tokens=3000)
+
+    bulk = service.start_bulk(["a", "b", "missing", "a"])
+    assert bulk.total == 3
+    assert queue.stats()["queued"] == 3
+
+    deadline = asyncio.get_running_loop().time() + 2
+    while bulk.status != "completed":
+        assert asyncio.get_running_loop().time() < deadline, "bulk evaluation did not finish"
+        await asyncio.sleep(0.01)
+
+    assert (bulk.completed, bulk.failed) == (2, 1)
+    assert set(bulk.results) == {"a", "b"}
+    assert bulk.errors == {"missing": "Session missing not found"}
+    assert queue.stats()["succeeded"] == 2
+    await queue.stop()
+
+async def test_bulk_evaluation_refused_when_the_queue_is_short():
+    queue = JobQueue(workers=1, max_queue_depth=2)
+    service = _Evaluations(None, queue, window_tokens=3000)
+
+    with pytest.raises(JobQueueFullError):
+        service.start_bulk(["a", "b", "c"])
+    assert queue.stats()["queued"] == 0
+    await queue.stop()
+
+async def test_only_finished_bulk_jobs_are_pruned():
+    queue = JobQueue(workers=1)
+    service = _Evaluations(None, queue, window_tokens=3000, max_jobs=2)
+    gate = asyncio.Event()
+
+    async def blocked(session_id):
+        await gate.wait()
+        return await _Evaluations.evaluate_session(service, session_id)
+    service.evaluate_session = blocked
+
+    running = service.start_bulk(["slow"])
+    finished = [service.start_bulk([]) for _ in range(3)]
+    assert all(job.status == "completed" for job in finished)
+
+    # Over the limit, the oldest finished job goes; the running one stays pollable
+    assert service.get_job(running.job_id) is running
+    assert service.get_job(finished[0].job_id) is None
+    assert service.get_job(finished[1].job_id) is None
+    assert service.get_job(finished[2].job_id) is finished[2]
+
+    gate.set()
+    deadline = asyncio.get_running_loop().time() + 2
+    while running.status != "completed":
+        assert asyncio.get_running_loop().time() < deadline, "bulk evaluation did not finish"
+        await asyncio.sleep(0.01)
+    service.start_bulk([])
+    assert service.get_job(running.job_id) is None
+    await queue.stop()
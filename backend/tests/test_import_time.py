@@ -0,0 +1,6 @@
+from benchmarks.import_time import measure
+
+def test_heavy_modules_load_on_first_use():
+    # A fresh interpreter without API keys or a database, as at worker boot
+    result = measure(runs=1)
+    assert result["eagerly_loaded"] == [], f"imported by main but should be lazy: {result['eagerly_loaded']}"
@@ -0,0 +1,15 @@
+import runpy
+
+import pytest
+
+from app.core.lifecycle import check_worker_count
+
+def test_one_worker_is_allowed():
+    check_worker_count(1)
+
+def test_gunicorn_refuses_several_workers(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+
+    with pytest.raises(RuntimeError, match="WEB_CONCURRENCY=4"):
+        runpy.run_path("gunicorn.conf.py")
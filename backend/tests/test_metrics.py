@@ -0,0 +1,92 @@
+import math
+import re
+
+from app.core.metrics import MetricsRegistry
+
+_NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+_LABELS = r'\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*",?)*\}'
+_SAMPLE = re.compile(rf"^({_NAME})(?:{_LABELS})? (?:NaN|[+-]Inf|-?[0-9.e+-]+)$")
+_COMMENT = re.compile(rf"^# (HELP|TYPE) ({_NAME}) (.*)$")
+
+def _parse(text: str):
+    """Check every line against the text exposition format; returns {family: (type, [sample lines])}"""
+    assert text.endswith("\n")
+    families = {}
+    current = None
+    for line in text.splitlines():
+        comment = _COMMENT.match(line)
+        if comment:
+            kind, name, rest = comment.groups()
+            if kind == "TYPE":
+                assert name not in families, f"{name} described twice"
+                assert rest in ("counter", "gauge", "histogram", "summary", "untyped")
+                families[name] = (rest, [])
+                current = name
+            continue
+        match = _SAMPLE.match(line)
+        assert match, f"not a valid sample line: {line!r}"
+        name = match.group(1)
+        family = name if name in families else re.sub(r"_(bucket|sum|count)$", "", name)
+        assert family == current, f"{name} is not contiguous with its family"
+        families[family][1].append(line)
+    return families
+
+def test_metric_types_render_in_the_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests\nby path", ["path"])
+    in_flight = registry.gauge("app_in_flight", "Requests in flight")
+    latency = registry.histogram("app_latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+
+    requests.inc(path='/say "hi"\\')
+    requests.inc(2, path="/")
+    in_flight.set(math.nan)
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value, stage="upstream")
+
+    text = registry.render()
+    families = _parse(text)
+    assert "# HELP app_requests_total Requests\\nby path" in text
+    assert families["app_requests_total"] == ("counter", [
+        'app_requests_total{path="/say \\"hi\\"\\\\"} 1.0',
+        'app_requests_total{path="/"} 2.0',
+    ])
+    assert families["app_in_flight"] == ("gauge", ["app_in_flight NaN"])
+    assert families["app_latency_seconds"] == ("histogram", [
+        'app_latency_seconds_bucket{stage="upstream",le="0.1"} 1',
+        'app_latency_seconds_bucket{stage="upstream",le="1.0"} 3',
+        'app_latency_seconds_bucket{stage="upstream",le="+Inf"} 4',
+        'app_latency_seconds_sum{stage="upstream"} 6.25',
+        'app_latency_seconds_count{stage="upstream"} 4',
+    ])
+
+def test_collected_families_are_contiguous():
+    registry = MetricsRegistry()
+    registry.counter("app_requests_total", "Requests").inc()
+    registry.register_collector(lambda: [
+        ("app_queue_depth", "gauge", "Queued work", {"queue": "a"}, 1),
+        ("app_workers", "gauge", "Workers", {}, 4),
+    ])
+    registry.register_collector(lambda: [
+        ("app_queue_depth", "gauge", "Queued work", {"queue": "b"}, 2),
+        ("app_requests_total", "counter", "Shadowing a registered metric", {}, 99),
+    ])
+
+    def broken():
+        raise RuntimeError("collector failed")
+    registry.register_collector(broken)
+
+    families = _parse(registry.render())
+    assert families["app_queue_depth"] == ("gauge", ['app_queue_depth{queue="a"} 1.0', 'app_queue_depth{queue="b"} 2.0'])
+    assert families["app_workers"] == ("gauge", ["app_workers 4.0"])
+    assert families["app_requests_total"] == ("counter", ["app_requests_total 1.0"])
+
+def test_scrape_endpoint_serves_the_text_format():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        client.get("/")
+        response = client.get("/api/v1/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    _parse(response.text)
@@ -0,0 +1,55 @@
+import pytest
+
+from app.core.config import settings
+from app.services.model_router import (
+    CHIT_CHAT,
+    CLARIFICATION,
+    CODE_REVIEW,
+    DISCUSSION,
+    SUMMARY,
+    create_model_router,
+    default_routes,
+)
+
+@pytest.fixture
+def routes(monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_MODEL", "base")
+
+    def build(overrides: str):
+        monkeypatch.setattr(settings, "MODEL_ROUTES", overrides)
+        return create_model_router().routes
+    return build
+
+def test_no_overrides_keeps_the_defaults(routes):
+    assert routes("") == default_routes("base")
+
+def test_overrides_merge_into_the_default_route(routes):
+    table = routes('{"code_review": {"model": "large", "temperature": 0.2}, "chit_chat": {"model": "small"}}')
+    assert table[CODE_REVIEW].model == "large"
+    assert table[CODE_REVIEW].temperature == 0.2
+    assert table[CODE_REVIEW].max_tokens == default_routes("base")[CODE_REVIEW].max_tokens
+    assert table[CLARIFICATION] == default_routes("base")[CLARIFICATION]
+
+def test_new_routes_start_from_discussion(routes):
+    table = routes('{"system_design": {"max_tokens": 900}}')
+    assert table["system_design"].max_tokens == 900
+    assert table["system_design"].model == table[DISCUSSION].model
+
+def test_summary_route_follows_chit_chat_unless_given_a_model(routes):
+    table = routes('{"chit_chat": {"model": "small"}, "summary": {"max_tokens": 64}}')
+    assert table[SUMMARY].model == "small"
+    assert table[SUMMARY].max_tokens == 64
+    assert table[SUMMARY].temperature == 0.2
+
+    table = routes('{"chit_chat": {"model": "small"}, "summary": {"model": "notes"}}')
+    assert table[SUMMARY].model == "notes"
+    assert table[CHIT_CHAT].model == "small"
+
+@pytest.mark.parametrize("overrides", [
+    "{not json",
+    '["chit_chat"]',
+    '{"chit_chat": {"model": "small"}, "code_review": {"modle": "large"}}',
+    '{"chit_chat": {"model": "small"}, "discussion": "large"}',
+])
+def test_invalid_overrides_fall_back_to_the_defaults(routes, overrides):
+    assert routes(overrides) == default_routes("base")
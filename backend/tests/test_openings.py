@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api import chat
+from app.core.container import get_ai_service
+
+def _question(question_id: str) -> dict:
+    return {
+        "id": question_id,
+        "number": 1,
+        "type": "coding",
+        "difficulty": "Easy",
+        "title": question_id,
+        "description": "..."
+    }
+
+async def test_moving_to_a_new_question_prefetches_its_opening(monkeypatch):
+    from app.core.config import settings
+    from app.services.ai_service import AIService
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+    service = AIService()
+    scheduled = []
+    service.schedule_opening = lambda session_id, question: scheduled.append(question.id) or True
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_ai_service] = lambda: service
+
+    session_id = await service.get_or_create_session()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for question_id in ("two-sum", "two-sum", "valid-parentheses"):
+            response = await client.put(
+                f"/chat/session/{session_id}/context",
+                json={"current_question": _question(question_id)}
+            )
+            assert response.status_code == 200
+    assert scheduled == ["two-sum", "valid-parentheses"]
+    await service.sessions.close()
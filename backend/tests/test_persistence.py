@@ -0,0 +1,181 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import conversation  # noqa: F401  registers the tables
+from app.api import chat
+from app.core.container import get_ai_service
+from app.db.database import Base
+from app.schemas.chat import ChatMessage, ConversationContext, ConversationSession, MessageType
+from app.services.persistence import ConversationPersister, count_messages
+
+STARTED = datetime(2026, 3, 1, 9, 30)
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'intervue.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.fixture
+async def ai_service(session_factory, monkeypatch):
+    from app.core.config import settings
+    from app.services.ai_service import AIService
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+    service = AIService()
+    service.persister = ConversationPersister(session_factory)
+    yield service
+    await service.sessions.close()
+
+def _session(session_id: str = "s1") -> ConversationSession:
+    return ConversationSession(
+        session_id=session_id,
+        messages=[],
+        context=ConversationContext(),
+        created_at=STARTED,
+        updated_at=STARTED
+    )
+
+def _message(session_id: str, i: int) -> ChatMessage:
+    return ChatMessage(
+        id=f"{session_id}-{i}",
+        type=MessageType.USER if i % 2 == 0 else MessageType.AI,
+        content=f"turn {i}",
+        timestamp=STARTED + timedelta(seconds=i),
+        session_id=session_id
+    )
+
+def _record(persister: ConversationPersister, session_id: str, messages: range):
+    persister.record_session(_session(session_id))
+    for i in messages:
+        persister.record_message(session_id, _message(session_id, i), i)
+
+async def _count(persister: ConversationPersister, session_id: str) -> int:
+    async with persister.session_factory() as db:
+        return await count_messages(db, session_id)
+
+async def test_flush_writes_one_batch(session_factory):
+    persister = ConversationPersister(session_factory)
+    _record(persister, "s1", range(5))
+    _record(persister, "s2", range(3))
+    await persister.flush()
+    assert (await _count(persister, "s1"), await _count(persister, "s2")) == (5, 3)
+    assert persister.stats()["flushes"] == 1
+    assert persister.stats()["messages_written"] == 8
+    assert persister.pending == 0
+
+async def test_batch_size_wakes_the_flush_loop(session_factory):
+    persister = ConversationPersister(session_factory, batch_size=4, flush_interval_ms=60000)
+    await persister.start()
+    try:
+        _record(persister, "s1", range(4))
+        for _ in range(100):
+            if persister.messages_written == 4:
+                break
+            await asyncio.sleep(0.01)
+        assert persister.messages_written == 4
+    finally:
+        await persister.stop()
+
+async def test_concurrent_flush_waits_for_the_commit(session_factory):
+    persister = ConversationPersister(session_factory)
+    _record(persister, "s1", range(3))
+    first = asyncio.create_task(persister.flush())
+    await asyncio.sleep(0)
+    # The buffers are already empty, but the rows are not committed yet
+    assert persister.pending == 0
+    await persister.flush()
+    assert await _count(persister, "s1") == 3
+    await first
+
+async def test_rejected_rows_are_dead_lettered(session_factory):
+    persister = ConversationPersister(session_factory)
+    _record(persister, "s1", range(2))
+    await persister.flush()
+
+    # Reuses the sequence of an already persisted message
+    persister.record_message("s1", _message("s1", 2).model_copy(update={"id": "duplicate"}), 1)
+    persister.record_message("s1", _message("s1", 2), 2)
+    await persister.flush()
+
+    assert await _count(persister, "s1") == 3
+    stats = persister.stats()
+    assert stats["failed_flushes"] == 1
+    assert stats["dead_lettered"] == 1
+    assert persister.dead_letters[0]["row"]["id"] == "duplicate"
+    assert persister.pending == 0
+
+async def test_unreachable_database_keeps_the_batch(session_factory):
+    down = True
+
+    def factory():
+        if down:
+            raise ConnectionRefusedError("database is down")
+        return session_factory()
+
+    persister = ConversationPersister(factory)
+    _record(persister, "s1", range(3))
+    await persister.flush()
+    assert persister.stats()["failed_flushes"] == 1
+    assert persister.stats()["dead_lettered"] == 0
+    assert persister.pending == 4
+
+    down = False
+    await persister.flush()
+    assert await _count(persister, "s1") == 3
+    assert persister.pending == 0
+
+async def test_evicted_session_is_rehydrated(ai_service):
+    session_id = await ai_service.get_or_create_session()
+    await ai_service.add_message_to_session(session_id, _message(session_id, 0))
+    await ai_service.sessions.delete(session_id)
+
+    assert await ai_service.get_or_create_session(session_id) == session_id
+    loaded = await ai_service.get_conversation(session_id)
+    assert [message.content for message in loaded.messages] == ["turn 0"]
+
+async def test_persisted_pages(ai_service):
+    _record(ai_service.persister, "s1", range(5))
+
+    _, rows, count, has_more = await ai_service.load_persisted_page("s1", limit=2)
+    assert [sequence for sequence, _ in rows] == [0, 1] and count == 5 and has_more
+    _, rows, _, has_more = await ai_service.load_persisted_page("s1", after_sequence=1, limit=2)
+    assert [sequence for sequence, _ in rows] == [2, 3] and has_more
+    _, rows, _, has_more = await ai_service.load_persisted_page("s1", since_id="s1-2")
+    assert [sequence for sequence, _ in rows] == [3, 4] and not has_more
+
+    with pytest.raises(ValueError):
+        await ai_service.load_persisted_page("s1", since_id="unknown")
+    assert await ai_service.load_persisted_page("missing") is None
+
+async def test_history_falls_back_to_the_database(ai_service):
+    _record(ai_service.persister, "s1", range(5))
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_ai_service] = lambda: ai_service
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = (await client.get("/chat/conversation/s1", params={"limit": 2})).json()
+        assert [message["id"] for message in first["messages"]] == ["s1-0", "s1-1"]
+        assert first["message_count"] == 5 and first["has_more"]
+
+        rest = (await client.get("/chat/conversation/s1", params={"cursor": first["next_cursor"]})).json()
+        assert [message["id"] for message in rest["messages"]] == ["s1-2", "s1-3", "s1-4"]
+        assert not rest["has_more"]
+
+        newer = (await client.get("/chat/conversation/s1", params={"since_id": "s1-3"})).json()
+        assert [message["id"] for message in newer["messages"]] == ["s1-4"]
+
+        assert (await client.get("/chat/conversation/s1", params={"since_id": "nope"})).status_code == 400
+        assert (await client.get("/chat/conversation/missing")).status_code == 404
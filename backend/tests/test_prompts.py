@@ -0,0 +1,54 @@
+from app.schemas.chat import ConversationContext, ProblemExample, QuestionContext
+from app.services.prompts import INTERVIEWER_PROMPT_PREFIX, PromptRenderer
+
+def _question(**fields) -> QuestionContext:
+    values = {
+        "id": "two-sum",
+        "number": 1,
+        "type": "coding",
+        "difficulty": "Easy",
+        "title": "Two Sum",
+        "description": "Find two numbers that add up to target.",
+        "category": "Arrays",
+        "examples": [ProblemExample(input="[2,7,11,15], 9", output="[0,1]")],
+        "constraints": ["2 <= nums.length"],
+        "hints": ["Try a hash map"],
+    }
+    return QuestionContext(**{**values, **fields})
+
+def test_static_prefix_comes_first():
+    renderer = PromptRenderer()
+    prompts = [
+        renderer.render(ConversationContext()),
+        renderer.render(ConversationContext(question_number=3, programming_language="go"), _question()),
+        renderer.render(ConversationContext(), _question(title="Valid Parentheses", category=None, examples=None)),
+    ]
+    for prompt in prompts:
+        assert prompt.startswith(INTERVIEWER_PROMPT_PREFIX)
+    # Session details, then the problem, all after the shared prefix
+    prompt = prompts[1]
+    assert len(INTERVIEWER_PROMPT_PREFIX) < prompt.index("Question 3 of 5") < prompt.index("Current Problem: Two Sum")
+    assert prompt.index("Category: Arrays") < prompt.index("Sample: Input [2,7,11,15], 9")
+    assert "Category" not in prompts[2] and "Examples available" not in prompts[2]
+
+def test_unrelated_context_changes_hit_the_cache():
+    renderer = PromptRenderer()
+    first = renderer.render(ConversationContext(), _question())
+    again = renderer.render(ConversationContext(user_code="def f(): pass", code_baseline="x"), _question(description="reworded"))
+    assert again is first
+    assert (renderer.hits, renderer.misses) == (1, 1)
+
+    assert renderer.render(ConversationContext(question_number=2), _question()) != first
+    assert renderer.render(ConversationContext(), _question(hints=["a", "b"])) != first
+    assert (renderer.hits, renderer.misses) == (1, 3)
+
+def test_least_recently_used_prompt_is_evicted():
+    renderer = PromptRenderer(max_entries=2)
+    for number in (1, 2, 1, 3):
+        renderer.render(ConversationContext(question_number=number))
+    assert (renderer.hits, renderer.misses) == (1, 3)
+
+    # 2 was the least recently used when 3 came in
+    renderer.render(ConversationContext(question_number=1))
+    renderer.render(ConversationContext(question_number=2))
+    assert (renderer.hits, renderer.misses) == (2, 4)
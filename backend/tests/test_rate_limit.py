@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    Limit,
+    RateLimiter,
+    RedisRateLimitBackend,
+    record_usage,
+)
+
+def _scope(ip: str = "10.0.0.1", user: str = "alice", method: str = "POST") -> dict:
+    return {
+        "type": "http",
+        "method": method,
+        "path": "/api/v1/chat/message",
+        "client": (ip, 50000),
+        "headers": [(b"x-user-id", user.encode())],
+    }
+
+def _limiter(backend, daily_token_quota: int = 0) -> RateLimiter:
+    return RateLimiter(
+        backend,
+        ip_limit=Limit("ip", 0.001, 3),
+        user_limit=Limit("user", 0.001, 1),
+        daily_token_quota=daily_token_quota,
+        trust_user_header=True
+    )
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request):
+    if request.param == "memory":
+        yield InMemoryRateLimitBackend()
+        return
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    backend = RedisRateLimitBackend(client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+    yield backend
+    await backend.close()
+
+async def test_refused_request_charges_no_bucket(backend):
+    limiter = _limiter(backend)
+    assert await limiter.check(_scope(user="alice")) is None
+    # alice's own bucket is empty; the shared IP bucket must not pay for her retries
+    for _ in range(5):
+        limit, wait = await limiter.check(_scope(user="alice"))
+        assert limit == "user" and wait > 0
+    assert await limiter.check(_scope(user="bob")) is None
+    assert await limiter.check(_scope(user="carol")) is None
+    limit, _ = await limiter.check(_scope(user="dave"))
+    assert limit == "ip"
+
+async def _handle(limiter: RateLimiter, scope: dict, tokens: int):
+    # In a task of its own, as a request would be, so the bound quota keys do not leak
+    async def handle():
+        assert await limiter.check(scope) is None
+        await record_usage(tokens)
+    await asyncio.create_task(handle())
+
+async def test_usage_is_charged_to_user_and_ip(backend):
+    limiter = RateLimiter(backend, daily_token_quota=100, trust_user_header=True)
+
+    await _handle(limiter, _scope(ip="10.0.0.1", user="alice"), 150)
+    await _handle(limiter, _scope(ip="10.0.0.2", user="bob"), 10)
+    assert await backend.usage("user:alice") == 150
+    assert await backend.usage("ip:10.0.0.1") == 150
+    assert await backend.usage("user:bob") == 10
+
+    # alice is out from any address, and so is anyone else on hers
+    limit, _ = await limiter.check(_scope(ip="10.0.0.9", user="alice"))
+    assert limit == "daily_token_quota"
+    limit, _ = await limiter.check(_scope(ip="10.0.0.1", user="carol"))
+    assert limit == "daily_token_quota"
+    # Reads stay open once the quota is spent
+    assert await limiter.check(_scope(user="alice", method="GET")) is None
+
+async def test_rotating_an_unauthenticated_user_header_gets_no_fresh_quota(backend):
+    limiter = RateLimiter(
+        backend,
+        user_limit=Limit("user", 0.001, 1),
+        daily_token_quota=100
+    )
+
+    await _handle(limiter, _scope(user="user-0"), 150)
+    for i in range(1, 4):
+        limit, _ = await limiter.check(_scope(user=f"user-{i}"))
+        assert limit == "daily_token_quota"
+    assert await backend.usage("ip:10.0.0.1") == 150
+    assert await backend.usage("user:user-0") == 0
+
+async def test_redis_timeout_fails_open():
+    pytest.importorskip("redis")
+
+    async def silent(reader, writer):
+        await reader.read()
+
+    server = await asyncio.start_server(silent, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    backend = RedisRateLimitBackend(url=f"redis://127.0.0.1:{port}/0", socket_timeout=0.05)
+    try:
+        started = time.perf_counter()
+        assert await _limiter(backend, daily_token_quota=100).check(_scope()) is None
+        assert time.perf_counter() - started < 1
+        # Two quota lookups (IP and user) and the bucket script
+        assert backend.stats()["errors"] == 3
+    finally:
+        await backend.close()
+        server.close()
+
+def test_limiter_is_built_by_the_container(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_BURST", 2)
+    from main import app
+
+    with TestClient(app) as client:
+        container = app.state.container
+        assert container._rate_limiter is None
+        statuses = [client.get("/").status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        assert container._rate_limiter is not None
@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+def _connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.test/v1/chat/completions"))
+
+def _caller(breaker: CircuitBreaker = None, **options) -> ResilientCaller:
+    settings = {"max_retries": 2, "base_delay_seconds": 0.001, "max_delay_seconds": 0.004, **options}
+    return ResilientCaller(breaker or CircuitBreaker(failure_threshold=100, reset_timeout_seconds=60), **settings)
+
+class _Upstream:
+    """Fake upstream: fails ``failures`` times, then answers after ``delays`` (one per call, last repeats)"""
+
+    def __init__(self, failures: int = 0, delays=(0,), error=_connection_error):
+        self.failures = failures
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error()
+        delay = self.delays[min(self.calls - self.failures, len(self.delays)) - 1]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"answer {self.calls}"
+
+def test_breaker_opens_probes_and_closes(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=5)
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # After the cooldown one probe goes through; others still fail fast
+    now[0] += 5
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] += 5
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["times_opened"] == 2
+    assert breaker.stats()["short_circuited"] == 2
+
+async def test_retries_stop_at_the_limit():
+    caller = _caller(max_retries=2)
+    upstream = _Upstream(failures=10)
+    with pytest.raises(openai.APIConnectionError):
+        await caller.call(upstream)
+    assert upstream.calls == 3
+    assert caller.stats()["retries"] == 2
+    assert caller.stats()["failures"] == 1
+
+    upstream = _Upstream(failures=1)
+    assert await caller.call(upstream) == "answer 2"
+    assert caller.stats()["retries"] == 3
+
+async def test_client_errors_are_not_retried():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=60)
+    caller = _caller(breaker)
+    upstream = _Upstream(failures=1, error=lambda: ValueError("bad request"))
+    with pytest.raises(ValueError):
+        await caller.call(upstream)
+    assert upstream.calls == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_backoff_is_jittered_and_capped():
+    caller = _caller(base_delay_seconds=0.1, max_delay_seconds=0.5)
+    error = _connection_error()
+    for attempt, ceiling in ((0, 0.1), (1, 0.2), (2, 0.4), (5, 0.5)):
+        delays = [caller._backoff(attempt, error) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert len(set(delays)) > 1
+
+    throttled = openai.RateLimitError(
+        "slow down",
+        response=httpx.Response(429, headers={"retry-after": "30"}, request=error.request),
+        body=None
+    )
+    assert caller._backoff(0, throttled) == 0.5
+
+async def test_hedge_wins_and_cancels_the_slow_request():
+    caller = _caller(hedge_enabled=True, hedge_min_delay_seconds=0.01)
+    for _ in range(20):
+        caller.latency.record(0.01)
+    upstream = _Upstream(delays=(10, 0))
+
+    assert await asyncio.wait_for(caller.call(upstream), timeout=1) == "answer 2"
+    await asyncio.sleep(0)
+    assert upstream.cancelled == 1
+    assert caller.stats()["hedges_started"] == 1
+    assert caller.stats()["hedges_won"] == 1
+
+async def test_unhedged_calls_do_not_feed_the_hedge_delay():
+    caller = _caller(hedge_enabled=True)
+    for _ in range(20):
+        await caller.call(_Upstream(), hedge=False)
+    assert caller.latency.percentile(95) is None
+    await caller.call(_Upstream())
+    assert len(caller.latency._samples) == 1
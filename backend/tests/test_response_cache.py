@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.schemas.chat import ChatMessage, MessageType
+from app.services.response_cache import ResponseCache
+
+PROMPT = "You are a technical interviewer."
+
+def test_normalized_repeat_hits():
+    cache = ResponseCache()
+    cache.put(PROMPT, "two-sum", "Can you clarify the input?", "Sure.")
+    assert cache.get(PROMPT, "two-sum", "  can you   clarify the input") == "Sure."
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Should I sort the array in ascending order?", "Should I sort the array in descending order?"),
+    ("Do I return the indices?", "Do I return the values?"),
+])
+def test_near_identical_wording_misses(stored, asked):
+    cache = ResponseCache()
+    cache.put(PROMPT, "two-sum", stored, "Yes.")
+    assert cache.get(PROMPT, "two-sum", asked) is None
+
+def test_partitioned_by_prompt_and_question():
+    cache = ResponseCache()
+    cache.put(PROMPT, "two-sum", "hi", "Hello!")
+    assert cache.get(PROMPT, "three-sum", "hi") is None
+    assert cache.get("Another prompt", "two-sum", "hi") is None
+
+def test_lru_and_ttl_eviction(monkeypatch):
+    cache = ResponseCache(max_entries=2, ttl_seconds=10)
+    for message in ("a", "b", "c"):
+        cache.put(PROMPT, None, message, message.upper())
+    assert cache.get(PROMPT, None, "a") is None
+    assert cache.get(PROMPT, None, "c") == "C"
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.response_cache.time.monotonic", lambda: now + 60)
+    assert cache.get(PROMPT, None, "c") is None
+    assert cache.stats()["evictions"] == 2
+
+def _message(session_id: str, kind: MessageType, content: str) -> ChatMessage:
+    return ChatMessage(id=content, type=kind, content=content, timestamp=datetime.now(), session_id=session_id)
+
+async def test_first_reply_after_prefetched_opening_is_cacheable(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    from app.services.ai_service import AIService
+    service = AIService()
+    session_id = await service.get_or_create_session()
+
+    await service.add_message_to_session(session_id, _message(session_id, MessageType.AI, "Welcome! Any questions?"))
+    await service.add_message_to_session(session_id, _message(session_id, MessageType.USER, "Can the array be empty?"))
+    assert await service._cache_scope(session_id, None, PROMPT) == f"{PROMPT}\x00Welcome! Any questions?"
+    assert await service._cache_scope(session_id, "def f(): pass", PROMPT) is None
+
+    await service.add_message_to_session(session_id, _message(session_id, MessageType.AI, "No."))
+    await service.add_message_to_session(session_id, _message(session_id, MessageType.USER, "Thanks"))
+    assert await service._cache_scope(session_id, None, PROMPT) is None
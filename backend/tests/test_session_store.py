@@ -0,0 +1,164 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.schemas.chat import ChatMessage, ConversationContext, ConversationSession, MessageType
+from app.services.compact_session import CompactSession
+from app.services.session_store import InMemorySessionStore, RedisSessionStore
+
+QUESTION = {"id": "two-sum", "title": "Two Sum", "difficulty": "Easy", "hints": ["Try a hash map"]}
+
+def _session(session_id: str = "s1", messages: int = 2) -> ConversationSession:
+    now = datetime.now()
+    return ConversationSession(
+        session_id=session_id,
+        messages=[
+            ChatMessage(
+                id=f"{session_id}-{i}",
+                type=MessageType.USER if i % 2 == 0 else MessageType.AI,
+                content=f"turn {i}",
+                timestamp=now,
+                session_id=session_id
+            )
+            for i in range(messages)
+        ],
+        context=ConversationContext(),
+        created_at=now,
+        updated_at=now
+    )
+
+def _interview() -> ConversationSession:
+    """UUID ids, as the service creates them, so messages take the columnar path"""
+    session_id = str(uuid.uuid4())
+    started = datetime(2026, 3, 1, 9, 30, 15, 123456)
+
+    def message(i: int, **fields) -> ChatMessage:
+        values = {
+            "id": str(uuid.uuid4()),
+            "type": MessageType.USER if i % 2 == 0 else MessageType.AI,
+            "content": f"turn {i}",
+            "timestamp": started + timedelta(seconds=i),
+            "session_id": session_id,
+        }
+        return ChatMessage(**{**values, **fields})
+
+    return ConversationSession(
+        session_id=session_id,
+        messages=[
+            message(0),
+            message(1),
+            message(2, timestamp=datetime(2026, 3, 1, 9, 31, tzinfo=timezone.utc)),
+            message(3, audio_url="https://cdn.example/reply.mp3"),
+            message(4, id="client-supplied-id"),
+            message(5),
+        ],
+        context=ConversationContext(current_question=dict(QUESTION), user_code="x = 1"),
+        created_at=started,
+        updated_at=started,
+        history_summary="notes",
+        summarized_message_count=2
+    )
+
+def _redis_store() -> RedisSessionStore:
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisSessionStore(idle_ttl_seconds=60, client=fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer()))
+
+@pytest.fixture
+async def redis_store():
+    store = _redis_store()
+    yield store
+    await store.close()
+
+@pytest.fixture(params=["memory", "compact", "redis"])
+async def store(request):
+    if request.param == "memory":
+        yield InMemorySessionStore(idle_ttl_seconds=60, compact=False)
+    elif request.param == "compact":
+        # No hot set, so every get decodes the compact record
+        yield InMemorySessionStore(idle_ttl_seconds=60, hot_sessions=0)
+    else:
+        store = _redis_store()
+        yield store
+        await store.close()
+
+def test_compact_round_trip():
+    session = _interview()
+    compact = CompactSession(session)
+    # Only the tz-aware, audio and non-uuid messages fall back to full models
+    assert sorted(compact.extras) == [2, 3, 4]
+    assert compact.to_session().model_dump() == session.model_dump()
+
+    session.messages.append(session.messages[0].model_copy(update={"id": str(uuid.uuid4()), "content": "more"}))
+    compact.update(session)
+    assert compact.to_session().model_dump() == session.model_dump()
+
+def test_compact_sessions_share_the_question():
+    first, second = _interview(), _interview()
+    assert first.context.current_question is not second.context.current_question
+    assert CompactSession(first).question is CompactSession(second).question
+
+async def test_interview_round_trip(store):
+    session = _interview()
+    await store.put(session)
+    loaded = await store.get(session.session_id)
+    assert loaded.model_dump() == session.model_dump()
+
+async def test_hot_sessions_skip_the_decode():
+    store = InMemorySessionStore(hot_sessions=1)
+    first, second = _interview(), _interview()
+    await store.put(first)
+    assert await store.get(first.session_id) is first
+    await store.put(second)
+    # first left the hot set: decoded once, then served from it again
+    loaded = await store.get(first.session_id)
+    assert loaded is not first and loaded.model_dump() == first.model_dump()
+    assert await store.get(first.session_id) is loaded
+    assert store.stats()["decodes"] == 1
+
+    await store.delete(first.session_id)
+    assert await store.get(first.session_id) is None
+
+async def test_round_trip(store):
+    session = _session()
+    await store.put(session)
+    loaded = await store.get("s1")
+    assert loaded.model_dump() == session.model_dump()
+    assert await store.exists("s1")
+    assert await store.size() == 1
+
+    await store.delete("s1")
+    assert await store.get("s1") is None
+    assert not await store.exists("s1")
+
+async def test_redis_sliding_expiry(redis_store):
+    await redis_store.put(_session())
+    await redis_store.client.expire("intervue:session:s1", 5)
+    await redis_store.get("s1")
+    assert await redis_store.client.ttl("intervue:session:s1") > 5
+    assert redis_store.stats()["hits"] == 1
+
+async def test_redis_stats_do_no_io(redis_store):
+    await redis_store.put(_session("a"))
+    await redis_store.put(_session("b"))
+    assert redis_store.stats()["size"] is None
+    assert await redis_store.size() == 2
+    assert redis_store.stats()["size"] == 2
+
+async def test_redis_calls_yield_to_the_event_loop(redis_store):
+    # A blocking client would starve this ticker while the store is busy
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    for i in range(20):
+        await redis_store.put(_session(f"s{i}"))
+        await redis_store.get(f"s{i}")
+    task.cancel()
+    assert ticks > 0
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.upstream import TokenBucket, UpstreamLimiter, UpstreamOverloadedError
+
+def test_bucket_refills_at_its_rate_up_to_capacity(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.upstream.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket._tokens = 0
+
+    now[0] += 0.25
+    bucket._refill()
+    assert bucket._tokens == pytest.approx(2.5)
+    now[0] += 60
+    bucket._refill()
+    assert bucket._tokens == 5
+
+async def test_bucket_paces_acquires_once_empty():
+    bucket = TokenBucket(rate=100, capacity=2)
+    started = time.monotonic()
+    for _ in range(2):
+        await bucket.acquire()
+    assert time.monotonic() - started < 0.01
+
+    for _ in range(4):
+        await bucket.acquire()
+    # Four more tokens at 100/s take about 40ms
+    assert time.monotonic() - started >= 0.035
+
+async def test_concurrency_is_bounded_by_the_semaphore():
+    limiter = UpstreamLimiter(max_concurrency=2, max_queue_depth=10, queue_timeout_seconds=1)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    assert limiter.stats()["admitted"] == 6
+    assert limiter.in_flight == 0 and limiter.waiting == 0
+
+async def test_excess_callers_are_shed():
+    limiter = UpstreamLimiter(max_concurrency=1, max_queue_depth=1, queue_timeout_seconds=0.05)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+    assert (limiter.in_flight, limiter.waiting) == (1, 1)
+
+    # One caller already queued: the next is turned away without waiting
+    with pytest.raises(UpstreamOverloadedError):
+        async with limiter.slot():
+            pass
+    # The queued one gives up after the queue timeout
+    with pytest.raises(UpstreamOverloadedError):
+        await waiter
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["timed_out"] == 1
+
+    release.set()
+    await holder
+    assert limiter._semaphore._value == 1
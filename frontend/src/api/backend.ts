@@ -49,6 +49,8 @@ apiClient.interceptors.response.use(
 export interface ChatMessageRequest {
   content: string;
   session_id?: string;
+  // Catalog problem id; the backend looks up the full context (see /api/v1/problems)
+  question_id?: string;
   question_context?: {
     id: string;
     number: number;
@@ -67,6 +69,16 @@ export interface ChatMessageRequest {
     hints?: string[];
   };
   code_context?: string;
+  // Unified diff against the code last sent for this session, instead of code_context
+  code_patch?: string;
+  code_base_version?: string;
+}
+
+export interface CreateSessionRequest {
+  question_id?: string;
+  question_number?: number;
+  total_questions?: number;
+  prefetch_opening?: boolean;
 }
 
 export interface ChatMessage {
@@ -100,8 +112,21 @@ export interface ConversationHistoryResponse {
   messages: ChatMessage[];
   context: any;
   message_count: number;
+  next_cursor?: string | null;
+  has_more?: boolean;
+}
+
+export interface ConversationHistoryParams {
+  cursor?: string;
+  limit?: number;
+  since_id?: string;
+  since?: string;
 }
 
+// Session id header for routes that take the session in the body; the backend rate-limits per session
+const sessionHeaders = (sessionId?: string): Record<string, string> =>
+  sessionId ? { 'X-Session-Id': sessionId } : {};
+
 // Chat API functions
 export class ChatAPI {
   /**
@@ -109,7 +134,9 @@ export class ChatAPI {
    */
   static async sendMessage(request: ChatMessageRequest): Promise<ChatMessageResponse> {
     try {
-      const response = await apiClient.post<ChatMessageResponse>('/api/v1/chat/message', request);
+      const response = await apiClient.post<ChatMessageResponse>('/api/v1/chat/message', request, {
+        headers: sessionHeaders(request.session_id),
+      });
       return response.data;
     } catch (error) {
       console.error('Error sending message:', error);
@@ -117,12 +144,66 @@ export class ChatAPI {
     }
   }
 
+  /**
+   * Send a text message and stream the AI response token by token (SSE).
+   * `onDelta` is called for each chunk; resolves with the stored message.
+   */
+  static async streamMessage(
+    request: ChatMessageRequest,
+    onDelta: (content: string) => void
+  ): Promise<ChatMessageResponse> {
+    const response = await fetch(`${API_BASE_URL}/api/v1/chat/message/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...sessionHeaders(request.session_id) },
+      body: JSON.stringify(request),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`API Error: ${response.status} ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        const eventLine = rawEvent.split('\n').find((line) => line.startsWith('event: '));
+        const dataLine = rawEvent.split('\n').find((line) => line.startsWith('data: '));
+        if (!eventLine || !dataLine) continue;
+
+        const event = eventLine.slice('event: '.length);
+        const data = JSON.parse(dataLine.slice('data: '.length));
+
+        if (event === 'delta') {
+          onDelta(data.content);
+        } else if (event === 'done') {
+          return data as ChatMessageResponse;
+        } else if (event === 'error') {
+          throw new Error(`API Error: ${data.detail}`);
+        }
+      }
+    }
+
+    throw new Error('Stream closed before the response completed');
+  }
+
   /**
    * Send a voice message and get AI response
    */
   static async sendVoiceMessage(request: VoiceMessageRequest): Promise<VoiceMessageResponse> {
     try {
-      const response = await apiClient.post<VoiceMessageResponse>('/api/v1/chat/voice', request);
+      const response = await apiClient.post<VoiceMessageResponse>('/api/v1/chat/voice', request, {
+        headers: sessionHeaders(request.session_id),
+      });
       return response.data;
     } catch (error) {
       console.error('Error sending voice message:', error);
@@ -131,12 +212,25 @@ export class ChatAPI {
   }
 
   /**
-   * Get conversation history for a session
+   * Get conversation history for a session.
+   * Pass `since_id` to poll for new messages only, and the previous `etag`
+   * to get `null` back when nothing has changed (HTTP 304).
    */
-  static async getConversationHistory(sessionId: string): Promise<ConversationHistoryResponse> {
+  static async getConversationHistory(
+    sessionId: string,
+    params: ConversationHistoryParams = {},
+    etag?: string
+  ): Promise<{ data: ConversationHistoryResponse | null; etag?: string }> {
     try {
-      const response = await apiClient.get<ConversationHistoryResponse>(`/api/v1/chat/conversation/${sessionId}`);
-      return response.data;
+      const response = await apiClient.get<ConversationHistoryResponse>(`/api/v1/chat/conversation/${sessionId}`, {
+        params,
+        headers: etag ? { 'If-None-Match': etag } : undefined,
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+      });
+      return {
+        data: response.status === 304 ? null : response.data,
+        etag: response.headers['etag'] ?? etag,
+      };
     } catch (error) {
       console.error('Error getting conversation history:', error);
       throw error;
@@ -144,11 +238,12 @@ export class ChatAPI {
   }
 
   /**
-   * Create a new conversation session
+   * Create a new conversation session.
+   * Passing the upcoming question lets the backend prefetch the interviewer's opening turn.
    */
-  static async createSession(): Promise<{ session_id: string }> {
+  static async createSession(request?: CreateSessionRequest): Promise<{ session_id: string; opening_pending?: boolean }> {
     try {
-      const response = await apiClient.post<{ session_id: string }>('/api/v1/chat/session');
+      const response = await apiClient.post<{ session_id: string; opening_pending?: boolean }>('/api/v1/chat/session', request);
       return response.data;
     } catch (error) {
       console.error('Error creating session:', error);
@@ -156,12 +251,30 @@ export class ChatAPI {
     }
   }
 
+  /**
+   * Get the prefetched opening turn, waiting up to `wait` seconds.
+   * Resolves to null if it is not ready or was dropped.
+   */
+  static async getOpening(sessionId: string, wait: number = 10): Promise<ChatMessageResponse | null> {
+    try {
+      const response = await apiClient.get<ChatMessageResponse>(`/api/v1/chat/session/${sessionId}/opening`, {
+        params: { wait },
+        timeout: (wait + 5) * 1000,
+        validateStatus: (status) => status === 200 || status === 202 || status === 404,
+      });
+      return response.status === 200 ? response.data : null;
+    } catch (error) {
+      console.error('Error getting opening message:', error);
+      return null;
+    }
+  }
+
   /**
    * Update session context
    */
-  static async updateSessionContext(sessionId: string, contextUpdates: any): Promise<{ message: string }> {
+  static async updateSessionContext(sessionId: string, contextUpdates: any): Promise<{ message: string; opening_pending?: boolean }> {
     try {
-      const response = await apiClient.put<{ message: string }>(`/api/v1/chat/session/${sessionId}/context`, contextUpdates);
+      const response = await apiClient.put<{ message: string; opening_pending?: boolean }>(`/api/v1/chat/session/${sessionId}/context`, contextUpdates);
       return response.data;
     } catch (error) {
       console.error('Error updating session context:', error);
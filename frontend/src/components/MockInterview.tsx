@@ -12,6 +12,23 @@ import ChatInterface from './ChatInterface';
 import { ChatAPI, type ChatMessageRequest } from '../api/backend';
 import { ProblemService } from '../services/problemService';
 
+// Catalog problems are sent by id; the backend holds their full context
+const questionRequestContext = (question: Question): Pick<ChatMessageRequest, 'question_id' | 'question_context'> => {
+  if (question.problem) {
+    return { question_id: question.problem.id };
+  }
+  return {
+    question_context: {
+      id: question.id,
+      number: question.number,
+      type: question.type,
+      difficulty: question.difficulty,
+      title: question.title,
+      description: question.description
+    }
+  };
+};
+
 const MockInterview: React.FC = () => {
   const [sessionId, setSessionId] = useState<string | null>(null);
   const [isLoadingResponse, setIsLoadingResponse] = useState(false);
@@ -33,15 +50,22 @@ const MockInterview: React.FC = () => {
   useEffect(() => {
     const initializeInterview = async () => {
       try {
-        // Create backend session
-        const response = await ChatAPI.createSession();
-        setSessionId(response.session_id);
-        console.log('Session created:', response.session_id);
-
         // Generate random interview questions
         const questions = ProblemService.generateInterviewSet(5);
         setInterviewQuestions(questions);
 
+        // Create backend session; naming the first question lets it prepare the opening turn
+        const response = await ChatAPI.createSession(
+          questions.length > 0
+            ? { question_id: questions[0].id, question_number: 1, total_questions: questions.length }
+            : undefined
+        );
+        setSessionId(response.session_id);
+        console.log('Session created:', response.session_id);
+        if (response.opening_pending) {
+          appendOpening(response.session_id);
+        }
+
         // Set up first question
         if (questions.length > 0) {
           const firstQuestion = questions[0];
@@ -163,19 +187,7 @@ When you're ready, start implementing the solution in the code editor on the lef
       const request: ChatMessageRequest = {
         content,
         session_id: sessionId,
-        question_context: {
-          id: currentQuestion.id,
-          number: currentQuestion.number,
-          type: currentQuestion.type,
-          difficulty: currentQuestion.difficulty,
-          title: currentQuestion.title,
-          description: currentQuestion.description,
-          // Enhanced problem context from the JSON database
-          category: currentQuestion.problem?.category,
-          examples: currentQuestion.problem?.examples,
-          constraints: currentQuestion.problem?.constraints,
-          hints: currentQuestion.problem?.hints
-        },
+        ...questionRequestContext(currentQuestion),
         code_context: interviewState.currentCode
       };
 
@@ -242,19 +254,7 @@ When you're ready, start implementing the solution in the code editor on the lef
       const placeholder_response = await ChatAPI.sendMessage({
         content: "[User sent a voice message - voice transcription not yet implemented]",
         session_id: sessionId,
-        question_context: {
-          id: currentQuestion.id,
-          number: currentQuestion.number,
-          type: currentQuestion.type,
-          difficulty: currentQuestion.difficulty,
-          title: currentQuestion.title,
-          description: currentQuestion.description,
-          // Enhanced problem context from the JSON database
-          category: currentQuestion.problem?.category,
-          examples: currentQuestion.problem?.examples,
-          constraints: currentQuestion.problem?.constraints,
-          hints: currentQuestion.problem?.hints
-        },
+        ...questionRequestContext(currentQuestion),
         code_context: interviewState.currentCode
       });
 
@@ -289,6 +289,24 @@ When you're ready, start implementing the solution in the code editor on the lef
     }
   };
 
+  // Show the interviewer's prefetched opening turn once it is ready
+  const appendOpening = async (id: string) => {
+    const opening = await ChatAPI.getOpening(id);
+    if (!opening) return;
+    setInterviewState(prev => ({
+      ...prev,
+      messages: [
+        ...prev.messages,
+        {
+          id: opening.message.id,
+          type: opening.message.type,
+          content: opening.message.content,
+          timestamp: new Date(opening.message.timestamp)
+        }
+      ]
+    }));
+  };
+
   const handleNextQuestion = () => {
     if (interviewState.currentQuestion < interviewState.totalQuestions) {
       const nextQuestionNumber = interviewState.currentQuestion + 1;
@@ -297,6 +315,16 @@ When you're ready, start implementing the solution in the code editor on the lef
       if (nextQuestion) {
         // Get the starter code for the current language
         const starterCode = ProblemService.getStarterCode(nextQuestion.id, interviewState.language);
+
+        if (sessionId) {
+          ChatAPI.updateSessionContext(sessionId, { question_id: nextQuestion.id, question_number: nextQuestionNumber })
+            .then(result => {
+              if (result.opening_pending) {
+                appendOpening(sessionId);
+              }
+            })
+            .catch(error => console.error('Failed to update session question:', error));
+        }
         
         setInterviewState(prev => ({
           ...prev,